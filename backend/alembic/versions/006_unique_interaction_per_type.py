@@ -0,0 +1,51 @@
+"""Make interactions unique per user, joke and type
+
+Revision ID: 006
+Revises: 005
+Create Date: 2024-01-15
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Deduplicate interactions and make the (user, joke, type) index unique."""
+
+    # Keep one row per (user_id, joke_id, interaction_type)
+    op.execute(
+        """
+        DELETE FROM joke_interactions
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM joke_interactions
+            GROUP BY user_id, joke_id, interaction_type
+        )
+        """
+    )
+
+    op.drop_index('idx_interaction_user_joke_type', table_name='joke_interactions')
+    op.create_index(
+        'idx_interaction_user_joke_type',
+        'joke_interactions',
+        ['user_id', 'joke_id', 'interaction_type'],
+        unique=True
+    )
+
+    print("Made interactions unique per user, joke and type")
+
+
+def downgrade():
+    """Restore the non-unique (user, joke, type) index."""
+    op.drop_index('idx_interaction_user_joke_type', table_name='joke_interactions')
+    op.create_index(
+        'idx_interaction_user_joke_type',
+        'joke_interactions',
+        ['user_id', 'joke_id', 'interaction_type'],
+        unique=False
+    )
+    print("Restored non-unique interaction index")
@@ -0,0 +1,38 @@
+"""Add interaction analytics indexes
+
+Revision ID: 007
+Revises: 006
+Create Date: 2024-01-16
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add indexes for per-user analytics and joke joins on interactions."""
+
+    # Per-user counts by type, optionally within a time window
+    op.create_index(
+        'idx_interaction_user_type_created',
+        'joke_interactions',
+        ['user_id', 'interaction_type', 'created_at'],
+        unique=False
+    )
+
+    # Joins and aggregates from jokes to their interactions
+    op.create_index('idx_interaction_joke', 'joke_interactions', ['joke_id'], unique=False)
+
+    print("Added interaction analytics indexes")
+
+
+def downgrade():
+    """Remove interaction analytics indexes."""
+    op.drop_index('idx_interaction_joke', table_name='joke_interactions')
+    op.drop_index('idx_interaction_user_type_created', table_name='joke_interactions')
+    print("Dropped interaction analytics indexes")
@@ -0,0 +1,36 @@
+"""Add favorite keyset pagination index
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-01-17
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add a covering index for paging through a user's favorites by time."""
+
+    # Walked backwards for newest-first pages; joke_id is carried in the
+    # index on PostgreSQL so only the join to jokes touches the heap
+    op.create_index(
+        'idx_favorite_user_created',
+        'favorites',
+        ['user_id', 'created_at', 'id'],
+        unique=False,
+        postgresql_include=['joke_id']
+    )
+
+    print("Added favorite keyset pagination index")
+
+
+def downgrade():
+    """Remove the favorite keyset pagination index."""
+    op.drop_index('idx_favorite_user_created', table_name='favorites')
+    print("Dropped favorite keyset pagination index")
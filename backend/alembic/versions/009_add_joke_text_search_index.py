@@ -0,0 +1,36 @@
+"""Add joke full-text search index
+
+Revision ID: 009
+Revises: 008
+Create Date: 2024-01-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add a GIN index over the joke text search vector."""
+
+    # Must match the expression built by JokeRepository.search_jokes
+    op.create_index(
+        'idx_joke_text_tsv',
+        'jokes',
+        [sa.text("to_tsvector('simple', text)")],
+        unique=False,
+        postgresql_using='gin'
+    )
+
+    print("Added joke full-text search index")
+
+
+def downgrade():
+    """Remove the joke full-text search index."""
+    op.drop_index('idx_joke_text_tsv', table_name='jokes')
+    print("Dropped joke full-text search index")
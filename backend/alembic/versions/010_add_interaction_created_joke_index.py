@@ -0,0 +1,37 @@
+"""Cover recent interaction counts per joke
+
+Revision ID: 010
+Revises: 009
+Create Date: 2024-01-19
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Replace the created_at index with one that also carries joke_id."""
+
+    # Trending counts per joke over a recent window read only the index;
+    # created_at stays the leading column, so time-range filters still use it
+    op.create_index(
+        'idx_interaction_created_joke',
+        'joke_interactions',
+        ['created_at', 'joke_id'],
+        unique=False
+    )
+    op.drop_index('idx_interaction_created', table_name='joke_interactions')
+
+    print("Added covering index for recent interactions per joke")
+
+
+def downgrade():
+    """Restore the plain created_at index."""
+    op.create_index('idx_interaction_created', 'joke_interactions', ['created_at'], unique=False)
+    op.drop_index('idx_interaction_created_joke', table_name='joke_interactions')
+    print("Restored plain interaction created_at index")
@@ -0,0 +1,38 @@
+"""Cover tag score lookups for similar-user search
+
+Revision ID: 011
+Revises: 010
+Create Date: 2024-01-20
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Replace the tag_id index with one that also carries user_id and score."""
+
+    # Similar-user search probes other users' scores per shared tag and
+    # aggregates by user; with user_id and score in the index it never
+    # touches the table. tag_id stays the leading column for tag lookups
+    op.create_index(
+        'idx_user_tag_scores_tag_user_score',
+        'user_tag_scores',
+        ['tag_id', 'user_id', 'score'],
+        unique=False
+    )
+    op.drop_index('idx_user_tag_scores_tag', table_name='user_tag_scores')
+
+    print("Added covering index for similar-user tag score lookups")
+
+
+def downgrade():
+    """Restore the plain tag_id index."""
+    op.create_index('idx_user_tag_scores_tag', 'user_tag_scores', ['tag_id'], unique=False)
+    op.drop_index('idx_user_tag_scores_tag_user_score', table_name='user_tag_scores')
+    print("Restored plain user tag score tag_id index")
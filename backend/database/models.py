@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float, Index, CheckConstraint, UniqueConstraint, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float, Numeric, Index, CheckConstraint, UniqueConstraint, Enum, case, cast
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, validates
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, literal_column
 from datetime import datetime
 from typing import Optional, List
 import uuid
@@ -126,6 +126,11 @@ class User(Base):
         return f"<User(id={self.id}, username={self.username})>"
 
 
+# Text search configuration for joke full-text search; kept as an SQL literal
+# so queries match the expression index on PostgreSQL
+JOKE_SEARCH_CONFIG = "'simple'"
+
+
 class Joke(Base):
     """Joke model for storing jokes"""
     __tablename__ = 'jokes'
@@ -167,6 +172,11 @@ class Joke(Base):
         Index('idx_joke_category_language', 'category', 'language'),
         Index('idx_joke_rating', 'rating'),
         Index('idx_joke_created', 'created_at'),
+        Index(
+            'idx_joke_text_tsv',
+            func.to_tsvector(literal_column(JOKE_SEARCH_CONFIG), text),
+            postgresql_using='gin'
+        ).ddl_if(dialect='postgresql'),
         CheckConstraint('rating >= 0 AND rating <= 5', name='check_rating_bounds'),
         CheckConstraint('view_count >= 0', name='check_view_count_positive'),
         CheckConstraint('like_count >= 0', name='check_like_count_positive'),
@@ -191,6 +201,7 @@ class Favorite(Base):
 
     __table_args__ = (
         Index('idx_favorite_user_joke', 'user_id', 'joke_id', unique=True),
+        Index('idx_favorite_user_created', 'user_id', 'created_at', 'id', postgresql_include=['joke_id']),
     )
 
     def __repr__(self):
@@ -220,9 +231,11 @@ class JokeInteraction(Base):
         return interaction_type
 
     __table_args__ = (
-        Index('idx_interaction_user_joke_type', 'user_id', 'joke_id', 'interaction_type'),
-        Index('idx_interaction_created', 'created_at'),
+        Index('idx_interaction_user_joke_type', 'user_id', 'joke_id', 'interaction_type', unique=True),
+        Index('idx_interaction_created_joke', 'created_at', 'joke_id'),
         Index('idx_interaction_user_created', 'user_id', 'created_at'),
+        Index('idx_interaction_user_type_created', 'user_id', 'interaction_type', 'created_at'),
+        Index('idx_interaction_joke', 'joke_id'),
         CheckConstraint("interaction_type IN ('view', 'like', 'skip')", name='check_interaction_type'),
     )
 
@@ -283,6 +296,19 @@ class Category(Base):
 
 
 # Helper functions for model operations
+def like_ratio_rating(view_count, like_count, rating):
+    """
+    SQL expression for a joke's rating after its counters change.
+
+    Viewed jokes are rated 0-5 by their like ratio; unviewed jokes keep the
+    given rating, which is how seeded and imported jokes carry theirs.
+    """
+    return case(
+        (view_count > 0, func.round(cast(like_count * 5, Numeric) / view_count, 2)),
+        else_=rating
+    )
+
+
 def create_user(session, username: str, email: str, preferred_language: str = 'en') -> User:
     """Create a new user with associated stats"""
     user = User(
@@ -472,7 +498,7 @@ class UserTagScore(Base):
     __table_args__ = (
         Index('idx_user_tag_score_unique', 'user_id', 'tag_id', unique=True),
         Index('idx_user_tag_scores_user', 'user_id'),
-        Index('idx_user_tag_scores_tag', 'tag_id'),
+        Index('idx_user_tag_scores_tag_user_score', 'tag_id', 'user_id', 'score'),
         Index('idx_user_tag_scores_score', 'score'),
         CheckConstraint('score >= -1 AND score <= 1', name='check_score_bounds'),
         CheckConstraint('interaction_count >= 0', name='check_interaction_count_positive'),
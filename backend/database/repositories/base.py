@@ -4,13 +4,16 @@ from abc import ABC, abstractmethod
 from typing import TypeVar, Generic, List, Optional, Dict, Any, Union, Type, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, joinedload
-from sqlalchemy import select, update, delete, func, and_, or_, text
+from sqlalchemy import select, update, delete, func, and_, or_, text, any_, bindparam, cast, BigInteger, Text
+from sqlalchemy.dialects.postgresql import ARRAY, insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError, NoResultFound, SQLAlchemyError
 from datetime import datetime, timedelta
 import logging
 import asyncio
 from contextlib import asynccontextmanager
 import uuid
+import weakref
 
 # Type variable for model types
 ModelType = TypeVar('ModelType')
@@ -19,6 +22,29 @@ UpdateSchemaType = TypeVar('UpdateSchemaType')
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round trip when streaming large result sets
+STREAM_YIELD_PER = 500
+
+# Whether each engine's database has the postgresql-hll extension installed
+_hll_support: "weakref.WeakKeyDictionary[Any, bool]" = weakref.WeakKeyDictionary()
+
+
+def count_distinct(column, approximate: bool = False):
+    """
+    Count distinct values of a column.
+
+    With ``approximate`` the count is estimated with a HyperLogLog sketch
+    (postgresql-hll, roughly 1% error) instead of the sort-based exact
+    COUNT(DISTINCT). Only pass it when the extension is known to exist,
+    see BaseRepository._supports_approx_distinct.
+    """
+    if approximate:
+        return cast(
+            func.hll_cardinality(func.hll_add_agg(func.hll_hash_text(cast(column, Text)))),
+            BigInteger
+        )
+    return func.count(func.distinct(column))
+
 
 class RepositoryError(Exception):
     """Base repository exception."""
@@ -54,6 +80,14 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType], ABC
     - Concurrency control
     """
 
+    # Methods RepositoryFactory.execute_in_repositories may call by name;
+    # subclasses extend this set to expose their own operations
+    ALLOWED_BATCH_METHODS = frozenset({
+        'create', 'get', 'get_multi', 'update', 'delete',
+        'bulk_create', 'bulk_update', 'bulk_delete',
+        'count', 'exists', 'find_by', 'find_one_by'
+    })
+
     def __init__(self, model: Type[ModelType], session: AsyncSession):
         """
         Initialize repository with model and session.
@@ -119,16 +153,16 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType], ABC
                 await self.session.flush()
                 await self.session.refresh(db_obj)
 
-            logger.debug(f"Created {self.model.__name__} with id: {getattr(db_obj, 'id', 'N/A')}")
+            logger.debug("Created %s with id: %s", self.model.__name__, getattr(db_obj, 'id', 'N/A'))
             return db_obj
 
         except IntegrityError as e:
             await self.session.rollback()
-            logger.error(f"Integrity error creating {self.model.__name__}: {str(e)}")
+            logger.error("Integrity error creating %s: %s", self.model.__name__, e)
             raise ValidationError(f"Data integrity violation: {str(e)}")
         except Exception as e:
             await self.session.rollback()
-            logger.error(f"Error creating {self.model.__name__}: {str(e)}")
+            logger.error("Error creating %s: %s", self.model.__name__, e)
             raise RepositoryError(f"Failed to create {self.model.__name__}: {str(e)}")
 
     async def get(
@@ -185,7 +219,7 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType], ABC
                 raise NotFoundError(f"{self.model.__name__} with id {id} not found")
             return None
         except Exception as e:
-            logger.error(f"Error getting {self.model.__name__} with id {id}: {str(e)}")
+            logger.error("Error getting %s with id %s: %s", self.model.__name__, id, e)
             raise RepositoryError(f"Failed to get {self.model.__name__}: {str(e)}")
 
     async def get_multi(
@@ -240,7 +274,7 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType], ABC
             return result.scalars().all()
 
         except Exception as e:
-            logger.error(f"Error getting multiple {self.model.__name__}: {str(e)}")
+            logger.error("Error getting multiple %s: %s", self.model.__name__, e)
             raise RepositoryError(f"Failed to get multiple {self.model.__name__}: {str(e)}")
 
     async def update(
@@ -302,18 +336,18 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType], ABC
                 cache_key = f"{self.model.__name__}:{id}"
                 self._cache.pop(cache_key, None)
 
-            logger.debug(f"Updated {self.model.__name__} with id: {id}")
+            logger.debug("Updated %s with id: %s", self.model.__name__, id)
             return db_obj
 
         except NotFoundError:
             raise
         except IntegrityError as e:
             await self.session.rollback()
-            logger.error(f"Integrity error updating {self.model.__name__}: {str(e)}")
+            logger.error("Integrity error updating %s: %s", self.model.__name__, e)
             raise ValidationError(f"Data integrity violation: {str(e)}")
         except Exception as e:
             await self.session.rollback()
-            logger.error(f"Error updating {self.model.__name__}: {str(e)}")
+            logger.error("Error updating %s: %s", self.model.__name__, e)
             raise RepositoryError(f"Failed to update {self.model.__name__}: {str(e)}")
 
     async def delete(self, id: Any, commit: bool = True) -> bool:
@@ -343,12 +377,12 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType], ABC
                 cache_key = f"{self.model.__name__}:{id}"
                 self._cache.pop(cache_key, None)
 
-            logger.debug(f"Deleted {self.model.__name__} with id: {id}")
+            logger.debug("Deleted %s with id: %s", self.model.__name__, id)
             return True
 
         except Exception as e:
             await self.session.rollback()
-            logger.error(f"Error deleting {self.model.__name__}: {str(e)}")
+            logger.error("Error deleting %s: %s", self.model.__name__, e)
             raise RepositoryError(f"Failed to delete {self.model.__name__}: {str(e)}")
 
     # Bulk Operations
@@ -406,12 +440,12 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType], ABC
             if commit:
                 await self.session.commit()
 
-            logger.info(f"Bulk created {len(created_objs)} {self.model.__name__} entities")
+            logger.info("Bulk created %s %s entities", len(created_objs), self.model.__name__)
             return created_objs
 
         except Exception as e:
             await self.session.rollback()
-            logger.error(f"Error bulk creating {self.model.__name__}: {str(e)}")
+            logger.error("Error bulk creating %s: %s", self.model.__name__, e)
             raise RepositoryError(f"Failed to bulk create {self.model.__name__}: {str(e)}")
 
     async def bulk_update(
@@ -457,12 +491,12 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType], ABC
             if commit:
                 await self.session.commit()
 
-            logger.info(f"Bulk updated {updated_count} {self.model.__name__} entities")
+            logger.info("Bulk updated %s %s entities", updated_count, self.model.__name__)
             return updated_count
 
         except Exception as e:
             await self.session.rollback()
-            logger.error(f"Error bulk updating {self.model.__name__}: {str(e)}")
+            logger.error("Error bulk updating %s: %s", self.model.__name__, e)
             raise RepositoryError(f"Failed to bulk update {self.model.__name__}: {str(e)}")
 
     async def bulk_delete(
@@ -484,19 +518,19 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType], ABC
             if not ids:
                 return 0
 
-            query = delete(self.model).where(self.model.id.in_(ids))
+            query = delete(self.model).where(self._id_matches_any(ids))
             result = await self.session.execute(query)
             deleted_count = result.rowcount
 
             if commit:
                 await self.session.commit()
 
-            logger.info(f"Bulk deleted {deleted_count} {self.model.__name__} entities")
+            logger.info("Bulk deleted %s %s entities", deleted_count, self.model.__name__)
             return deleted_count
 
         except Exception as e:
             await self.session.rollback()
-            logger.error(f"Error bulk deleting {self.model.__name__}: {str(e)}")
+            logger.error("Error bulk deleting %s: %s", self.model.__name__, e)
             raise RepositoryError(f"Failed to bulk delete {self.model.__name__}: {str(e)}")
 
     # Query Operations
@@ -521,7 +555,7 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType], ABC
             return result.scalar()
 
         except Exception as e:
-            logger.error(f"Error counting {self.model.__name__}: {str(e)}")
+            logger.error("Error counting %s: %s", self.model.__name__, e)
             raise RepositoryError(f"Failed to count {self.model.__name__}: {str(e)}")
 
     async def exists(self, id: Any) -> bool:
@@ -540,7 +574,7 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType], ABC
             return result.scalar() > 0
 
         except Exception as e:
-            logger.error(f"Error checking existence of {self.model.__name__}: {str(e)}")
+            logger.error("Error checking existence of %s: %s", self.model.__name__, e)
             raise RepositoryError(f"Failed to check existence: {str(e)}")
 
     async def find_by(
@@ -567,7 +601,7 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType], ABC
             return result.scalars().all()
 
         except Exception as e:
-            logger.error(f"Error finding {self.model.__name__} by filters: {str(e)}")
+            logger.error("Error finding %s by filters: %s", self.model.__name__, e)
             raise RepositoryError(f"Failed to find by filters: {str(e)}")
 
     async def find_one_by(
@@ -596,11 +630,97 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType], ABC
             return entities[0]
 
         except Exception as e:
-            logger.error(f"Error finding one {self.model.__name__} by filters: {str(e)}")
+            logger.error("Error finding one %s by filters: %s", self.model.__name__, e)
             raise RepositoryError(f"Failed to find one by filters: {str(e)}")
 
     # Helper Methods
 
+    @property
+    def _is_postgresql(self) -> bool:
+        """Whether the session is bound to a PostgreSQL database."""
+        return self.session.get_bind().dialect.name == 'postgresql'
+
+    def _dialect_insert(self, model: Optional[Type[Any]] = None):
+        """
+        Build an INSERT for the bound dialect.
+
+        The returned statement supports ``on_conflict_do_nothing`` and
+        ``on_conflict_do_update`` on both PostgreSQL and SQLite.
+        """
+        model = model or self.model
+        if self._is_postgresql:
+            return postgresql_insert(model)
+        return sqlite_insert(model)
+
+    def _id_matches_any(self, ids: List[Any]):
+        """
+        Build an ``id IN ids`` condition.
+
+        On PostgreSQL the IDs are sent as a single array parameter
+        (``id = ANY($1)``) instead of one bind parameter per element, which
+        keeps large lists under the driver's parameter limit.
+        """
+        if self._is_postgresql:
+            return self.model.id == any_(
+                bindparam('ids', list(ids), type_=ARRAY(self.model.id.type))
+            )
+        return self.model.id.in_(ids)
+
+    async def _supports_approx_distinct(self) -> bool:
+        """
+        Whether count_distinct may use HyperLogLog estimates.
+
+        True only on PostgreSQL with the hll extension installed; the check
+        runs once per engine.
+        """
+        if not self._is_postgresql:
+            return False
+
+        engine = self.session.get_bind()
+        supported = _hll_support.get(engine)
+        if supported is None:
+            result = await self.session.execute(
+                text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'hll')")
+            )
+            supported = bool(result.scalar())
+            _hll_support[engine] = supported
+        return supported
+
+    async def _estimated_row_count(self, model: Optional[Type[Any]] = None) -> Optional[int]:
+        """
+        Planner estimate of a table's row count.
+
+        Reads ``pg_class.reltuples``, which ANALYZE and autovacuum keep
+        current, so no table scan is needed. Returns None when no estimate is
+        available: off PostgreSQL or for a table that was never analyzed.
+        """
+        if not self._is_postgresql:
+            return None
+
+        table_name = (model or self.model).__tablename__
+        result = await self.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+            {'table_name': table_name}
+        )
+        estimate = result.scalar()
+        if estimate is None or estimate < 0:
+            return None
+        return estimate
+
+    async def _stream(
+        self,
+        query,
+        params: Optional[Dict[str, Any]] = None,
+        yield_per: int = STREAM_YIELD_PER
+    ):
+        """
+        Execute a query with a server-side cursor.
+
+        Rows are fetched ``yield_per`` at a time while the caller iterates
+        with ``async for`` instead of being buffered up front.
+        """
+        return await self.session.stream(query.execution_options(yield_per=yield_per), params)
+
     def _apply_filters(self, query, filters: Dict[str, Any]):
         """Apply filter conditions to query."""
         for field, value in filters.items():
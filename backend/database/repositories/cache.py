@@ -0,0 +1,193 @@
+"""Cache-aside storage for expensive repository analytics queries."""
+
+from typing import Any, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import functools
+import inspect
+import json
+import logging
+import pickle
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsCache:
+    """
+    TTL cache for analytics results, backed by Redis or process memory.
+
+    Values are pickled in both modes so callers always get their own copy.
+    Keys include the database name so repositories bound to different
+    databases never share entries. The in-memory fallback is an LRU capped
+    at max_memory_entries; expired entries are swept before evicting.
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[aioredis.Redis] = None,
+        key_prefix: str = "giggleglide:analytics:",
+        max_memory_entries: int = 1024
+    ):
+        self.redis_client = redis_client
+        self.key_prefix = key_prefix
+        self.max_memory_entries = max_memory_entries
+        self._memory_cache: "OrderedDict[str, Tuple[bytes, datetime]]" = OrderedDict()
+
+    def make_key(self, name: str, session, params: Dict[str, Any]) -> str:
+        """Build a cache key from a method name, the bound database and call parameters."""
+        database = session.get_bind().url.database or ''
+        args = json.dumps(params, sort_keys=True, default=str)
+        return f"{self.key_prefix}{name}:{database}:{args}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None on a miss."""
+        try:
+            if self.redis_client:
+                data = await self.redis_client.get(key)
+            else:
+                data = None
+                entry = self._memory_cache.get(key)
+                if entry:
+                    if datetime.utcnow() < entry[1]:
+                        data = entry[0]
+                        self._memory_cache.move_to_end(key)
+                    else:
+                        del self._memory_cache[key]
+
+            return pickle.loads(data) if data is not None else None
+
+        except Exception as e:
+            logger.error(f"Error reading analytics cache key {key}: {str(e)}")
+            return None
+
+    async def set(self, key: str, value: Any, ttl: int) -> bool:
+        """Store a value for ttl seconds."""
+        try:
+            data = pickle.dumps(value)
+            if self.redis_client:
+                await self.redis_client.setex(key, ttl, data)
+            else:
+                now = datetime.utcnow()
+                self._memory_cache[key] = (data, now + timedelta(seconds=ttl))
+                self._memory_cache.move_to_end(key)
+                if len(self._memory_cache) > self.max_memory_entries:
+                    self._evict_memory_entries(now)
+            return True
+
+        except Exception as e:
+            logger.error(f"Error writing analytics cache key {key}: {str(e)}")
+            return False
+
+    async def delete(self, key: str) -> bool:
+        """Delete one entry by its full key, without scanning for others."""
+        try:
+            if self.redis_client:
+                return bool(await self.redis_client.delete(key))
+            return self._memory_cache.pop(key, None) is not None
+
+        except Exception as e:
+            logger.error(f"Error deleting analytics cache key {key}: {str(e)}")
+            return False
+
+    def _evict_memory_entries(self, now: datetime) -> None:
+        """Drop expired entries, then least recently used ones, down to the cap."""
+        expired = [key for key, (_, expires) in self._memory_cache.items() if expires <= now]
+        for key in expired:
+            del self._memory_cache[key]
+        while len(self._memory_cache) > self.max_memory_entries:
+            self._memory_cache.popitem(last=False)
+
+    async def invalidate(self, name_prefix: str) -> int:
+        """Delete every entry whose method name starts with name_prefix."""
+        pattern = f"{self.key_prefix}{name_prefix}"
+        try:
+            if self.redis_client:
+                deleted = 0
+                async for key in self.redis_client.scan_iter(match=f"{pattern}*"):
+                    deleted += await self.redis_client.delete(key)
+                return deleted
+
+            keys = [key for key in self._memory_cache if key.startswith(pattern)]
+            for key in keys:
+                del self._memory_cache[key]
+            return len(keys)
+
+        except Exception as e:
+            logger.error(f"Error invalidating analytics cache {pattern}*: {str(e)}")
+            return 0
+
+
+def cache_aside(key_prefix: str, ttl: int) -> Callable:
+    """
+    Cache a repository method's result in the repository's analytics cache.
+
+    The decorated method's owner must expose ``_analytics_cache`` and
+    ``session``. Without a configured cache the method runs uncached.
+    Arguments are bound to the signature so positional and keyword calls
+    share a key.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            cache: Optional[AnalyticsCache] = getattr(self, '_analytics_cache', None)
+            if cache is None:
+                return await func(self, *args, **kwargs)
+
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            params = {k: v for k, v in bound.arguments.items() if k != 'self'}
+            key = cache.make_key(key_prefix, self.session, params)
+
+            cached = await cache.get(key)
+            if cached is not None:
+                return cached
+
+            result = await func(self, *args, **kwargs)
+            await cache.set(key, result, ttl)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+# Global analytics cache instance; None disables caching
+analytics_cache: Optional[AnalyticsCache] = None
+
+
+def get_analytics_cache() -> Optional[AnalyticsCache]:
+    """Get the global analytics cache, if one has been initialized."""
+    return analytics_cache
+
+
+async def initialize_analytics_cache(redis_url: Optional[str] = None) -> AnalyticsCache:
+    """Initialize the global analytics cache, falling back to memory if Redis is unavailable."""
+    global analytics_cache
+
+    redis_client = None
+    if redis_url:
+        try:
+            redis_client = aioredis.from_url(redis_url, decode_responses=False)
+            await redis_client.ping()
+            logger.info("Connected analytics cache to Redis")
+        except Exception as e:
+            logger.error(f"Failed to connect analytics cache to Redis: {str(e)}")
+            redis_client = None
+
+    analytics_cache = AnalyticsCache(redis_client)
+    return analytics_cache
+
+
+async def close_analytics_cache() -> None:
+    """Close the global analytics cache's Redis connection."""
+    global analytics_cache
+    if analytics_cache and analytics_cache.redis_client:
+        try:
+            await analytics_cache.redis_client.close()
+        except Exception as e:
+            logger.error(f"Error closing analytics cache: {str(e)}")
+    analytics_cache = None
@@ -1,16 +1,153 @@
 """Category repository for tag and category operations."""
 
-from typing import List, Optional, Dict, Any, Tuple
-from sqlalchemy import select, and_, or_, func, desc, asc, text
-from sqlalchemy.orm import selectinload, joinedload
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator, NamedTuple
+from sqlalchemy import select, insert, update, exists, and_, or_, func, desc, asc, text, case, true, bindparam, DateTime, Select
+from sqlalchemy.orm import selectinload, joinedload, aliased
 from datetime import datetime, timedelta
+from functools import lru_cache
+import heapq
 import logging
+import re
+import weakref
 
-from .base import BaseRepository, RepositoryError, NotFoundError, ValidationError
+from .base import BaseRepository, RepositoryError, NotFoundError, ValidationError, STREAM_YIELD_PER, count_distinct
+from .cache import cache_aside, get_analytics_cache
 from ..models import Category, Joke, JokeInteraction, Favorite, User
 
 logger = logging.getLogger(__name__)
 
+# Mirrors the validation on Category.name
+CATEGORY_NAME_PATTERN = re.compile(r'^[a-z0-9_]{2,50}$')
+
+# Health report recommendation thresholds
+MIN_ACTIVE_CATEGORY_RATIO = 0.5
+MAX_UNDERPERFORMER_RATIO = 0.3
+MIN_CATEGORY_COUNT = 10
+
+
+class PopularMetric(NamedTuple):
+    """How get_popular ranks categories for one metric."""
+    source: Optional[Any]          # Model joined on joke_id and filtered by created_at
+    value: Any                     # Ranking aggregate
+    value_label: str
+    detail_column: Any             # Column counted distinctly per category
+    detail_label: str
+    condition: Optional[Any]       # Extra filter on the joined model
+
+
+POPULAR_METRICS: Dict[str, PopularMetric] = {
+    'interactions': PopularMetric(
+        JokeInteraction,
+        func.count(JokeInteraction.id), 'interaction_count',
+        JokeInteraction.user_id, 'unique_users',
+        None
+    ),
+    'likes': PopularMetric(
+        JokeInteraction,
+        func.count(JokeInteraction.id), 'like_count',
+        JokeInteraction.user_id, 'unique_users',
+        JokeInteraction.interaction_type == 'like'
+    ),
+    'views': PopularMetric(
+        None,
+        func.sum(Joke.view_count), 'total_views',
+        Joke.id, 'joke_count',
+        None
+    ),
+    'favorites': PopularMetric(
+        Favorite,
+        func.count(Favorite.id), 'favorite_count',
+        Favorite.user_id, 'unique_users',
+        None
+    ),
+}
+
+
+# Analytics statements are built once per shape; language, time threshold and
+# limit are bound at execution time
+@lru_cache(maxsize=None)
+def _popular_statement(metric: str, approximate: bool = False) -> Select:
+    """Build the get_popular statement for a metric in POPULAR_METRICS."""
+    spec = POPULAR_METRICS[metric]
+    # Only user counts may be estimated; joke counts stay exact
+    detail = count_distinct(
+        spec.detail_column,
+        approximate=approximate and spec.detail_label == 'unique_users'
+    )
+
+    conditions = [
+        Joke.language == bindparam('language'),
+        Joke.category.isnot(None)
+    ]
+    if spec.source is not None:
+        conditions.append(spec.source.created_at >= bindparam('time_threshold', type_=DateTime))
+    if spec.condition is not None:
+        conditions.append(spec.condition)
+
+    query = select(
+        Joke.category,
+        spec.value.label(spec.value_label),
+        detail.label(spec.detail_label),
+        func.avg(Joke.rating).label('avg_rating'),
+        Category.display_name,
+        Category.description
+    )
+    if spec.source is not None:
+        query = query.join(spec.source, Joke.id == spec.source.joke_id)
+
+    return (
+        query
+        .outerjoin(Category, Category.name == Joke.category)
+        .where(and_(*conditions))
+        .group_by(Joke.category, Category.display_name, Category.description)
+        .order_by(desc(spec.value))
+        .limit(bindparam('limit'))
+    )
+
+
+@lru_cache(maxsize=None)
+def _trends_statement(interval: str, approximate: bool = False) -> Select:
+    """Build the get_category_trends statement for 'daily' or 'weekly' buckets."""
+    # Both buckets come back as plain dates so each row only needs str()
+    if interval == 'daily':
+        date_group = func.date(JokeInteraction.created_at)
+    else:
+        # Group by week (ISO week)
+        date_group = func.date(func.date_trunc('week', JokeInteraction.created_at))
+
+    return (
+        select(
+            Joke.category,
+            date_group.label('time_period'),
+            func.count(JokeInteraction.id).label('interaction_count'),
+            count_distinct(JokeInteraction.user_id, approximate).label('unique_users')
+        )
+        .join(JokeInteraction, Joke.id == JokeInteraction.joke_id)
+        .where(
+            and_(
+                Joke.language == bindparam('language'),
+                Joke.category.isnot(None),
+                JokeInteraction.created_at >= bindparam('time_threshold', type_=DateTime)
+            )
+        )
+        .group_by(
+            Joke.category,
+            date_group
+        )
+        .order_by(
+            Joke.category,
+            date_group
+        )
+    )
+
+
+# Category metadata (name -> (display_name, description)) is shared across
+# sessions and keyed by engine so separate databases never see each other's rows
+CATEGORY_META_TTL = timedelta(minutes=10)
+_category_meta_cache: "weakref.WeakKeyDictionary[Any, Tuple[Dict[str, Tuple[str, Optional[str]]], datetime]]" = (
+    weakref.WeakKeyDictionary()
+)
+
 
 class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]]):
     """Repository for category and tag operations."""
@@ -18,11 +155,33 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
     def __init__(self, session):
         super().__init__(Category, session)
         self._default_relationships = []
+        self._analytics_cache = get_analytics_cache()
 
     async def get_specialized_query(self, **kwargs):
         """Base implementation for abstract method."""
         return select(self.model)
 
+    async def create(self, obj_in: Dict[str, Any], commit: bool = True, **kwargs) -> Category:
+        """Create a category and drop cached category analytics."""
+        category = await super().create(obj_in, commit=commit, **kwargs)
+        self._invalidate_category_meta()
+        await self._invalidate_analytics_cache()
+        return category
+
+    async def update(self, id: Any, obj_in: Dict[str, Any], commit: bool = True) -> Category:
+        """Update a category and drop cached category metadata and analytics."""
+        category = await super().update(id, obj_in, commit=commit)
+        self._invalidate_category_meta()
+        await self._invalidate_analytics_cache()
+        return category
+
+    async def delete(self, id: Any, commit: bool = True) -> bool:
+        """Delete a category and drop cached category metadata and analytics."""
+        deleted = await super().delete(id, commit=commit)
+        self._invalidate_category_meta()
+        await self._invalidate_analytics_cache()
+        return deleted
+
     # Core Category Management
 
     async def get_all_by_category(
@@ -42,18 +201,54 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
         Returns:
             List of category dictionaries with metadata
         """
+        return [
+            category
+            async for category in self.iter_all_by_category(
+                language=language,
+                include_joke_count=include_joke_count,
+                min_jokes=min_jokes
+            )
+        ]
+
+    async def iter_all_by_category(
+        self,
+        language: str = 'en',
+        include_joke_count: bool = True,
+        min_jokes: int = 0
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over categories with optional joke counts.
+
+        Same rows as get_all_by_category, yielded one at a time for callers
+        that serialize as they go instead of building the full list.
+
+        Args:
+            language: Language filter for joke counting
+            include_joke_count: Whether to include joke counts
+            min_jokes: Minimum number of jokes required for category to be included
+
+        Yields:
+            Category dictionaries with metadata
+        """
         try:
             if include_joke_count:
-                # Query with joke counts
+                # Query with joke counts; the engagement score is computed alongside the aggregates
+                # NULL aggregates from categories without jokes are defaulted in SQL
+                joke_count = func.count(Joke.id)
+                avg_rating = func.coalesce(func.avg(Joke.rating), 0.0)
+                total_views = func.coalesce(func.sum(Joke.view_count), 0)
                 query = (
                     select(
                         Category.id,
                         Category.name,
                         Category.display_name,
                         Category.description,
-                        func.count(Joke.id).label('joke_count'),
-                        func.avg(Joke.rating).label('avg_rating'),
-                        func.sum(Joke.view_count).label('total_views')
+                        joke_count.label('joke_count'),
+                        avg_rating.label('avg_rating'),
+                        total_views.label('total_views'),
+                        self._engagement_score_expression(
+                            joke_count, avg_rating, total_views
+                        ).label('engagement_score')
                     )
                     .outerjoin(
                         Joke,
@@ -62,57 +257,52 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
                             Joke.language == language
                         )
                     )
-                    .group_by(
-                        Category.id,
-                        Category.name,
-                        Category.display_name,
-                        Category.description
-                    )
+                    # The other Category columns are functionally dependent on the key
+                    .group_by(Category.id)
                     .having(func.count(Joke.id) >= min_jokes)
                     .order_by(desc(func.count(Joke.id)))
                 )
 
-                result = await self.session.execute(query)
-                categories = []
-                
-                for row in result.fetchall():
-                    categories.append({
-                        'id': row[0],
-                        'name': row[1],
-                        'display_name': row[2],
-                        'description': row[3],
-                        'joke_count': row[4] or 0,
-                        'avg_rating': float(row[5]) if row[5] else 0.0,
-                        'total_views': row[6] or 0,
-                        'engagement_score': self._calculate_engagement_score(
-                            row[4] or 0,  # joke_count
-                            float(row[5]) if row[5] else 0.0,  # avg_rating
-                            row[6] or 0   # total_views
-                        )
-                    })
-
-                return categories
+                # Each row is unpacked straight into its result dict
+                result = await self._stream(query)
+                async for (category_id, name, display_name, description,
+                           count, rating, views, score) in result:
+                    yield {
+                        'id': category_id,
+                        'name': name,
+                        'display_name': display_name,
+                        'description': description,
+                        'joke_count': count,
+                        'avg_rating': float(rating),
+                        'total_views': views,
+                        'engagement_score': round(float(score), 2)
+                    }
 
             else:
                 # Simple category query
-                query = select(Category).order_by(Category.display_name)
-                result = await self.session.execute(query)
-                categories = result.scalars().all()
-
-                return [
-                    {
-                        'id': cat.id,
-                        'name': cat.name,
-                        'display_name': cat.display_name,
-                        'description': cat.description
+                query = (
+                    select(
+                        Category.id,
+                        Category.name,
+                        Category.display_name,
+                        Category.description
+                    )
+                    .order_by(Category.display_name)
+                )
+                result = await self._stream(query)
+                async for category_id, name, display_name, description in result:
+                    yield {
+                        'id': category_id,
+                        'name': name,
+                        'display_name': display_name,
+                        'description': description
                     }
-                    for cat in categories
-                ]
 
         except Exception as e:
             logger.error(f"Error getting categories: {str(e)}")
             raise RepositoryError(f"Failed to get categories: {str(e)}")
 
+    @cache_aside(key_prefix='cat:popular', ttl=120)
     async def get_popular(
         self,
         language: str = 'en',
@@ -133,128 +323,36 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
             List of popular categories with statistics
         """
         try:
-            time_threshold = datetime.utcnow() - timedelta(days=time_window_days)
-
-            if metric == 'interactions':
-                # Based on total interactions
-                query = (
-                    select(
-                        Joke.category,
-                        func.count(JokeInteraction.id).label('interaction_count'),
-                        func.count(func.distinct(JokeInteraction.user_id)).label('unique_users'),
-                        func.avg(Joke.rating).label('avg_rating')
-                    )
-                    .join(JokeInteraction, Joke.id == JokeInteraction.joke_id)
-                    .where(
-                        and_(
-                            Joke.language == language,
-                            Joke.category.isnot(None),
-                            JokeInteraction.created_at >= time_threshold
-                        )
-                    )
-                    .group_by(Joke.category)
-                    .order_by(desc(func.count(JokeInteraction.id)))
-                    .limit(limit)
-                )
-
-            elif metric == 'likes':
-                # Based on likes
-                query = (
-                    select(
-                        Joke.category,
-                        func.count(JokeInteraction.id).label('like_count'),
-                        func.count(func.distinct(JokeInteraction.user_id)).label('unique_users'),
-                        func.avg(Joke.rating).label('avg_rating')
-                    )
-                    .join(JokeInteraction, Joke.id == JokeInteraction.joke_id)
-                    .where(
-                        and_(
-                            Joke.language == language,
-                            Joke.category.isnot(None),
-                            JokeInteraction.interaction_type == 'like',
-                            JokeInteraction.created_at >= time_threshold
-                        )
-                    )
-                    .group_by(Joke.category)
-                    .order_by(desc(func.count(JokeInteraction.id)))
-                    .limit(limit)
-                )
-
-            elif metric == 'views':
-                # Based on views
-                query = (
-                    select(
-                        Joke.category,
-                        func.sum(Joke.view_count).label('total_views'),
-                        func.count(func.distinct(Joke.id)).label('joke_count'),
-                        func.avg(Joke.rating).label('avg_rating')
-                    )
-                    .where(
-                        and_(
-                            Joke.language == language,
-                            Joke.category.isnot(None)
-                        )
-                    )
-                    .group_by(Joke.category)
-                    .order_by(desc(func.sum(Joke.view_count)))
-                    .limit(limit)
-                )
-
-            elif metric == 'favorites':
-                # Based on favorites
-                query = (
-                    select(
-                        Joke.category,
-                        func.count(Favorite.id).label('favorite_count'),
-                        func.count(func.distinct(Favorite.user_id)).label('unique_users'),
-                        func.avg(Joke.rating).label('avg_rating')
-                    )
-                    .join(Favorite, Joke.id == Favorite.joke_id)
-                    .where(
-                        and_(
-                            Joke.language == language,
-                            Joke.category.isnot(None),
-                            Favorite.created_at >= time_threshold
-                        )
-                    )
-                    .group_by(Joke.category)
-                    .order_by(desc(func.count(Favorite.id)))
-                    .limit(limit)
-                )
-
-            else:
+            spec = POPULAR_METRICS.get(metric)
+            if spec is None:
                 raise RepositoryError(f"Invalid metric: {metric}")
 
-            result = await self.session.execute(query)
-            rows = result.fetchall()
+            result = await self._stream(
+                _popular_statement(metric, await self._supports_approx_distinct()),
+                {
+                    'language': language,
+                    'time_threshold': datetime.utcnow() - timedelta(days=time_window_days),
+                    'limit': limit
+                }
+            )
 
-            # Get category details
+            # Category details come from the outer join on Category
             popular_categories = []
-            for row in rows:
+            async for row in result:
                 category_name = row[0]
-                
-                # Get category details
-                category_query = select(Category).where(Category.name == category_name)
-                cat_result = await self.session.execute(category_query)
-                category = cat_result.scalar_one_or_none()
 
                 category_data = {
                     'name': category_name,
-                    'display_name': category.display_name if category else category_name.title(),
-                    'description': category.description if category else None,
+                    'display_name': row.display_name or category_name.title(),
+                    'description': row.description,
                     'metric_value': row[1],
                     'metric_type': metric,
                     'time_window_days': time_window_days
                 }
 
                 # Add metric-specific data
-                if len(row) > 2:
-                    if metric in ['interactions', 'likes', 'favorites']:
-                        category_data['unique_users'] = row[2]
-                        category_data['avg_rating'] = float(row[3]) if row[3] else 0.0
-                    elif metric == 'views':
-                        category_data['joke_count'] = row[2]
-                        category_data['avg_rating'] = float(row[3]) if row[3] else 0.0
+                category_data[spec.detail_label] = row[2]
+                category_data['avg_rating'] = float(row[3]) if row[3] else 0.0
 
                 popular_categories.append(category_data)
 
@@ -266,6 +364,7 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
 
     # Category Analytics
 
+    @cache_aside(key_prefix='cat:trends', ttl=300)
     async def get_category_trends(
         self,
         language: str = 'en',
@@ -284,54 +383,22 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
             Dictionary with category trends
         """
         try:
-            date_threshold = datetime.utcnow() - timedelta(days=days)
-
-            # Determine date grouping based on interval
-            if interval == 'daily':
-                date_group = func.date(JokeInteraction.created_at)
-            elif interval == 'weekly':
-                # Group by week (ISO week)
-                date_group = func.date_trunc('week', JokeInteraction.created_at)
-            else:
+            if interval not in ('daily', 'weekly'):
                 raise RepositoryError(f"Invalid interval: {interval}")
 
-            # Query for trend data
-            query = (
-                select(
-                    Joke.category,
-                    date_group.label('time_period'),
-                    func.count(JokeInteraction.id).label('interaction_count'),
-                    func.count(func.distinct(JokeInteraction.user_id)).label('unique_users')
-                )
-                .join(JokeInteraction, Joke.id == JokeInteraction.joke_id)
-                .where(
-                    and_(
-                        Joke.language == language,
-                        Joke.category.isnot(None),
-                        JokeInteraction.created_at >= date_threshold
-                    )
-                )
-                .group_by(
-                    Joke.category,
-                    date_group
-                )
-                .order_by(
-                    Joke.category,
-                    date_group
-                )
+            result = await self._stream(
+                _trends_statement(interval, await self._supports_approx_distinct()),
+                {
+                    'language': language,
+                    'time_threshold': datetime.utcnow() - timedelta(days=days)
+                }
             )
 
-            result = await self.session.execute(query)
-            rows = result.fetchall()
-
             # Organize data by category
             trends = {}
-            for category, time_period, interaction_count, unique_users in rows:
-                if category not in trends:
-                    trends[category] = []
-
-                trends[category].append({
-                    'time_period': time_period.strftime('%Y-%m-%d') if hasattr(time_period, 'strftime') else str(time_period),
+            async for category, time_period, interaction_count, unique_users in result:
+                trends.setdefault(category, []).append({
+                    'time_period': str(time_period),
                     'interaction_count': interaction_count,
                     'unique_users': unique_users
                 })
@@ -359,22 +426,23 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
         """
         try:
             # Get basic category info
-            category_query = select(Category).where(Category.name == category_name)
-            result = await self.session.execute(category_query)
-            category = result.scalar_one_or_none()
+            category_meta = await self._get_category_meta(category_name)
 
-            if not category:
+            if not category_meta:
                 raise NotFoundError(f"Category '{category_name}' not found")
 
-            # Get joke statistics
-            joke_stats_query = (
+            approximate = await self._supports_approx_distinct()
+
+            # All statistics come from one statement over a shared CTE of the
+            # category's jokes; each interaction type is one row, and the joke
+            # and favorite aggregates are repeated on every row
+            category_jokes = (
                 select(
-                    func.count(Joke.id).label('total_jokes'),
-                    func.avg(Joke.rating).label('avg_rating'),
-                    func.sum(Joke.view_count).label('total_views'),
-                    func.sum(Joke.like_count).label('total_likes'),
-                    func.min(Joke.created_at).label('first_joke_date'),
-                    func.max(Joke.created_at).label('latest_joke_date')
+                    Joke.id,
+                    Joke.rating,
+                    Joke.view_count,
+                    Joke.like_count,
+                    Joke.created_at
                 )
                 .where(
                     and_(
@@ -382,51 +450,60 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
                         Joke.language == language
                     )
                 )
+                .cte('category_jokes')
             )
 
-            result = await self.session.execute(joke_stats_query)
-            joke_stats = result.fetchone()
-
-            # Get interaction statistics
-            interaction_stats_query = (
+            joke_stats_cte = (
                 select(
-                    JokeInteraction.interaction_type,
-                    func.count(JokeInteraction.id).label('count'),
-                    func.count(func.distinct(JokeInteraction.user_id)).label('unique_users')
+                    func.count(category_jokes.c.id).label('total_jokes'),
+                    func.avg(category_jokes.c.rating).label('avg_rating'),
+                    func.sum(category_jokes.c.view_count).label('total_views'),
+                    func.sum(category_jokes.c.like_count).label('total_likes'),
+                    func.min(category_jokes.c.created_at).label('first_joke_date'),
+                    func.max(category_jokes.c.created_at).label('latest_joke_date')
                 )
-                .join(Joke, JokeInteraction.joke_id == Joke.id)
-                .where(
-                    and_(
-                        Joke.category == category_name,
-                        Joke.language == language
-                    )
-                )
-                .group_by(JokeInteraction.interaction_type)
+                .cte('joke_stats')
             )
 
-            result = await self.session.execute(interaction_stats_query)
-            interaction_stats = {
-                row[0]: {'count': row[1], 'unique_users': row[2]}
-                for row in result.fetchall()
-            }
-
-            # Get favorite statistics
-            favorite_stats_query = (
+            favorite_stats_cte = (
                 select(
                     func.count(Favorite.id).label('total_favorites'),
-                    func.count(func.distinct(Favorite.user_id)).label('unique_users')
+                    count_distinct(Favorite.user_id, approximate).label('favorite_users')
                 )
-                .join(Joke, Favorite.joke_id == Joke.id)
-                .where(
-                    and_(
-                        Joke.category == category_name,
-                        Joke.language == language
-                    )
+                .join(category_jokes, Favorite.joke_id == category_jokes.c.id)
+                .cte('favorite_stats')
+            )
+
+            interaction_stats_cte = (
+                select(
+                    JokeInteraction.interaction_type,
+                    func.count(JokeInteraction.id).label('interaction_count'),
+                    count_distinct(JokeInteraction.user_id, approximate).label('interaction_users')
                 )
+                .join(category_jokes, JokeInteraction.joke_id == category_jokes.c.id)
+                .group_by(JokeInteraction.interaction_type)
+                .cte('interaction_stats')
             )
 
-            result = await self.session.execute(favorite_stats_query)
-            favorite_stats = result.fetchone()
+            performance_query = (
+                select(joke_stats_cte, favorite_stats_cte, interaction_stats_cte)
+                .select_from(joke_stats_cte)
+                .join(favorite_stats_cte, true())
+                .outerjoin(interaction_stats_cte, true())
+            )
+
+            result = await self.session.execute(performance_query)
+            rows = result.fetchall()
+
+            joke_stats = rows[0]
+            interaction_stats = {
+                row.interaction_type: {
+                    'count': row.interaction_count,
+                    'unique_users': row.interaction_users
+                }
+                for row in rows
+                if row.interaction_type is not None
+            }
 
             # Calculate engagement metrics
             total_views = joke_stats[2] or 0
@@ -435,9 +512,9 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
 
             return {
                 'category': {
-                    'name': category.name,
-                    'display_name': category.display_name,
-                    'description': category.description
+                    'name': category_name,
+                    'display_name': category_meta[0],
+                    'description': category_meta[1]
                 },
                 'content_stats': {
                     'total_jokes': joke_stats[0] or 0,
@@ -450,8 +527,8 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
                 },
                 'interaction_stats': interaction_stats,
                 'favorite_stats': {
-                    'total_favorites': favorite_stats[0] or 0,
-                    'unique_users': favorite_stats[1] or 0
+                    'total_favorites': joke_stats.total_favorites or 0,
+                    'unique_users': joke_stats.favorite_users or 0
                 }
             }
 
@@ -511,34 +588,55 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
         """
         try:
             # Get current joke counts by category
-            count_query = (
+            count_subquery = (
                 select(
-                    Joke.category,
+                    Joke.category.label('category'),
                     func.count(Joke.id).label('joke_count')
                 )
                 .where(Joke.category.isnot(None))
                 .group_by(Joke.category)
+                .subquery()
             )
 
-            result = await self.session.execute(count_query)
-            current_counts = {row[0]: row[1] for row in result.fetchall()}
+            # Read counts and existing category ids in one streamed pass,
+            # creating missing categories one chunk at a time
+            result = await self._stream(
+                select(
+                    count_subquery.c.category,
+                    count_subquery.c.joke_count,
+                    Category.id
+                )
+                .outerjoin(Category, Category.name == count_subquery.c.category)
+            )
 
-            # Update category records
             updated_counts = {}
-            for category_name, count in current_counts.items():
-                category = await self.find_one_by(name=category_name)
-                if category:
-                    category.joke_count = count
-                    updated_counts[category_name] = count
-                else:
-                    # Create category if it doesn't exist
-                    await self.create_category(
-                        name=category_name,
-                        display_name=category_name.replace('_', ' ').title()
-                    )
+            async for rows in result.partitions(STREAM_YIELD_PER):
+                new_categories = []
+                for category_name, count, category_id in rows:
+                    if category_id is None:
+                        if not CATEGORY_NAME_PATTERN.match(category_name):
+                            logger.warning(f"Skipped category creation: invalid name '{category_name}'")
+                            continue
+                        new_categories.append({
+                            'name': category_name,
+                            'display_name': category_name.replace('_', ' ').title(),
+                            'joke_count': count
+                        })
                     updated_counts[category_name] = count
 
+                if new_categories:
+                    await self.session.execute(insert(Category), new_categories)
+
+            # Refresh counts for existing categories in a single UPDATE ... FROM
+            await self.session.execute(
+                update(Category)
+                .values(joke_count=count_subquery.c.joke_count)
+                .where(Category.name == count_subquery.c.category)
+            )
+
             await self.session.commit()
+            self._invalidate_category_meta()
+            await self._invalidate_analytics_cache()
             logger.info(f"Updated joke counts for {len(updated_counts)} categories")
             return updated_counts
 
@@ -566,25 +664,24 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
         """
         try:
             # Calculate preference scores based on interactions
+            # Formula: (likes * 3 + favorites * 5 - skips) / views * 100
+            likes = func.count(JokeInteraction.id).filter(JokeInteraction.interaction_type == 'like')
+            views = func.count(JokeInteraction.id).filter(JokeInteraction.interaction_type == 'view')
+            skips = func.count(JokeInteraction.id).filter(JokeInteraction.interaction_type == 'skip')
+            favorites = func.count(Favorite.id)
+            preference_score = (
+                (likes * 3 + favorites * 5 - skips) * 100.0 /
+                case((views > 0, views), else_=1)
+            )
+
             query = (
                 select(
                     Joke.category,
-                    func.count(
-                        func.case(
-                            (JokeInteraction.interaction_type == 'like', 1)
-                        )
-                    ).label('likes'),
-                    func.count(
-                        func.case(
-                            (JokeInteraction.interaction_type == 'view', 1)
-                        )
-                    ).label('views'),
-                    func.count(
-                        func.case(
-                            (JokeInteraction.interaction_type == 'skip', 1)
-                        )
-                    ).label('skips'),
-                    func.count(Favorite.id).label('favorites')
+                    likes.label('likes'),
+                    views.label('views'),
+                    skips.label('skips'),
+                    favorites.label('favorites'),
+                    preference_score.label('preference_score')
                 )
                 .join(JokeInteraction, Joke.id == JokeInteraction.joke_id)
                 .outerjoin(
@@ -601,33 +698,25 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
                     )
                 )
                 .group_by(Joke.category)
+                # Category name breaks ties so the top-k cut is stable
+                .order_by(desc('preference_score'), Joke.category)
                 .limit(limit)
             )
 
             result = await self.session.execute(query)
             rows = result.fetchall()
 
+            # Get category details for every row at once
+            categories_meta = await self._get_categories_meta([row[0] for row in rows])
+
             preferences = []
-            for category, likes, views, skips, favorites in rows:
-                # Calculate preference score
-                # Formula: (likes * 3 + favorites * 5 - skips) / views
-                total_positive = (likes * 3) + (favorites * 5)
-                total_negative = skips
-                total_interactions = views
-
-                preference_score = (
-                    (total_positive - total_negative) / max(total_interactions, 1)
-                ) * 100
-
-                # Get category details
-                category_query = select(Category).where(Category.name == category)
-                cat_result = await self.session.execute(category_query)
-                category_obj = cat_result.scalar_one_or_none()
+            for category, likes, views, skips, favorites, preference_score in rows:
+                category_meta = categories_meta.get(category)
 
                 preferences.append({
                     'category': category,
-                    'display_name': category_obj.display_name if category_obj else category.title(),
-                    'preference_score': round(preference_score, 2),
+                    'display_name': category_meta[0] if category_meta else category.title(),
+                    'preference_score': round(float(preference_score), 2),
                     'interactions': {
                         'likes': likes,
                         'views': views,
@@ -636,8 +725,6 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
                     }
                 })
 
-            # Sort by preference score
-            preferences.sort(key=lambda x: x['preference_score'], reverse=True)
             return preferences
 
         except Exception as e:
@@ -662,17 +749,24 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
             List of suggested categories
         """
         try:
-            # Get categories user has already interacted with
+            conditions = [Joke.category.isnot(None)]
+
+            # Skip categories the user has already interacted with (anti-join)
             if exclude_seen:
-                seen_categories_query = (
-                    select(func.distinct(Joke.category))
-                    .join(JokeInteraction, Joke.id == JokeInteraction.joke_id)
-                    .where(JokeInteraction.user_id == user_id)
+                seen_joke = aliased(Joke)
+                seen_interaction = aliased(JokeInteraction)
+                seen_category = (
+                    select(seen_interaction.id)
+                    .join(seen_joke, seen_joke.id == seen_interaction.joke_id)
+                    .where(
+                        and_(
+                            seen_interaction.user_id == user_id,
+                            seen_joke.category == Joke.category
+                        )
+                    )
+                    .correlate(Joke)
                 )
-                result = await self.session.execute(seen_categories_query)
-                seen_categories = [row[0] for row in result.fetchall() if row[0]]
-            else:
-                seen_categories = []
+                conditions.append(~exists(seen_category))
 
             # Get popular categories that user hasn't seen
             popular_query = (
@@ -680,16 +774,14 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
                     Joke.category,
                     func.count(JokeInteraction.id).label('popularity_score'),
                     func.avg(Joke.rating).label('avg_rating'),
-                    func.count(func.distinct(Joke.id)).label('joke_count')
+                    func.count(func.distinct(Joke.id)).label('joke_count'),
+                    Category.display_name,
+                    Category.description
                 )
                 .join(JokeInteraction, Joke.id == JokeInteraction.joke_id)
-                .where(
-                    and_(
-                        Joke.category.isnot(None),
-                        Joke.category.notin_(seen_categories) if seen_categories else True
-                    )
-                )
-                .group_by(Joke.category)
+                .outerjoin(Category, Category.name == Joke.category)
+                .where(and_(*conditions))
+                .group_by(Joke.category, Category.display_name, Category.description)
                 .having(func.count(func.distinct(Joke.id)) >= 5)  # At least 5 jokes
                 .order_by(desc(func.count(JokeInteraction.id)))
                 .limit(limit)
@@ -699,16 +791,11 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
             rows = result.fetchall()
 
             suggestions = []
-            for category, popularity_score, avg_rating, joke_count in rows:
-                # Get category details
-                category_query = select(Category).where(Category.name == category)
-                cat_result = await self.session.execute(category_query)
-                category_obj = cat_result.scalar_one_or_none()
-
+            for category, popularity_score, avg_rating, joke_count, display_name, description in rows:
                 suggestions.append({
                     'category': category,
-                    'display_name': category_obj.display_name if category_obj else category.title(),
-                    'description': category_obj.description if category_obj else None,
+                    'display_name': display_name or category.title(),
+                    'description': description,
                     'popularity_score': popularity_score,
                     'avg_rating': float(avg_rating) if avg_rating else 0.0,
                     'joke_count': joke_count,
@@ -723,13 +810,87 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
 
     # Helper Methods
 
-    def _calculate_engagement_score(
+    async def _get_category_meta(self, name: str) -> Optional[Tuple[str, Optional[str]]]:
+        """Get (display_name, description) for a category name."""
+        metadata = await self._get_categories_meta([name])
+        return metadata.get(name)
+
+    async def _get_categories_meta(
         self,
+        names: List[str]
+    ) -> Dict[str, Tuple[str, Optional[str]]]:
+        """
+        Get (display_name, description) for several category names.
+
+        All categories are loaded in one query on first use and cached for
+        CATEGORY_META_TTL. Names missing from the cache are looked up
+        together in a single query and added, so categories created
+        elsewhere are still found. Unknown names are left out of the result.
+        """
+        engine = self.session.get_bind()
+        cached = _category_meta_cache.get(engine)
+
+        if cached is None or datetime.utcnow() - cached[1] >= CATEGORY_META_TTL:
+            result = await self.session.execute(
+                select(Category.name, Category.display_name, Category.description)
+            )
+            metadata = {row[0]: (row[1], row[2]) for row in result.fetchall()}
+            _category_meta_cache[engine] = (metadata, datetime.utcnow())
+        else:
+            metadata = cached[0]
+
+        # batched to avoid N+1 lookups for names added since the cache was filled
+        missing = {name for name in names if name not in metadata}
+        if missing:
+            result = await self.session.execute(
+                select(Category.name, Category.display_name, Category.description)
+                .where(Category.name.in_(missing))
+            )
+            for row in result.fetchall():
+                metadata[row[0]] = (row[1], row[2])
+
+        return {name: metadata[name] for name in names if name in metadata}
+
+    def _invalidate_category_meta(self) -> None:
+        """Drop cached category metadata for this session's database."""
+        _category_meta_cache.pop(self.session.get_bind(), None)
+
+    async def _invalidate_analytics_cache(self) -> None:
+        """Drop cached category analytics results."""
+        if self._analytics_cache is not None:
+            await self._analytics_cache.invalidate('cat:')
+
+    @staticmethod
+    def _engagement_score_expression(joke_count, avg_rating, total_views):
+        """SQL equivalent of _calculate_engagement_score over aggregate columns."""
+        avg_rating = func.coalesce(avg_rating, 0.0)
+        total_views = func.coalesce(total_views, 0)
+
+        content_factor = case((joke_count >= 100, 1.0), else_=joke_count / 100.0)
+        quality_factor = avg_rating / 5.0
+        popularity_factor = case((total_views >= 10000, 1.0), else_=total_views / 10000.0)
+
+        return case(
+            (joke_count == 0, 0.0),
+            else_=(
+                content_factor * 0.3 +
+                quality_factor * 0.4 +
+                popularity_factor * 0.3
+            ) * 100
+        )
+
+    @staticmethod
+    def _calculate_engagement_score(
         joke_count: int,
         avg_rating: float,
         total_views: int
     ) -> float:
-        """Calculate engagement score for a category."""
+        """
+        Calculate engagement score for a category.
+
+        Reference formula for _engagement_score_expression; result rows get
+        their score from SQL, so this is not called per row.
+        """
         if joke_count == 0:
             return 0.0
 
@@ -763,27 +924,47 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
             List of created categories
         """
         try:
-            created_categories = []
-
+            # Validate up front; existing names are skipped by ON CONFLICT
+            rows = {}
             for cat_data in categories:
-                try:
-                    category = await self.create_category(
-                        name=cat_data.get('name', ''),
-                        display_name=cat_data.get('display_name', ''),
-                        description=cat_data.get('description')
-                    )
-                    created_categories.append(category)
-                except ValidationError as e:
-                    logger.warning(f"Skipped category creation: {str(e)}")
+                name = cat_data.get('name', '').lower()
+                if not CATEGORY_NAME_PATTERN.match(name):
+                    logger.warning(f"Skipped category creation: invalid name '{name}'")
                     continue
+                rows.setdefault(name, {
+                    'name': name,
+                    'display_name': cat_data.get('display_name', ''),
+                    'description': cat_data.get('description')
+                })
+
+            if not rows:
+                return []
+
+            stmt = (
+                self._dialect_insert()
+                .values(list(rows.values()))
+                .on_conflict_do_nothing(index_elements=['name'])
+                .returning(Category)
+            )
+            result = await self.session.execute(stmt)
+            created_categories = result.scalars().all()
+            await self.session.commit()
 
+            skipped = set(rows) - {category.name for category in created_categories}
+            for name in sorted(skipped):
+                logger.warning(f"Skipped category creation: Category '{name}' already exists")
+
+            self._invalidate_category_meta()
+            await self._invalidate_analytics_cache()
             logger.info(f"Bulk created {len(created_categories)} categories")
             return created_categories
 
         except Exception as e:
+            await self.session.rollback()
             logger.error(f"Error bulk creating categories: {str(e)}")
             raise RepositoryError(f"Failed to bulk create categories: {str(e)}")
 
+    @cache_aside(key_prefix='cat:health', ttl=600)
     async def get_category_health_report(self) -> Dict[str, Any]:
         """
         Get a comprehensive health report for all categories.
@@ -795,15 +976,34 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
             # Get all categories with their statistics
             categories = await self.get_all_by_category(include_joke_count=True)
 
-            # Calculate health metrics
+            # Calculate health metrics and top/bottom performers in one pass;
+            # the top five are kept in a bounded min-heap keyed by score, with
+            # the (unique) position breaking ties in favour of earlier categories
             total_categories = len(categories)
-            active_categories = len([c for c in categories if c['joke_count'] > 0])
-            well_populated = len([c for c in categories if c['joke_count'] >= 10])
-            high_quality = len([c for c in categories if c['avg_rating'] >= 4.0])
-
-            # Get top and bottom performers
-            top_performers = sorted(categories, key=lambda x: x['engagement_score'], reverse=True)[:5]
-            underperformers = [c for c in categories if c['joke_count'] < 5 and c['engagement_score'] < 20]
+            active_categories = well_populated = high_quality = 0
+            underperformers = []
+            top_heap = []
+
+            for position, category in enumerate(categories):
+                joke_count = category['joke_count']
+                engagement_score = category['engagement_score']
+
+                if joke_count > 0:
+                    active_categories += 1
+                if joke_count >= 10:
+                    well_populated += 1
+                if category['avg_rating'] >= 4.0:
+                    high_quality += 1
+                if joke_count < 5 and engagement_score < 20:
+                    underperformers.append(category)
+
+                entry = (engagement_score, -position, category)
+                if len(top_heap) < 5:
+                    heapq.heappush(top_heap, entry)
+                elif entry > top_heap[0]:
+                    heapq.heapreplace(top_heap, entry)
+
+            top_performers = [entry[2] for entry in sorted(top_heap, reverse=True)]
 
             return {
                 'overview': {
@@ -815,36 +1015,37 @@ class CategoryRepository(BaseRepository[Category, Dict[str, Any], Dict[str, Any]
                 },
                 'top_performers': top_performers,
                 'underperformers': underperformers,
-                'recommendations': self._generate_category_recommendations(
+                'recommendations': list(self._generate_category_recommendations(
                     total_categories,
                     active_categories,
-                    underperformers
-                )
+                    len(underperformers)
+                ))
             }
 
         except Exception as e:
             logger.error(f"Error generating category health report: {str(e)}")
             raise RepositoryError(f"Failed to generate health report: {str(e)}")
 
+    @staticmethod
+    @lru_cache(maxsize=128)
     def _generate_category_recommendations(
-        self,
         total_categories: int,
         active_categories: int,
-        underperformers: List[Dict[str, Any]]
-    ) -> List[str]:
+        underperformer_count: int
+    ) -> Tuple[str, ...]:
         """Generate recommendations based on category health."""
         recommendations = []
 
-        if active_categories < total_categories * 0.5:
+        if active_categories < total_categories * MIN_ACTIVE_CATEGORY_RATIO:
             recommendations.append("Consider removing inactive categories or adding content to them")
 
-        if len(underperformers) > total_categories * 0.3:
+        if underperformer_count > total_categories * MAX_UNDERPERFORMER_RATIO:
             recommendations.append("Focus on improving content quality for underperforming categories")
 
-        if total_categories < 10:
+        if total_categories < MIN_CATEGORY_COUNT:
             recommendations.append("Consider adding more categories to increase content diversity")
 
         if not recommendations:
             recommendations.append("Category health looks good! Continue monitoring engagement metrics")
 
-        return recommendations
\ No newline at end of file
+        return tuple(recommendations)
@@ -1,13 +1,20 @@
 """Repository factory and registry for centralized repository management."""
 
-from typing import Dict, Type, Optional, Any, TypeVar, Generic
+from typing import Dict, Type, Optional, Any, TypeVar, Generic, List, Set, Tuple, Mapping
+from types import MappingProxyType
+from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
-from functools import lru_cache
+from collections import defaultdict
+from functools import cached_property
 import asyncio
+import threading
+import time
+import weakref
 from contextlib import asynccontextmanager
 
 from .base import BaseRepository
+from .cache import cache_aside, get_analytics_cache
 from .joke_repository import JokeRepository
 from .user_repository import UserRepository
 from .category_repository import CategoryRepository
@@ -21,12 +28,22 @@ RepositoryType = TypeVar('RepositoryType', bound=BaseRepository)
 
 
 class RepositoryRegistry:
-    """Registry for managing repository instances and their dependencies."""
+    """
+    Registry for managing repository instances and their dependencies.
+
+    Cached instances and their sessions are held weakly, so a closed
+    per-request session and its repositories can be garbage collected
+    without an explicit clear_cache() call.
+    """
     
     def __init__(self):
-        self._repositories: Dict[str, Type[BaseRepository]] = {}
-        self._instances: Dict[str, BaseRepository] = {}
-        self._sessions: Dict[str, AsyncSession] = {}
+        self._repositories: Dict[str, Dict[str, Any]] = {}
+        self._repositories_view: Mapping[str, Dict[str, Any]] = MappingProxyType(self._repositories)
+        # Instances are keyed by (repository name, id(session))
+        self._instances: "weakref.WeakValueDictionary[Tuple[str, int], BaseRepository]" = weakref.WeakValueDictionary()
+        self._sessions: "weakref.WeakValueDictionary[Tuple[str, int], AsyncSession]" = weakref.WeakValueDictionary()
+        # id(session) -> cache keys of that session's instances
+        self._keys_by_session: Dict[int, Set[Tuple[str, int]]] = defaultdict(set)
         self._default_session: Optional[AsyncSession] = None
         
         # Register built-in repositories
@@ -57,7 +74,7 @@ class RepositoryRegistry:
             'class': repository_class,
             'model': model_class
         }
-        logger.debug(f"Registered repository: {name} -> {repository_class.__name__}")
+        logger.debug("Registered repository: %s -> %s", name, repository_class.__name__)
     
     def unregister(self, name: str) -> None:
         """
@@ -69,10 +86,12 @@ class RepositoryRegistry:
         if name in self._repositories:
             del self._repositories[name]
             
-        if name in self._instances:
-            del self._instances[name]
+        for key in [key for key in self._instances.keys() if key[0] == name]:
+            self._instances.pop(key, None)
+            self._sessions.pop(key, None)
+            self._keys_by_session.get(key[1], set()).discard(key)
             
-        logger.debug(f"Unregistered repository: {name}")
+        logger.debug("Unregistered repository: %s", name)
     
     def get_repository_info(self, name: str) -> Optional[Dict[str, Any]]:
         """
@@ -86,9 +105,9 @@ class RepositoryRegistry:
         """
         return self._repositories.get(name)
     
-    def list_repositories(self) -> Dict[str, Dict[str, Any]]:
-        """Get list of all registered repositories."""
-        return self._repositories.copy()
+    def list_repositories(self) -> Mapping[str, Dict[str, Any]]:
+        """Get a read-only live view of all registered repositories."""
+        return self._repositories_view
     
     def create_instance(
         self,
@@ -113,10 +132,15 @@ class RepositoryRegistry:
         if name not in self._repositories:
             raise ValueError(f"Repository '{name}' is not registered")
         
-        # Check if we have a cached instance for this session
-        cache_key = f"{name}_{id(session)}"
-        if cache_instance and cache_key in self._instances:
-            return self._instances[cache_key]
+        # Check if we have a cached instance for this session. There is no
+        # await between the lookup and the insert below, so coroutines on the
+        # event loop can never construct the same instance twice
+        session_id = id(session)
+        cache_key = (name, session_id)
+        if cache_instance:
+            instance = self._instances.get(cache_key)
+            if instance is not None:
+                return instance
         
         repo_info = self._repositories[name]
         repository_class = repo_info['class']
@@ -125,10 +149,15 @@ class RepositoryRegistry:
         instance = repository_class(session)
         
         if cache_instance:
+            if session_id not in self._keys_by_session:
+                # Evict the session's keys when it is collected, before its
+                # id() can be reused by a new session
+                weakref.finalize(session, self._evict_session, session_id)
             self._instances[cache_key] = instance
             self._sessions[cache_key] = session
+            self._keys_by_session[session_id].add(cache_key)
         
-        logger.debug(f"Created repository instance: {name}")
+        logger.debug("Created repository instance: %s", name)
         return instance
     
     def clear_cache(self, session: Optional[AsyncSession] = None) -> None:
@@ -142,48 +171,81 @@ class RepositoryRegistry:
             # Clear all cached instances
             self._instances.clear()
             self._sessions.clear()
+            self._keys_by_session.clear()
             logger.debug("Cleared all cached repository instances")
         else:
             # Clear instances for specific session
             session_id = id(session)
-            keys_to_remove = [
-                key for key, sess in self._sessions.items()
-                if id(sess) == session_id
-            ]
-            
-            for key in keys_to_remove:
-                self._instances.pop(key, None)
-                self._sessions.pop(key, None)
-            
-            logger.debug(f"Cleared cached instances for session {session_id}")
+            self._evict_session(session_id)
+            logger.debug("Cleared cached instances for session %s", session_id)
+
+    def _evict_session(self, session_id: int) -> None:
+        """Drop the cached instances of the session with the given id()."""
+        for key in self._keys_by_session.pop(session_id, ()):
+            self._instances.pop(key, None)
+            self._sessions.pop(key, None)
+
+
+# Registry shared by factories that are not given one explicitly, so the
+# default repositories are registered once per process
+_DEFAULT_REGISTRY = RepositoryRegistry()
 
 
 class RepositoryFactory:
     """Factory for creating and managing repositories with advanced features."""
     
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, registry: Optional[RepositoryRegistry] = None):
         self.session = session
-        self.registry = RepositoryRegistry()
-        self._transaction_repositories: Dict[str, BaseRepository] = {}
+        self.registry = registry if registry is not None else _DEFAULT_REGISTRY
+        self._analytics_cache = get_analytics_cache()
         self._in_transaction = False
     
     # Repository Creation Methods
     
+    # The built-in repositories are resolved through the registry once and
+    # then read straight off the factory
+    _REPOSITORY_ATTRIBUTES = (
+        'joke_repository',
+        'user_repository',
+        'category_repository',
+        'interaction_repository'
+    )
+
+    @cached_property
+    def joke_repository(self) -> JokeRepository:
+        """Joke repository instance for this factory's session."""
+        return self.registry.create_instance('joke', self.session)
+
+    @cached_property
+    def user_repository(self) -> UserRepository:
+        """User repository instance for this factory's session."""
+        return self.registry.create_instance('user', self.session)
+
+    @cached_property
+    def category_repository(self) -> CategoryRepository:
+        """Category repository instance for this factory's session."""
+        return self.registry.create_instance('category', self.session)
+
+    @cached_property
+    def interaction_repository(self) -> InteractionRepository:
+        """Interaction repository instance for this factory's session."""
+        return self.registry.create_instance('interaction', self.session)
+
     def get_joke_repository(self) -> JokeRepository:
         """Get joke repository instance."""
-        return self.registry.create_instance('joke', self.session)
+        return self.joke_repository
     
     def get_user_repository(self) -> UserRepository:
         """Get user repository instance."""
-        return self.registry.create_instance('user', self.session)
+        return self.user_repository
     
     def get_category_repository(self) -> CategoryRepository:
         """Get category repository instance."""
-        return self.registry.create_instance('category', self.session)
+        return self.category_repository
     
     def get_interaction_repository(self) -> InteractionRepository:
         """Get interaction repository instance."""
-        return self.registry.create_instance('interaction', self.session)
+        return self.interaction_repository
     
     def get_repository(self, name: str) -> BaseRepository:
         """
@@ -229,17 +291,21 @@ class RepositoryFactory:
                     args = operation.get('args', [])
                     kwargs = operation.get('kwargs', {})
                     
-                    if not hasattr(repo, method_name):
+                    # Only allow-listed methods may be called by name; they are
+                    # looked up on the class and called with the instance
+                    method = None
+                    if method_name in repo.ALLOWED_BATCH_METHODS:
+                        method = getattr(type(repo), method_name, None)
+                    if method is None:
                         raise AttributeError(f"Repository '{repo_name}' has no method '{method_name}'")
                     
-                    method = getattr(repo, method_name)
-                    result = await method(*args, **kwargs)
+                    result = await method(repo, *args, **kwargs)
                     results[repo_name] = result
             
             return results
             
         except Exception as e:
-            logger.error(f"Error executing batch operations: {str(e)}")
+            logger.error("Error executing batch operations: %s", e)
             raise
     
     # Transaction Management
@@ -254,9 +320,6 @@ class RepositoryFactory:
         
         self._in_transaction = True
         try:
-            # Store current repositories for transaction
-            self._transaction_repositories = {}
-            
             yield self
             
             # Commit the session
@@ -268,41 +331,37 @@ class RepositoryFactory:
             raise
         finally:
             self._in_transaction = False
-            self._transaction_repositories.clear()
     
     # Advanced Repository Features
     
     async def get_cross_repository_stats(self) -> Dict[str, Any]:
         """Get statistics across all repositories."""
+        errors = []
         try:
-            joke_repo = self.get_joke_repository()
-            user_repo = self.get_user_repository()
-            category_repo = self.get_category_repository()
-            interaction_repo = self.get_interaction_repository()
-            
-            # Gather statistics concurrently
-            results = await asyncio.gather(
-                joke_repo.count(),
-                user_repo.count(),
-                category_repo.count(),
-                interaction_repo.count(),
-                return_exceptions=True
-            )
-            
-            stats = {
-                'total_jokes': results[0] if not isinstance(results[0], Exception) else 0,
-                'total_users': results[1] if not isinstance(results[1], Exception) else 0,
-                'total_categories': results[2] if not isinstance(results[2], Exception) else 0,
-                'total_interactions': results[3] if not isinstance(results[3], Exception) else 0,
-                'errors': [r for r in results if isinstance(r, Exception)]
-            }
-            
-            return stats
-            
+            counts = await self._repository_totals()
         except Exception as e:
-            logger.error(f"Error getting cross-repository stats: {str(e)}")
-            raise
+            logger.error("Error getting cross-repository stats: %s", e)
+            counts = {}
+            errors.append(e)
+        
+        return {
+            'total_jokes': counts.get('joke', 0),
+            'total_users': counts.get('user', 0),
+            'total_categories': counts.get('category', 0),
+            'total_interactions': counts.get('interaction', 0),
+            'errors': errors
+        }
     
+    @cached_property
+    def _bind_supports_invalidated(self) -> bool:
+        """Whether the session's bind exposes ``invalidated``, resolved once."""
+        return hasattr(self.session.get_bind(), 'invalidated')
+
+    @property
+    def _bind_invalidated(self) -> bool:
+        """Whether the session's bound connection has been invalidated."""
+        return self._bind_supports_invalidated and self.session.get_bind().invalidated
+
     async def health_check(self) -> Dict[str, Any]:
         """Perform health check across all repositories."""
         health_status = {
@@ -311,37 +370,72 @@ class RepositoryFactory:
             'session_info': {
                 'is_active': self.session.is_active,
                 'in_transaction': self.session.in_transaction(),
-                'connection_invalidated': self.session.get_bind().invalidated if hasattr(self.session.get_bind(), 'invalidated') else False
+                'connection_invalidated': self._bind_invalidated
             }
         }
         
-        # Test each repository
-        for repo_name in self.registry.list_repositories().keys():
-            try:
-                repo = self.get_repository(repo_name)
-                # Try a simple count operation
-                count = await repo.count()
+        # Probe every repository's table with one counting query
+        repo_names = list(self.registry.list_repositories())
+        try:
+            counts = await self._count_all(repo_names)
+            for repo_name in repo_names:
                 health_status['repositories'][repo_name] = {
                     'healthy': True,
-                    'record_count': count
+                    'record_count': counts[repo_name]
                 }
-            except Exception as e:
+        except Exception as e:
+            for repo_name in repo_names:
                 health_status['repositories'][repo_name] = {
                     'healthy': False,
                     'error': str(e)
                 }
-                health_status['overall_healthy'] = False
+            health_status['overall_healthy'] = False
         
         return health_status
+
+    @cache_aside(key_prefix='factory:totals', ttl=30)
+    async def _repository_totals(self) -> Dict[str, int]:
+        """
+        Row counts of the built-in repositories, from one statement.
+
+        Cached briefly since the totals are informational; failures are
+        raised rather than cached.
+        """
+        return await self._count_all(['joke', 'user', 'category', 'interaction'])
+
+    async def _count_all(self, repo_names: List[str]) -> Dict[str, int]:
+        """
+        Count the rows behind several repositories in a single round trip.
+
+        An AsyncSession runs one statement at a time, so the counts are
+        combined as scalar subqueries instead of awaited concurrently.
+
+        Args:
+            repo_names: Registered repository names
+
+        Returns:
+            Row count per repository name
+        """
+        counts = []
+        for repo_name in repo_names:
+            model = self.registry.get_repository_info(repo_name)['model']
+            counts.append(
+                select(func.count(model.id)).scalar_subquery().label(repo_name)
+            )
+
+        result = await self.session.execute(select(*counts))
+        return dict(zip(repo_names, result.one()))
     
     # Utility Methods
     
     def get_repository_list(self) -> List[str]:
         """Get list of available repository names."""
-        return list(self.registry.list_repositories().keys())
+        return list(self.registry.list_repositories())
     
     def clear_cache(self):
         """Clear all cached repository instances."""
+        for attribute in self._REPOSITORY_ATTRIBUTES:
+            self.__dict__.pop(attribute, None)
         self.registry.clear_cache(self.session)
     
     async def close(self):
@@ -376,9 +470,8 @@ class RepositoryManager:
         if factory_id is None:
             factory_id = f"factory_{id(session)}"
         
-        factory = RepositoryFactory(session)
         # Share the global registry
-        factory.registry = self._global_registry
+        factory = RepositoryFactory(session, registry=self._global_registry)
         
         self._factories[factory_id] = factory
         return factory
@@ -415,7 +508,7 @@ class RepositoryManager:
         return {
             'total_factories': len(self._factories),
             'factory_ids': list(self._factories.keys()),
-            'registered_repositories': list(self._global_registry.list_repositories().keys())
+            'registered_repositories': list(self._global_registry.list_repositories())
         }
 
 
@@ -441,19 +534,39 @@ def with_repositories(*repo_names):
     return decorator
 
 
-@lru_cache(maxsize=1)
+# Global repository manager instance, created on first use
+_repository_manager: Optional[RepositoryManager] = None
+_repository_manager_lock = threading.Lock()
+
+
 def get_repository_manager() -> RepositoryManager:
     """Get singleton repository manager instance."""
-    return RepositoryManager()
+    global _repository_manager
+    if _repository_manager is None:
+        with _repository_manager_lock:
+            if _repository_manager is None:
+                _repository_manager = RepositoryManager()
+    return _repository_manager
+
+
+# Last successful health check per engine, as a time.monotonic() timestamp
+_last_health_check: "weakref.WeakKeyDictionary[Any, float]" = weakref.WeakKeyDictionary()
 
 
 # Factory function for common use cases
-async def create_repository_factory(session: AsyncSession) -> RepositoryFactory:
+async def create_repository_factory(
+    session: AsyncSession,
+    *,
+    verify_health: bool = False,
+    health_ttl: float = 60.0
+) -> RepositoryFactory:
     """
-    Create a repository factory with health check.
+    Create a repository factory, optionally verifying repository health.
     
     Args:
         session: Database session
+        verify_health: Whether to run a health check before returning
+        health_ttl: Seconds a passing health check is trusted for the engine
         
     Returns:
         Repository factory instance
@@ -462,6 +575,13 @@ async def create_repository_factory(session: AsyncSession) -> RepositoryFactory:
         RuntimeError: If health check fails
     """
     factory = RepositoryFactory(session)
+    if not verify_health:
+        return factory
+
+    engine = session.get_bind()
+    last_check = _last_health_check.get(engine)
+    if last_check is not None and time.monotonic() - last_check < health_ttl:
+        return factory
     
     # Perform health check
     health = await factory.health_check()
@@ -472,6 +592,7 @@ async def create_repository_factory(session: AsyncSession) -> RepositoryFactory:
         ]
         raise RuntimeError(f"Repository health check failed for: {unhealthy_repos}")
     
+    _last_health_check[engine] = time.monotonic()
     return factory
 
 
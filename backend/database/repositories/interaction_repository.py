@@ -1,17 +1,95 @@
 """Interaction repository for user feedback and sentiment tracking."""
 
-from typing import List, Optional, Dict, Any, Tuple
-from sqlalchemy import select, and_, or_, func, desc, asc, text, case
-from sqlalchemy.orm import selectinload, joinedload
+from typing import List, Optional, Dict, Any, Set, Tuple
+from sqlalchemy import select, update, and_, or_, func, desc, asc, text, case, bindparam, inspect, tablesample, tuple_
+from sqlalchemy.orm import aliased, selectinload, joinedload
 from datetime import datetime, timedelta
+from bisect import bisect_left
+from collections import Counter
+from statistics import pvariance
+import copy
 import logging
 from enum import Enum
+from types import MappingProxyType
 
 from .base import BaseRepository, RepositoryError, NotFoundError, ValidationError
-from ..models import JokeInteraction, Favorite, User, Joke, UserStats
+from ..models import JokeInteraction, Favorite, User, Joke, UserStats, like_ratio_rating
 
 logger = logging.getLogger(__name__)
 
+# Interaction types accepted when recording feedback
+_VALID_INTERACTION_TYPES = frozenset({'view', 'like', 'skip', 'share', 'report'})
+
+# Interaction types counted as positive / negative feedback
+_POSITIVE_INTERACTION_TYPES = frozenset({'like', 'share'})
+_NEGATIVE_INTERACTION_TYPES = frozenset({'skip', 'report'})
+
+# Sentiment weight per interaction type
+_SENTIMENT_WEIGHTS = MappingProxyType({
+    'like': 2,
+    'share': 2,
+    'view': 0,
+    'skip': -1,
+    'report': -3
+})
+
+# Only the non-neutral weights contribute to the weighted score
+_NONZERO_SENTIMENT_WEIGHTS = tuple(
+    (interaction_type, weight)
+    for interaction_type, weight in _SENTIMENT_WEIGHTS.items()
+    if weight
+)
+
+# Hot analytics statements are built once with bound parameters; each call
+# only binds values and reuses the compiled SQL (and asyncpg's prepared
+# statement) instead of rebuilding the expression tree.
+_SENTIMENT_INTERACTION_TYPES = tuple(_SENTIMENT_WEIGHTS)
+
+# One row of per-type counts via conditional sums
+_SENTIMENT_COUNTS_QUERY = select(*(
+    func.coalesce(func.sum(case((JokeInteraction.interaction_type == interaction_type, 1), else_=0)), 0)
+    for interaction_type in _SENTIMENT_INTERACTION_TYPES
+)).where(JokeInteraction.user_id == bindparam('user_id'))
+
+_SENTIMENT_COUNTS_SINCE_QUERY = _SENTIMENT_COUNTS_QUERY.where(
+    JokeInteraction.created_at >= bindparam('since')
+)
+
+_PATTERN_WINDOW = and_(
+    JokeInteraction.user_id == bindparam('user_id'),
+    JokeInteraction.created_at >= bindparam('since')
+)
+_PATTERN_HOUR = func.extract('hour', JokeInteraction.created_at)
+_PATTERN_DAY = func.date(JokeInteraction.created_at)
+
+# Hourly patterns, at most 24 rows per interaction type
+_HOURLY_PATTERN_QUERY = (
+    select(_PATTERN_HOUR, JokeInteraction.interaction_type, func.count(JokeInteraction.id))
+    .where(_PATTERN_WINDOW)
+    .group_by(_PATTERN_HOUR, JokeInteraction.interaction_type)
+    .order_by(_PATTERN_HOUR)
+)
+
+# Joke rating and length buckets for content preference analysis
+_RATING_BUCKET = case(
+    (Joke.rating >= 4.0, 'high'),
+    (Joke.rating >= 3.0, 'medium'),
+    else_='low'
+).label('rating_bucket')
+_LENGTH_BUCKET = case(
+    (func.length(Joke.text) < 100, 'short'),
+    (func.length(Joke.text) < 300, 'medium'),
+    else_='long'
+).label('length_bucket')
+
+# Daily counts per type for the trends and totals
+_DAILY_PATTERN_QUERY = (
+    select(_PATTERN_DAY, JokeInteraction.interaction_type, func.count(JokeInteraction.id))
+    .where(_PATTERN_WINDOW)
+    .group_by(_PATTERN_DAY, JokeInteraction.interaction_type)
+    .order_by(_PATTERN_DAY)
+)
+
 
 class SentimentType(Enum):
     """Sentiment categories for user feedback."""
@@ -25,7 +103,16 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
 
     def __init__(self, session):
         super().__init__(JokeInteraction, session)
-        self._default_relationships = ['user', 'joke']
+        # Eager loading is opt-in: most callers aggregate and never touch
+        # interaction.user / interaction.joke; pass relationships=['user', 'joke']
+        # to get_by_id / get_multi when they are needed
+        self._default_relationships = []
+        # Sentiment stats keyed by (user_id, time_window_days), kept in the
+        # session so every InteractionRepository on it (including the ones
+        # JokeRepository creates) shares and invalidates the same entries
+        self._sentiment_cache: Dict[Tuple[str, Optional[int]], Dict[str, Any]] = (
+            session.info.setdefault('interaction_sentiment_cache', {})
+        )
 
     async def get_specialized_query(self, **kwargs):
         """Base implementation for abstract method."""
@@ -54,42 +141,39 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
         """
         try:
             # Validate interaction type
-            valid_types = ['view', 'like', 'skip', 'share', 'report']
-            if interaction_type not in valid_types:
+            if interaction_type not in _VALID_INTERACTION_TYPES:
                 raise ValidationError(f"Invalid interaction type: {interaction_type}")
 
-            # Check for existing interaction of same type
-            existing_query = (
-                select(JokeInteraction)
-                .where(
-                    and_(
-                        JokeInteraction.user_id == user_id,
-                        JokeInteraction.joke_id == joke_id,
-                        JokeInteraction.interaction_type == interaction_type
+            # Insert unless the (user, joke, type) interaction already exists
+            insert_statement = (
+                self._dialect_insert()
+                .values(user_id=user_id, joke_id=joke_id, interaction_type=interaction_type)
+                .on_conflict_do_nothing(index_elements=['user_id', 'joke_id', 'interaction_type'])
+                .returning(JokeInteraction)
+            )
+            result = await self.session.execute(insert_statement)
+            interaction = result.scalar_one_or_none()
+
+            if interaction is None:
+                existing_query = (
+                    select(JokeInteraction)
+                    .where(
+                        and_(
+                            JokeInteraction.user_id == user_id,
+                            JokeInteraction.joke_id == joke_id,
+                            JokeInteraction.interaction_type == interaction_type
+                        )
                     )
                 )
-            )
-            result = await self.session.execute(existing_query)
-            existing = result.scalar_one_or_none()
-
-            if existing:
+                result = await self.session.execute(existing_query)
                 logger.debug(f"Interaction already exists: {user_id}, {joke_id}, {interaction_type}")
-                return existing
-
-            # Create interaction record
-            interaction_data = {
-                'user_id': user_id,
-                'joke_id': joke_id,
-                'interaction_type': interaction_type
-            }
-
-            interaction = await self.create(interaction_data, commit=False)
+                return result.scalar_one()
 
             # Update related statistics
             await self._update_interaction_stats(user_id, joke_id, interaction_type)
 
             await self.session.commit()
-            await self.session.refresh(interaction)
+            self.invalidate_sentiment_cache({user_id})
 
             logger.info(f"Recorded {interaction_type} interaction: user {user_id}, joke {joke_id}")
             return interaction
@@ -114,84 +198,31 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
         Returns:
             Dictionary with sentiment statistics
         """
-        try:
-            # Build base query
-            query = (
-                select(
-                    JokeInteraction.interaction_type,
-                    func.count(JokeInteraction.id).label('count')
-                )
-                .where(JokeInteraction.user_id == user_id)
-                .group_by(JokeInteraction.interaction_type)
-            )
+        cache_key = (user_id, time_window_days)
+        if cache_key in self._sentiment_cache:
+            return copy.deepcopy(self._sentiment_cache[cache_key])
 
+        try:
             # Add time filter if specified
             if time_window_days:
                 time_threshold = datetime.utcnow() - timedelta(days=time_window_days)
-                query = query.where(JokeInteraction.created_at >= time_threshold)
-
-            result = await self.session.execute(query)
-            interaction_counts = {row[0]: row[1] for row in result.fetchall()}
-
-            # Calculate sentiment metrics
-            total_interactions = sum(interaction_counts.values())
-            
-            if total_interactions == 0:
-                return {
-                    'sentiment': SentimentType.NEUTRAL.value,
-                    'confidence': 0.0,
-                    'total_interactions': 0,
-                    'interaction_breakdown': {},
-                    'sentiment_score': 0.0,
-                    'engagement_level': 'none'
-                }
-
-            # Define sentiment weights
-            sentiment_weights = {
-                'like': 2,
-                'share': 2,
-                'view': 0,
-                'skip': -1,
-                'report': -3
-            }
-
-            # Calculate weighted sentiment score
-            weighted_score = sum(
-                interaction_counts.get(interaction, 0) * weight
-                for interaction, weight in sentiment_weights.items()
-            )
-
-            sentiment_score = weighted_score / total_interactions
-
-            # Determine sentiment category and confidence
-            if sentiment_score > 0.5:
-                sentiment = SentimentType.POSITIVE.value
-                confidence = min(sentiment_score / 2.0, 1.0)
-            elif sentiment_score < -0.5:
-                sentiment = SentimentType.NEGATIVE.value
-                confidence = min(abs(sentiment_score) / 2.0, 1.0)
-            else:
-                sentiment = SentimentType.NEUTRAL.value
-                confidence = 1.0 - abs(sentiment_score)
-
-            # Determine engagement level
-            if total_interactions < 10:
-                engagement_level = 'low'
-            elif total_interactions < 50:
-                engagement_level = 'medium'
+                result = await self.session.execute(
+                    _SENTIMENT_COUNTS_SINCE_QUERY,
+                    {'user_id': user_id, 'since': time_threshold}
+                )
             else:
-                engagement_level = 'high'
+                result = await self.session.execute(_SENTIMENT_COUNTS_QUERY, {'user_id': user_id})
 
-            return {
-                'sentiment': sentiment,
-                'confidence': round(confidence, 3),
-                'total_interactions': total_interactions,
-                'interaction_breakdown': interaction_counts,
-                'sentiment_score': round(sentiment_score, 3),
-                'engagement_level': engagement_level,
-                'time_window_days': time_window_days
+            interaction_counts = {
+                interaction_type: count
+                for interaction_type, count in zip(_SENTIMENT_INTERACTION_TYPES, result.one())
+                if count
             }
 
+            stats = self._compute_sentiment_from_counts(interaction_counts, time_window_days)
+            self._sentiment_cache[cache_key] = stats
+            return copy.deepcopy(stats)
+
         except Exception as e:
             logger.error(f"Error getting user sentiment stats for {user_id}: {str(e)}")
             raise RepositoryError(f"Failed to get user sentiment stats: {str(e)}")
@@ -214,63 +245,25 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
             Dictionary with interaction patterns
         """
         try:
-            date_threshold = datetime.utcnow() - timedelta(days=days)
-
-            # Get daily interaction patterns
-            daily_query = (
-                select(
-                    func.date(JokeInteraction.created_at).label('date'),
-                    func.extract('hour', JokeInteraction.created_at).label('hour'),
-                    JokeInteraction.interaction_type,
-                    func.count(JokeInteraction.id).label('count')
-                )
-                .where(
-                    and_(
-                        JokeInteraction.user_id == user_id,
-                        JokeInteraction.created_at >= date_threshold
-                    )
-                )
-                .group_by(
-                    func.date(JokeInteraction.created_at),
-                    func.extract('hour', JokeInteraction.created_at),
-                    JokeInteraction.interaction_type
-                )
-                .order_by(
-                    func.date(JokeInteraction.created_at),
-                    func.extract('hour', JokeInteraction.created_at)
-                )
-            )
-
-            result = await self.session.execute(daily_query)
-            daily_data = result.fetchall()
+            params = {
+                'user_id': user_id,
+                'since': datetime.utcnow() - timedelta(days=days)
+            }
 
-            # Process patterns
             hourly_patterns = {}
+            result = await self.session.execute(_HOURLY_PATTERN_QUERY, params)
+            for hour_of_day, interaction_type, count in result:
+                pattern = hourly_patterns.setdefault(hour_of_day, {'total': 0, 'by_type': {}})
+                pattern['total'] += count
+                pattern['by_type'][interaction_type] = count
+
             daily_totals = {}
             interaction_trends = {}
-
-            for date, hour, interaction_type, count in daily_data:
-                date_str = date.strftime('%Y-%m-%d')
-                
-                # Hourly patterns
-                if hour not in hourly_patterns:
-                    hourly_patterns[hour] = {'total': 0, 'by_type': {}}
-                hourly_patterns[hour]['total'] += count
-                hourly_patterns[hour]['by_type'][interaction_type] = (
-                    hourly_patterns[hour]['by_type'].get(interaction_type, 0) + count
-                )
-
-                # Daily totals
-                if date_str not in daily_totals:
-                    daily_totals[date_str] = 0
-                daily_totals[date_str] += count
-
-                # Interaction trends
-                if interaction_type not in interaction_trends:
-                    interaction_trends[interaction_type] = {}
-                interaction_trends[interaction_type][date_str] = (
-                    interaction_trends[interaction_type].get(date_str, 0) + count
-                )
+            result = await self.session.execute(_DAILY_PATTERN_QUERY, params)
+            for date, interaction_type, count in result:
+                date_str = str(date)
+                daily_totals[date_str] = daily_totals.get(date_str, 0) + count
+                interaction_trends.setdefault(interaction_type, {})[date_str] = count
 
             # Find peak activity hours
             peak_hours = sorted(
@@ -280,19 +273,20 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
             )[:3]
 
             # Calculate consistency score (lower variance = more consistent)
-            daily_counts = list(daily_totals.values())
-            if daily_counts:
-                avg_daily = sum(daily_counts) / len(daily_counts)
-                variance = sum((x - avg_daily) ** 2 for x in daily_counts) / len(daily_counts)
+            total_interactions = sum(daily_totals.values())
+            active_days = len(daily_totals)
+            avg_daily = total_interactions / max(active_days, 1)
+            if daily_totals:
+                variance = pvariance(daily_totals.values(), mu=avg_daily)
                 consistency_score = max(0, 100 - (variance / max(avg_daily, 1)) * 100)
             else:
                 consistency_score = 0
 
             return {
                 'analysis_period': f"{days} days",
-                'total_interactions': sum(daily_totals.values()),
-                'active_days': len(daily_totals),
-                'avg_daily_interactions': round(sum(daily_totals.values()) / max(len(daily_totals), 1), 2),
+                'total_interactions': total_interactions,
+                'active_days': active_days,
+                'avg_daily_interactions': round(avg_daily, 2),
                 'consistency_score': round(consistency_score, 2),
                 'peak_activity_hours': [
                     {'hour': hour, 'interactions': data['total']}
@@ -323,12 +317,12 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
             Dictionary with content preference analysis
         """
         try:
-            # Get interaction data with joke metadata
+            # Get interaction counts per category and rating/length bucket
             query = (
                 select(
                     Joke.category,
-                    Joke.rating,
-                    func.length(Joke.text).label('text_length'),
+                    _RATING_BUCKET,
+                    _LENGTH_BUCKET,
                     JokeInteraction.interaction_type,
                     func.count(JokeInteraction.id).label('interaction_count')
                 )
@@ -336,8 +330,8 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
                 .where(JokeInteraction.user_id == user_id)
                 .group_by(
                     Joke.category,
-                    Joke.rating,
-                    func.length(Joke.text),
+                    _RATING_BUCKET,
+                    _LENGTH_BUCKET,
                     JokeInteraction.interaction_type
                 )
                 .having(func.count(JokeInteraction.id) >= min_interactions)
@@ -358,32 +352,30 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
             rating_preferences = {}
             length_preferences = {'short': 0, 'medium': 0, 'long': 0}
 
-            for category, rating, text_length, interaction_type, count in interaction_data:
+            for category, rating_bucket, length_bucket, interaction_type, count in interaction_data:
                 # Category analysis
                 if category:
                     if category not in category_scores:
                         category_scores[category] = {'positive': 0, 'negative': 0, 'neutral': 0}
                     
-                    if interaction_type in ['like', 'share']:
+                    if interaction_type in _POSITIVE_INTERACTION_TYPES:
                         category_scores[category]['positive'] += count
-                    elif interaction_type in ['skip', 'report']:
+                    elif interaction_type in _NEGATIVE_INTERACTION_TYPES:
                         category_scores[category]['negative'] += count
                     else:
                         category_scores[category]['neutral'] += count
 
                 # Rating preferences
-                rating_bucket = self._get_rating_bucket(rating)
                 if rating_bucket not in rating_preferences:
                     rating_preferences[rating_bucket] = {'positive': 0, 'negative': 0}
                 
-                if interaction_type in ['like', 'share']:
+                if interaction_type in _POSITIVE_INTERACTION_TYPES:
                     rating_preferences[rating_bucket]['positive'] += count
-                elif interaction_type in ['skip', 'report']:
+                elif interaction_type in _NEGATIVE_INTERACTION_TYPES:
                     rating_preferences[rating_bucket]['negative'] += count
 
                 # Length preferences
-                length_bucket = self._get_length_bucket(text_length)
-                if interaction_type in ['like', 'share']:
+                if interaction_type in _POSITIVE_INTERACTION_TYPES:
                     length_preferences[length_bucket] += count
 
             # Calculate preference scores
@@ -449,26 +441,27 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
             user_activity = user_stats['total_interactions']
             activity_range = max(user_activity * 0.5, 10)
 
-            similar_users_query = (
-                select(
-                    UserStats.user_id,
-                    (UserStats.jokes_viewed + UserStats.jokes_liked + UserStats.jokes_skipped).label('total_activity')
+            # On large tables scan a Bernoulli sample (overshooting threefold)
+            # instead of sorting every candidate by random()
+            cohort_user_ids = []
+            estimated_users = await self._estimated_row_count(UserStats)
+            if estimated_users and estimated_users > cohort_size * 10:
+                sample_percent = cohort_size * 3.0 * 100 / estimated_users
+                sampled_stats = aliased(
+                    UserStats,
+                    tablesample(UserStats.__table__, func.bernoulli(sample_percent))
                 )
-                .where(
-                    and_(
-                        UserStats.user_id != user_id,
-                        (UserStats.jokes_viewed + UserStats.jokes_liked + UserStats.jokes_skipped).between(
-                            user_activity - activity_range,
-                            user_activity + activity_range
-                        )
-                    )
+                result = await self.session.execute(
+                    self._similar_users_query(sampled_stats, user_id, user_activity, activity_range, cohort_size)
                 )
-                .order_by(func.random())
-                .limit(cohort_size)
-            )
+                cohort_user_ids = list(result.scalars())
 
-            result = await self.session.execute(similar_users_query)
-            cohort_user_ids = [row[0] for row in result.fetchall()]
+            # Fall back to the full candidate set when the sample comes up short
+            if len(cohort_user_ids) < 10:
+                result = await self.session.execute(
+                    self._similar_users_query(UserStats, user_id, user_activity, activity_range, cohort_size)
+                )
+                cohort_user_ids = list(result.scalars())
 
             if len(cohort_user_ids) < 10:  # Need minimum cohort size
                 return {
@@ -477,25 +470,35 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
                     'user_stats': user_stats
                 }
 
-            # Get cohort interaction statistics
+            # Get cohort interaction statistics with one grouped query
+            cohort_query = (
+                select(
+                    JokeInteraction.user_id,
+                    JokeInteraction.interaction_type,
+                    func.count(JokeInteraction.id)
+                )
+                .where(JokeInteraction.user_id.in_(cohort_user_ids))
+                .group_by(JokeInteraction.user_id, JokeInteraction.interaction_type)
+            )
+            result = await self.session.execute(cohort_query)
+
+            cohort_counts = {cohort_user_id: {} for cohort_user_id in cohort_user_ids}
+            for cohort_user_id, interaction_type, count in result:
+                cohort_counts[cohort_user_id][interaction_type] = count
+
             cohort_stats = []
-            for cohort_user_id in cohort_user_ids:
-                stats = await self.get_user_sentiment_stats(cohort_user_id)
+            for cohort_user_id, counts in cohort_counts.items():
+                stats = self._compute_sentiment_from_counts(counts)
+                self._sentiment_cache[(cohort_user_id, None)] = stats
                 cohort_stats.append(stats)
 
-            # Calculate cohort averages
-            avg_sentiment_score = sum(s['sentiment_score'] for s in cohort_stats) / len(cohort_stats)
+            # Calculate cohort averages and percentiles from one sorted list
+            sentiment_scores = sorted(s['sentiment_score'] for s in cohort_stats)
+            avg_sentiment_score = sum(sentiment_scores) / len(sentiment_scores)
             avg_interactions = sum(s['total_interactions'] for s in cohort_stats) / len(cohort_stats)
-            
-            sentiment_distribution = {}
-            for stats in cohort_stats:
-                sentiment = stats['sentiment']
-                sentiment_distribution[sentiment] = sentiment_distribution.get(sentiment, 0) + 1
-
-            # Calculate percentiles
-            sentiment_scores = [s['sentiment_score'] for s in cohort_stats]
-            sentiment_scores.sort()
-            
+
+            sentiment_distribution = dict(Counter(s['sentiment'] for s in cohort_stats))
+
             user_percentile = self._calculate_percentile(user_stats['sentiment_score'], sentiment_scores)
 
             return {
@@ -521,6 +524,22 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
             logger.error(f"Error in cohort analysis for {user_id}: {str(e)}")
             raise RepositoryError(f"Failed to perform cohort analysis: {str(e)}")
 
+    @staticmethod
+    def _similar_users_query(stats, user_id: str, user_activity: int, activity_range: float, cohort_size: int):
+        """Select up to cohort_size random users whose activity is within range of user_activity."""
+        total_activity = stats.jokes_viewed + stats.jokes_liked + stats.jokes_skipped
+        return (
+            select(stats.user_id)
+            .where(
+                and_(
+                    stats.user_id != user_id,
+                    total_activity.between(user_activity - activity_range, user_activity + activity_range)
+                )
+            )
+            .order_by(func.random())
+            .limit(cohort_size)
+        )
+
     # Bulk Operations
 
     async def bulk_record_interactions(
@@ -529,6 +548,13 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
     ) -> List[JokeInteraction]:
         """
         Bulk record multiple interactions.
+
+        The batch is validated and de-duplicated up front, new rows are
+        inserted with one INSERT ... ON CONFLICT DO NOTHING and the joke and
+        user statistics are applied once for the rows actually inserted, all
+        in one transaction. Items with an invalid type or unknown user/joke
+        are skipped; items that already exist, including ones written
+        concurrently, are returned as the existing interaction.
         
         Args:
             interactions: List of interaction dictionaries
@@ -537,28 +563,180 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
             List of created interactions
         """
         try:
-            created_interactions = []
-
+            # Keep the first occurrence of each (user, joke, type) in order
+            requested = {}
             for interaction_data in interactions:
-                try:
-                    interaction = await self.record_feedback(
-                        user_id=interaction_data.get('user_id'),
-                        joke_id=interaction_data.get('joke_id'),
-                        interaction_type=interaction_data.get('interaction_type'),
-                        feedback_data=interaction_data.get('feedback_data')
-                    )
-                    created_interactions.append(interaction)
-                except Exception as e:
-                    logger.warning(f"Failed to record interaction: {str(e)}")
+                key = (
+                    interaction_data.get('user_id'),
+                    interaction_data.get('joke_id'),
+                    interaction_data.get('interaction_type')
+                )
+                if key[2] not in _VALID_INTERACTION_TYPES:
+                    logger.warning(f"Failed to record interaction: invalid interaction type: {key[2]}")
                     continue
+                requested.setdefault(key, None)
+
+            if not requested:
+                return []
+
+            # Unknown users or jokes would fail the foreign keys for the whole batch
+            result = await self.session.execute(
+                select(User.id).where(User.id.in_({key[0] for key in requested}))
+            )
+            known_users = set(result.scalars())
+            result = await self.session.execute(
+                select(Joke.id).where(Joke.id.in_({key[1] for key in requested}))
+            )
+            known_jokes = set(result.scalars())
+
+            for key in list(requested):
+                if key[0] not in known_users or key[1] not in known_jokes:
+                    logger.warning(f"Failed to record interaction: unknown user or joke: {key[0]}, {key[1]}")
+                    del requested[key]
+
+            if not requested:
+                return []
+
+            created_at = datetime.utcnow()
+            insert_statement = (
+                self._dialect_insert()
+                .values([
+                    {
+                        'user_id': user_id,
+                        'joke_id': joke_id,
+                        'interaction_type': interaction_type,
+                        'created_at': created_at
+                    }
+                    for user_id, joke_id, interaction_type in requested
+                ])
+                .on_conflict_do_nothing(index_elements=['user_id', 'joke_id', 'interaction_type'])
+                .returning(JokeInteraction)
+            )
+            result = await self.session.execute(insert_statement)
+            recorded = {
+                (interaction.user_id, interaction.joke_id, interaction.interaction_type): interaction
+                for interaction in result.scalars()
+            }
+            inserted = list(recorded)
+
+            if inserted:
+                await self.apply_interaction_stats(inserted)
+
+            # Look up the interactions that already existed in one query
+            if len(recorded) < len(requested):
+                existing_query = select(JokeInteraction).where(
+                    tuple_(
+                        JokeInteraction.user_id,
+                        JokeInteraction.joke_id,
+                        JokeInteraction.interaction_type
+                    ).in_([key for key in requested if key not in recorded])
+                )
+                result = await self.session.execute(existing_query)
+                for interaction in result.scalars():
+                    recorded[(interaction.user_id, interaction.joke_id, interaction.interaction_type)] = interaction
+
+            await self.session.commit()
 
-            logger.info(f"Bulk recorded {len(created_interactions)} interactions")
-            return created_interactions
+            logger.info(f"Bulk recorded {len(inserted)} interactions")
+            return [recorded[key] for key in requested if key in recorded]
 
         except Exception as e:
+            await self.session.rollback()
             logger.error(f"Error in bulk interaction recording: {str(e)}")
             raise RepositoryError(f"Failed to bulk record interactions: {str(e)}")
 
+    async def apply_interaction_stats(self, interactions: List[Tuple[str, str, str]]) -> None:
+        """
+        Apply the joke and user statistics for newly recorded interactions.
+
+        Counts are aggregated per joke and per user first, so each table is
+        written with a single statement however many interactions there are.
+        Does not commit; JokeRepository uses this for its interactions too.
+
+        Args:
+            interactions: (user_id, joke_id, interaction_type) tuples
+        """
+        joke_counts: Dict[str, Dict[str, int]] = {}
+        user_counts: Dict[str, Dict[str, int]] = {}
+        for user_id, joke_id, interaction_type in interactions:
+            joke = joke_counts.setdefault(joke_id, {'views': 0, 'likes': 0})
+            user = user_counts.setdefault(
+                user_id,
+                {'jokes_viewed': 0, 'jokes_liked': 0, 'jokes_skipped': 0}
+            )
+            if interaction_type == 'view':
+                joke['views'] += 1
+                user['jokes_viewed'] += 1
+            elif interaction_type == 'like':
+                joke['likes'] += 1
+                user['jokes_liked'] += 1
+            elif interaction_type == 'skip':
+                user['jokes_skipped'] += 1
+
+        # Joke counters and rating, one executemany UPDATE; skips leave the
+        # joke untouched, so a batch of skips needs no joke round trip
+        joke_params = [
+            {'joke_id': joke_id, 'views': counts['views'], 'likes': counts['likes']}
+            for joke_id, counts in joke_counts.items()
+            if counts['views'] or counts['likes']
+        ]
+        if joke_params:
+            jokes = Joke.__table__
+            view_count = jokes.c.view_count + bindparam('views')
+            like_count = jokes.c.like_count + bindparam('likes')
+            await self.session.execute(
+                update(jokes)
+                .where(jokes.c.id == bindparam('joke_id'))
+                .values(
+                    view_count=view_count,
+                    like_count=like_count,
+                    rating=like_ratio_rating(view_count, like_count, jokes.c.rating)
+                ),
+                joke_params
+            )
+
+        # User counters, one multi-row upsert
+        now = datetime.utcnow()
+        upsert = self._dialect_insert(UserStats).values([
+            {'user_id': user_id, 'last_active': now, **counts}
+            for user_id, counts in user_counts.items()
+        ])
+        await self.session.execute(
+            upsert.on_conflict_do_update(
+                index_elements=['user_id'],
+                set_={
+                    'jokes_viewed': UserStats.jokes_viewed + upsert.excluded.jokes_viewed,
+                    'jokes_liked': UserStats.jokes_liked + upsert.excluded.jokes_liked,
+                    'jokes_skipped': UserStats.jokes_skipped + upsert.excluded.jokes_skipped,
+                    'last_active': upsert.excluded.last_active,
+                    'updated_at': func.now()
+                }
+            )
+        )
+
+        self._expire_loaded_counters(
+            {params['joke_id'] for params in joke_params},
+            set(user_counts)
+        )
+        self.invalidate_sentiment_cache(set(user_counts))
+
+    def _expire_loaded_counters(self, joke_ids: Set[str], user_ids: Set[str]) -> None:
+        """
+        Expire counters on loaded jokes and user stats written by Core statements.
+
+        The UPDATE and upsert above bypass the identity map, and sessions do not
+        expire on commit, so loaded objects would otherwise keep stale counters.
+        """
+        for obj in list(self.session.identity_map.values()):
+            loaded = inspect(obj).dict
+            if isinstance(obj, Joke) and loaded.get('id') in joke_ids:
+                self.session.expire(obj, ['view_count', 'like_count', 'rating'])
+            elif isinstance(obj, UserStats) and loaded.get('user_id') in user_ids:
+                self.session.expire(
+                    obj,
+                    ['jokes_viewed', 'jokes_liked', 'jokes_skipped', 'last_active', 'updated_at']
+                )
+
     async def get_interaction_summary_report(
         self,
         start_date: datetime,
@@ -575,49 +753,20 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
             Dictionary with comprehensive interaction summary
         """
         try:
-            # Total interactions by type
-            type_query = (
-                select(
-                    JokeInteraction.interaction_type,
-                    func.count(JokeInteraction.id).label('count'),
-                    func.count(func.distinct(JokeInteraction.user_id)).label('unique_users')
-                )
-                .where(
-                    and_(
-                        JokeInteraction.created_at >= start_date,
-                        JokeInteraction.created_at <= end_date
-                    )
-                )
-                .group_by(JokeInteraction.interaction_type)
+            in_range = and_(
+                JokeInteraction.created_at >= start_date,
+                JokeInteraction.created_at <= end_date
             )
 
-            result = await self.session.execute(type_query)
-            interaction_by_type = {
-                row[0]: {'count': row[1], 'unique_users': row[2]}
-                for row in result.fetchall()
-            }
-
-            # Daily breakdown
-            daily_query = (
-                select(
-                    func.date(JokeInteraction.created_at).label('date'),
-                    func.count(JokeInteraction.id).label('count')
+            # Totals by type, daily breakdown and distinct users
+            if self._is_postgresql:
+                interaction_by_type, daily_breakdown, total_unique_users = (
+                    await self._summary_rollups_grouping_sets(in_range)
                 )
-                .where(
-                    and_(
-                        JokeInteraction.created_at >= start_date,
-                        JokeInteraction.created_at <= end_date
-                    )
+            else:
+                interaction_by_type, daily_breakdown, total_unique_users = (
+                    await self._summary_rollups(in_range)
                 )
-                .group_by(func.date(JokeInteraction.created_at))
-                .order_by(func.date(JokeInteraction.created_at))
-            )
-
-            result = await self.session.execute(daily_query)
-            daily_breakdown = {
-                row[0].strftime('%Y-%m-%d'): row[1]
-                for row in result.fetchall()
-            }
 
             # Top categories by interaction
             category_query = (
@@ -646,9 +795,6 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
 
             # Calculate totals
             total_interactions = sum(data['count'] for data in interaction_by_type.values())
-            total_unique_users = len(set().union(*[
-                {data['unique_users']} for data in interaction_by_type.values()
-            ]))
 
             return {
                 'period': {
@@ -672,79 +818,194 @@ class InteractionRepository(BaseRepository[JokeInteraction, Dict[str, Any], Dict
 
     # Helper Methods
 
+    async def _summary_rollups_grouping_sets(
+        self,
+        in_range
+    ) -> Tuple[Dict[str, Dict[str, int]], Dict[str, int], int]:
+        """
+        Summary report rollups in one scan with GROUPING SETS (PostgreSQL).
+
+        One pass over the range yields the per-type rows, the per-day rows
+        and the grand total row; GROUPING() tells them apart.
+
+        Returns:
+            Tuple of (interaction_by_type, daily_breakdown, total_unique_users)
+        """
+        day = func.date(JokeInteraction.created_at)
+        query = (
+            select(
+                func.grouping(JokeInteraction.interaction_type),
+                func.grouping(day),
+                JokeInteraction.interaction_type,
+                day,
+                func.count(JokeInteraction.id),
+                func.count(func.distinct(JokeInteraction.user_id))
+            )
+            .where(in_range)
+            .group_by(func.grouping_sets(
+                tuple_(JokeInteraction.interaction_type),
+                tuple_(day),
+                tuple_()
+            ))
+            .order_by(day)
+        )
+
+        interaction_by_type = {}
+        daily_breakdown = {}
+        total_unique_users = 0
+        result = await self._stream(query)
+        async for type_grouped, day_grouped, interaction_type, date, count, unique_users in result:
+            if not type_grouped:
+                interaction_by_type[interaction_type] = {'count': count, 'unique_users': unique_users}
+            elif not day_grouped:
+                daily_breakdown[str(date)] = count
+            else:
+                total_unique_users = unique_users
+
+        return interaction_by_type, daily_breakdown, total_unique_users
+
+    async def _summary_rollups(
+        self,
+        in_range
+    ) -> Tuple[Dict[str, Dict[str, int]], Dict[str, int], int]:
+        """
+        Summary report rollups with one GROUP BY query per breakdown.
+
+        Returns:
+            Tuple of (interaction_by_type, daily_breakdown, total_unique_users)
+        """
+        # Total interactions by type, plus distinct users across all types
+        # as an uncorrelated subquery (COUNT(DISTINCT) is not a window function)
+        total_unique_users_query = (
+            select(func.count(func.distinct(JokeInteraction.user_id)))
+            .where(in_range)
+            .scalar_subquery()
+        )
+        type_query = (
+            select(
+                JokeInteraction.interaction_type,
+                func.count(JokeInteraction.id).label('count'),
+                func.count(func.distinct(JokeInteraction.user_id)).label('unique_users'),
+                total_unique_users_query.label('total_unique_users')
+            )
+            .where(in_range)
+            .group_by(JokeInteraction.interaction_type)
+        )
+
+        result = await self.session.execute(type_query)
+        interaction_by_type = {}
+        total_unique_users = 0
+        for interaction_type, count, unique_users, total_unique_users in result:
+            interaction_by_type[interaction_type] = {'count': count, 'unique_users': unique_users}
+
+        # Daily breakdown
+        daily_query = (
+            select(
+                func.date(JokeInteraction.created_at).label('date'),
+                func.count(JokeInteraction.id).label('count')
+            )
+            .where(in_range)
+            .group_by(func.date(JokeInteraction.created_at))
+            .order_by(func.date(JokeInteraction.created_at))
+        )
+
+        # One row per day of the range; stream it rather than buffer it
+        daily_breakdown = {}
+        result = await self._stream(daily_query)
+        async for date, count in result:
+            daily_breakdown[str(date)] = count
+
+        return interaction_by_type, daily_breakdown, total_unique_users
+
     async def _update_interaction_stats(self, user_id: str, joke_id: str, interaction_type: str):
         """Update related statistics after interaction recording."""
         try:
-            # Update joke stats
-            joke_query = select(Joke).where(Joke.id == joke_id)
-            result = await self.session.execute(joke_query)
-            joke = result.scalar_one_or_none()
-
-            if joke:
-                if interaction_type == 'view':
-                    joke.view_count += 1
-                elif interaction_type == 'like':
-                    joke.like_count += 1
-
-                # Recalculate rating
-                if joke.view_count > 0:
-                    joke.rating = round((joke.like_count / joke.view_count) * 5, 2)
-
-            # Update user stats
-            user_stats_query = select(UserStats).where(UserStats.user_id == user_id)
-            result = await self.session.execute(user_stats_query)
-            user_stats = result.scalar_one_or_none()
-
-            if not user_stats:
-                user_stats = UserStats(user_id=user_id)
-                self.session.add(user_stats)
+            await self.apply_interaction_stats([(user_id, joke_id, interaction_type)])
+        except Exception as e:
+            logger.error(f"Error updating interaction stats: {str(e)}")
 
-            if interaction_type == 'view':
-                user_stats.jokes_viewed += 1
-            elif interaction_type == 'like':
-                user_stats.jokes_liked += 1
-            elif interaction_type == 'skip':
-                user_stats.jokes_skipped += 1
+    def invalidate_sentiment_cache(self, user_ids: Set[str]) -> None:
+        """Drop cached sentiment stats for the given users, for every time window."""
+        for key in [key for key in self._sentiment_cache if key[0] in user_ids]:
+            del self._sentiment_cache[key]
 
-            user_stats.last_active = datetime.utcnow()
+    @staticmethod
+    def _compute_sentiment_from_counts(
+        interaction_counts: Dict[str, int],
+        time_window_days: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Derive sentiment statistics from per-type interaction counts.
 
-            await self.session.flush()
+        Args:
+            interaction_counts: Interaction count by interaction type
+            time_window_days: Time window the counts cover, if any
 
-        except Exception as e:
-            logger.error(f"Error updating interaction stats: {str(e)}")
+        Returns:
+            Dictionary with sentiment statistics
+        """
+        # Calculate sentiment metrics
+        total_interactions = sum(interaction_counts.values())
+        
+        if total_interactions == 0:
+            return {
+                'sentiment': SentimentType.NEUTRAL.value,
+                'confidence': 0.0,
+                'total_interactions': 0,
+                'interaction_breakdown': {},
+                'sentiment_score': 0.0,
+                'engagement_level': 'none'
+            }
 
-    def _get_rating_bucket(self, rating: float) -> str:
-        """Bucket ratings into categories."""
-        if rating >= 4.0:
-            return 'high'
-        elif rating >= 3.0:
-            return 'medium'
+        if interaction_counts.get('view', 0) == total_interactions:
+            # View-only users carry no weighted signal: neutral, full confidence
+            sentiment_score = 0.0
+            sentiment = SentimentType.NEUTRAL.value
+            confidence = 1.0
         else:
-            return 'low'
-
-    def _get_length_bucket(self, text_length: int) -> str:
-        """Bucket text lengths into categories."""
-        if text_length < 100:
-            return 'short'
-        elif text_length < 300:
-            return 'medium'
+            # Calculate weighted sentiment score
+            weighted_score = sum(
+                interaction_counts.get(interaction, 0) * weight
+                for interaction, weight in _NONZERO_SENTIMENT_WEIGHTS
+            )
+
+            sentiment_score = weighted_score / total_interactions
+
+            # Determine sentiment category and confidence
+            if sentiment_score > 0.5:
+                sentiment = SentimentType.POSITIVE.value
+                confidence = min(sentiment_score / 2.0, 1.0)
+            elif sentiment_score < -0.5:
+                sentiment = SentimentType.NEGATIVE.value
+                confidence = min(abs(sentiment_score) / 2.0, 1.0)
+            else:
+                sentiment = SentimentType.NEUTRAL.value
+                confidence = 1.0 - abs(sentiment_score)
+
+        # Determine engagement level
+        if total_interactions < 10:
+            engagement_level = 'low'
+        elif total_interactions < 50:
+            engagement_level = 'medium'
         else:
-            return 'long'
+            engagement_level = 'high'
+
+        return {
+            'sentiment': sentiment,
+            'confidence': round(confidence, 3),
+            'total_interactions': total_interactions,
+            'interaction_breakdown': interaction_counts,
+            'sentiment_score': round(sentiment_score, 3),
+            'engagement_level': engagement_level,
+            'time_window_days': time_window_days
+        }
 
     def _calculate_percentile(self, value: float, sorted_values: List[float]) -> float:
         """Calculate percentile of value in sorted list."""
         if not sorted_values:
             return 50.0
         
-        position = 0
-        for i, v in enumerate(sorted_values):
-            if value <= v:
-                position = i
-                break
-        else:
-            position = len(sorted_values)
-
-        return (position / len(sorted_values)) * 100
+        return (bisect_left(sorted_values, value) / len(sorted_values)) * 100
 
     def _generate_content_recommendations(
         self,
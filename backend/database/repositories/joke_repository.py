@@ -1,17 +1,39 @@
 """Joke repository with specialized joke operations."""
 
-from typing import List, Optional, Dict, Any, Tuple
-from sqlalchemy import select, and_, or_, func, text, desc, asc
-from sqlalchemy.orm import selectinload, joinedload
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator
+from sqlalchemy import select, update, and_, or_, func, text, desc, asc, case, lambda_stmt, literal_column, tablesample, tuple_
+from sqlalchemy.orm import aliased, joinedload, raiseload
 from datetime import datetime, timedelta
 import random
 import logging
 
 from .base import BaseRepository, RepositoryError, NotFoundError
-from ..models import Joke, JokeInteraction, Favorite, User, UserStats
+from .cache import cache_aside, get_analytics_cache
+from .interaction_repository import InteractionRepository
+from ..models import Joke, JokeInteraction, Favorite, User, UserStats, JOKE_SEARCH_CONFIG, like_ratio_rating
 
 logger = logging.getLogger(__name__)
 
+# Bernoulli samples for random joke picks aim for this many times the
+# candidates needed, to leave room for the language/rating/unseen filters
+RANDOM_SAMPLE_OVERSHOOT = 10
+
+# Interaction types that mark a joke as seen by a user
+_SEEN_INTERACTION_TYPES = ('view', 'like', 'skip')
+
+# Interaction types broken out in get_joke_stats
+_STATS_INTERACTION_TYPES = ('view', 'like', 'skip', 'share', 'report')
+
+
+def _search_document():
+    """SQL expression for the indexed full-text search vector of a joke."""
+    return func.to_tsvector(literal_column(JOKE_SEARCH_CONFIG), Joke.text)
+
+
+def _search_terms(query_text: str):
+    """SQL expression parsing user search text into a full-text query."""
+    return func.websearch_to_tsquery(literal_column(JOKE_SEARCH_CONFIG), query_text)
+
 
 class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
     """Repository for joke-specific operations."""
@@ -19,11 +41,41 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
     def __init__(self, session):
         super().__init__(Joke, session)
         self._default_relationships = ['interactions', 'favorites']
+        self._analytics_cache = get_analytics_cache()
 
     async def get_specialized_query(self, **kwargs):
         """Base implementation for abstract method."""
         return select(self.model)
 
+    async def create(self, obj_in: Dict[str, Any], commit: bool = True, **kwargs) -> Joke:
+        """Create a joke and drop cached joke analytics."""
+        joke = await super().create(obj_in, commit=commit, **kwargs)
+        await self._invalidate_analytics_cache()
+        return joke
+
+    async def bulk_create(
+        self,
+        objs_in: List[Dict[str, Any]],
+        commit: bool = True,
+        batch_size: int = 1000
+    ) -> List[Joke]:
+        """Bulk create jokes and drop cached joke analytics."""
+        jokes = await super().bulk_create(objs_in, commit=commit, batch_size=batch_size)
+        await self._invalidate_analytics_cache()
+        return jokes
+
+    async def update(self, id: Any, obj_in: Dict[str, Any], commit: bool = True) -> Joke:
+        """Update a joke and drop cached joke analytics."""
+        joke = await super().update(id, obj_in, commit=commit)
+        await self._invalidate_analytics_cache()
+        return joke
+
+    async def delete(self, id: Any, commit: bool = True) -> bool:
+        """Delete a joke and drop cached joke analytics."""
+        deleted = await super().delete(id, commit=commit)
+        await self._invalidate_analytics_cache()
+        return deleted
+
     # Core Joke Retrieval Methods
 
     async def get_random_unseen(
@@ -50,46 +102,30 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
             List of unseen jokes
         """
         try:
-            # Subquery to get joke IDs the user has already seen
-            seen_subquery = (
-                select(JokeInteraction.joke_id)
-                .where(
-                    and_(
-                        JokeInteraction.user_id == user_id,
-                        JokeInteraction.interaction_type.in_(['view', 'like', 'skip'])
-                    )
-                )
-            )
-
-            # Main query for unseen jokes
-            query = (
-                select(Joke)
-                .where(
-                    and_(
-                        Joke.language == language,
-                        Joke.rating >= min_rating,
-                        Joke.id.notin_(seen_subquery)
+            jokes = []
+            candidate_count = limit * 2  # Get more than needed for better randomization
+
+            # On large tables draw candidates from a Bernoulli sample instead
+            # of sorting every matching joke
+            estimated_jokes = await self._estimated_row_count()
+            if estimated_jokes:
+                sample_percent = candidate_count * RANDOM_SAMPLE_OVERSHOOT * 100 / estimated_jokes
+                if sample_percent < 100:
+                    sampled_jokes = aliased(
+                        Joke,
+                        tablesample(Joke.__table__, func.bernoulli(sample_percent))
                     )
-                )
-                .options(selectinload(Joke.interactions))
-            )
-
-            # Add category filter if specified
-            if category:
-                query = query.where(Joke.category == category)
-
-            # Add exclusion filter if specified
-            if exclude_ids:
-                query = query.where(Joke.id.notin_(exclude_ids))
-
-            # Order by rating and randomize
-            query = query.order_by(
-                desc(Joke.rating),
-                func.random()  # PostgreSQL random function
-            ).limit(limit * 2)  # Get more than needed for better randomization
-
-            result = await self.session.execute(query)
-            jokes = result.scalars().all()
+                    result = await self.session.execute(self._random_unseen_query(
+                        sampled_jokes, user_id, category, language, exclude_ids, min_rating, candidate_count
+                    ))
+                    jokes = list(result.scalars())
+
+            # Fall back to the full table when the sample comes up short
+            if len(jokes) < limit:
+                result = await self.session.execute(self._random_unseen_query(
+                    Joke, user_id, category, language, exclude_ids, min_rating, candidate_count
+                ))
+                jokes = list(result.scalars())
 
             # Randomize the results and return the requested limit
             random.shuffle(jokes)
@@ -123,8 +159,8 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
             List of jokes matching criteria
         """
         try:
-            query = (
-                select(Joke)
+            query = lambda_stmt(
+                lambda: select(Joke)
                 .where(
                     and_(
                         Joke.category.in_(categories),
@@ -132,24 +168,16 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
                         Joke.rating >= min_rating
                     )
                 )
-                .options(selectinload(Joke.interactions))
+                .options(raiseload(Joke.interactions))
             )
 
-            # Exclude seen jokes if requested and user provided
+            # Exclude seen jokes if requested and user provided; the predicate is
+            # built inside the lambda so the cached statement binds this user
             if exclude_seen and user_id:
-                seen_subquery = (
-                    select(JokeInteraction.joke_id)
-                    .where(
-                        and_(
-                            JokeInteraction.user_id == user_id,
-                            JokeInteraction.interaction_type.in_(['view', 'like', 'skip'])
-                        )
-                    )
-                )
-                query = query.where(Joke.id.notin_(seen_subquery))
+                query += lambda s: s.where(JokeRepository._unseen_predicate(user_id))
 
             # Order by rating and view count
-            query = query.order_by(
+            query += lambda s: s.order_by(
                 desc(Joke.rating),
                 desc(Joke.view_count)
             ).limit(limit)
@@ -180,44 +208,42 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
         """
         try:
             # Validate interaction type
-            valid_types = ['view', 'like', 'skip']
-            if interaction_type not in valid_types:
+            if interaction_type not in _SEEN_INTERACTION_TYPES:
                 raise RepositoryError(f"Invalid interaction type: {interaction_type}")
 
-            # Check if interaction already exists
-            existing_query = (
-                select(JokeInteraction)
-                .where(
-                    and_(
-                        JokeInteraction.user_id == user_id,
-                        JokeInteraction.joke_id == joke_id,
-                        JokeInteraction.interaction_type == interaction_type
-                    )
-                )
+            # Insert unless the (user, joke, type) interaction already exists
+            insert_statement = (
+                self._dialect_insert(JokeInteraction)
+                .values(user_id=user_id, joke_id=joke_id, interaction_type=interaction_type)
+                .on_conflict_do_nothing(index_elements=['user_id', 'joke_id', 'interaction_type'])
+                .returning(JokeInteraction)
             )
-            result = await self.session.execute(existing_query)
-            existing = result.scalar_one_or_none()
+            result = await self.session.execute(insert_statement)
+            interaction = result.scalar_one_or_none()
 
-            if existing:
+            if interaction is None:
+                existing_query = lambda_stmt(
+                    lambda: select(JokeInteraction)
+                    .where(
+                        and_(
+                            JokeInteraction.user_id == user_id,
+                            JokeInteraction.joke_id == joke_id,
+                            JokeInteraction.interaction_type == interaction_type
+                        )
+                    )
+                )
+                result = await self.session.execute(existing_query)
                 logger.debug(f"Interaction already exists: {user_id}, {joke_id}, {interaction_type}")
-                return existing
-
-            # Create new interaction
-            interaction = JokeInteraction(
-                user_id=user_id,
-                joke_id=joke_id,
-                interaction_type=interaction_type
-            )
-            self.session.add(interaction)
+                return result.scalar_one()
 
             # Update joke statistics
             await self._update_joke_stats(joke_id, interaction_type)
 
             # Update user statistics
             await self._update_user_stats(user_id, interaction_type)
+            InteractionRepository(self.session).invalidate_sentiment_cache({user_id})
 
             await self.session.flush()
-            await self.session.refresh(interaction)
 
             logger.debug(f"Marked joke {joke_id} as {interaction_type} for user {user_id}")
             return interaction
@@ -249,25 +275,21 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
             # Calculate the time threshold
             time_threshold = datetime.utcnow() - timedelta(hours=time_window_hours)
 
-            # Subquery to get recent interaction counts
-            recent_interactions = (
-                select(
-                    JokeInteraction.joke_id,
-                    func.count(JokeInteraction.id).label('recent_count')
+            # Aggregate recent interactions directly on the joined jokes
+            query = lambda_stmt(
+                lambda: select(Joke)
+                .join(
+                    JokeInteraction,
+                    and_(
+                        JokeInteraction.joke_id == Joke.id,
+                        JokeInteraction.created_at >= time_threshold
+                    )
                 )
-                .where(JokeInteraction.created_at >= time_threshold)
-                .group_by(JokeInteraction.joke_id)
-                .subquery()
-            )
-
-            # Main query to get trending jokes
-            query = (
-                select(Joke)
-                .join(recent_interactions, Joke.id == recent_interactions.c.joke_id)
                 .where(Joke.language == language)
-                .order_by(desc(recent_interactions.c.recent_count))
+                .group_by(Joke.id)
+                .order_by(desc(func.count(JokeInteraction.id)))
                 .limit(limit)
-                .options(selectinload(Joke.interactions))
+                .options(raiseload(Joke.interactions))
             )
 
             result = await self.session.execute(query)
@@ -280,33 +302,44 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
     async def get_user_favorites(
         self,
         user_id: str,
-        skip: int = 0,
+        cursor: Optional[Tuple[datetime, str]] = None,
         limit: int = 20
-    ) -> List[Joke]:
+    ) -> Tuple[List[Joke], Optional[Tuple[datetime, str]]]:
         """
-        Get user's favorite jokes.
+        Get user's favorite jokes, newest first, one keyset page at a time.
         
         Args:
             user_id: User ID
-            skip: Number of records to skip
+            cursor: (favorited_at, favorite_id) returned with the previous page
             limit: Maximum number of jokes to return
             
         Returns:
-            List of favorite jokes
+            Tuple of (favorite jokes, cursor for the next page or None when exhausted)
         """
         try:
             query = (
-                select(Joke)
+                select(Joke, Favorite.created_at, Favorite.id)
                 .join(Favorite, Joke.id == Favorite.joke_id)
                 .where(Favorite.user_id == user_id)
-                .order_by(desc(Favorite.created_at))
-                .offset(skip)
+                .order_by(desc(Favorite.created_at), desc(Favorite.id))
                 .limit(limit)
-                .options(selectinload(Joke.interactions))
+                .options(raiseload(Joke.interactions))
             )
 
-            result = await self.session.execute(query)
-            return result.scalars().all()
+            if cursor:
+                # Seek past the previous page instead of scanning and discarding it
+                favorited_at, favorite_id = cursor
+                query = query.where(
+                    or_(
+                        Favorite.created_at < favorited_at,
+                        and_(Favorite.created_at == favorited_at, Favorite.id < favorite_id)
+                    )
+                )
+
+            rows = (await self.session.execute(query)).all()
+            jokes = [row[0] for row in rows]
+            next_cursor = tuple(rows[-1][1:]) if len(rows) == limit else None
+            return jokes, next_cursor
 
         except Exception as e:
             logger.error(f"Error getting user favorites for {user_id}: {str(e)}")
@@ -328,12 +361,9 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
             List of recommended jokes
         """
         try:
-            # Get user's preferred categories based on likes and favorites
-            user_categories_query = (
-                select(
-                    Joke.category,
-                    func.count(Joke.category).label('preference_score')
-                )
+            # User's preferred categories based on likes, resolved in the same statement
+            preferred_categories = (
+                select(Joke.category)
                 .join(JokeInteraction, Joke.id == JokeInteraction.joke_id)
                 .where(
                     and_(
@@ -345,42 +375,33 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
                 .group_by(Joke.category)
                 .order_by(desc(func.count(Joke.category)))
                 .limit(3)
+                .cte('preferred_categories')
             )
 
-            result = await self.session.execute(user_categories_query)
-            preferred_categories = [row[0] for row in result.fetchall()]
-
-            if not preferred_categories:
-                # If no preferences found, return random unseen jokes
-                return await self.get_random_unseen(user_id, limit=limit)
-
             # Get jokes from preferred categories that user hasn't seen
-            seen_subquery = (
-                select(JokeInteraction.joke_id)
-                .where(
-                    and_(
-                        JokeInteraction.user_id == user_id,
-                        JokeInteraction.interaction_type.in_(['view', 'like', 'skip'])
-                    )
-                )
-            )
-
             query = (
                 select(Joke)
                 .where(
                     and_(
-                        Joke.category.in_(preferred_categories),
-                        Joke.id.notin_(seen_subquery),
+                        Joke.category.in_(select(preferred_categories.c.category)),
+                        self._unseen_predicate(user_id),
                         Joke.rating >= 3.0  # Only recommend well-rated jokes
                     )
                 )
-                .order_by(desc(Joke.rating), func.random())
-                .limit(limit)
-                .options(selectinload(Joke.interactions))
+                .order_by(desc(Joke.rating), desc(Joke.id))
+                .limit(limit * 3)
+                .options(raiseload(Joke.interactions))
             )
 
             result = await self.session.execute(query)
-            return result.scalars().all()
+            jokes = result.scalars().all()
+
+            if not jokes:
+                # No preferences (or nothing left in them), return random unseen jokes
+                return await self.get_random_unseen(user_id, limit=limit)
+
+            # Vary picks among the best-rated candidates
+            return random.sample(jokes, min(limit, len(jokes)))
 
         except Exception as e:
             logger.error(f"Error getting recommended jokes for user {user_id}: {str(e)}")
@@ -396,6 +417,9 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
     ) -> List[Joke]:
         """
         Search jokes by text content.
+
+        On PostgreSQL this is a ranked full-text search over whole words;
+        other databases fall back to a substring match.
         
         Args:
             query_text: Search text
@@ -408,24 +432,10 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
             List of matching jokes
         """
         try:
-            # Use PostgreSQL full-text search or simple ILIKE for compatibility
-            query = (
-                select(Joke)
-                .where(
-                    and_(
-                        Joke.text.ilike(f"%{query_text}%"),
-                        Joke.language == language,
-                        Joke.rating >= min_rating
-                    )
-                )
-                .options(selectinload(Joke.interactions))
+            query = self._search_query(
+                query_text, language, category, min_rating, limit, full_text=self._is_postgresql
             )
 
-            if category:
-                query = query.where(Joke.category == category)
-
-            query = query.order_by(desc(Joke.rating)).limit(limit)
-
             result = await self.session.execute(query)
             return result.scalars().all()
 
@@ -446,49 +456,63 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
             Dictionary with joke statistics
         """
         try:
-            # Get basic joke info
-            joke = await self.get(joke_id)
-            if not joke:
-                raise NotFoundError(f"Joke with id {joke_id} not found")
-
-            # Get interaction statistics
-            stats_query = (
+            # Joke fields, per-type interaction counts and the favorite count in
+            # one statement; favorites are a scalar subquery so they do not
+            # multiply the joined interaction rows
+            interaction_counts = {
+                interaction_type: func.count(JokeInteraction.id).filter(
+                    JokeInteraction.interaction_type == interaction_type
+                )
+                for interaction_type in _STATS_INTERACTION_TYPES
+            }
+            favorite_count = (
+                select(func.count(Favorite.id))
+                .where(Favorite.joke_id == Joke.id)
+                .scalar_subquery()
+            )
+            query = (
                 select(
-                    JokeInteraction.interaction_type,
-                    func.count(JokeInteraction.id).label('count')
+                    func.length(Joke.text).label('text_length'),
+                    Joke.category,
+                    Joke.language,
+                    Joke.rating,
+                    Joke.view_count,
+                    Joke.like_count,
+                    Joke.created_at,
+                    favorite_count.label('favorite_count'),
+                    *(count.label(f'{interaction_type}_interactions') for interaction_type, count in interaction_counts.items())
                 )
-                .where(JokeInteraction.joke_id == joke_id)
-                .group_by(JokeInteraction.interaction_type)
+                .outerjoin(JokeInteraction, JokeInteraction.joke_id == Joke.id)
+                .where(Joke.id == joke_id)
+                .group_by(Joke.id)
             )
 
-            result = await self.session.execute(stats_query)
-            interaction_stats = {row[0]: row[1] for row in result.fetchall()}
-
-            # Get favorite count
-            favorites_query = (
-                select(func.count(Favorite.id))
-                .where(Favorite.joke_id == joke_id)
-            )
-            result = await self.session.execute(favorites_query)
-            favorite_count = result.scalar() or 0
+            row = (await self.session.execute(query)).first()
+            if row is None:
+                raise NotFoundError(f"Joke with id {joke_id} not found")
 
             return {
                 'joke_id': joke_id,
-                'text_length': len(joke.text),
-                'category': joke.category,
-                'language': joke.language,
-                'rating': joke.rating,
-                'view_count': joke.view_count,
-                'like_count': joke.like_count,
-                'interactions': interaction_stats,
-                'favorite_count': favorite_count,
-                'created_at': joke.created_at
+                'text_length': row.text_length,
+                'category': row.category,
+                'language': row.language,
+                'rating': row.rating,
+                'view_count': row.view_count,
+                'like_count': row.like_count,
+                'interactions': {
+                    interaction_type: row._mapping[f'{interaction_type}_interactions']
+                    for interaction_type in interaction_counts
+                    if row._mapping[f'{interaction_type}_interactions']
+                },
+                'favorite_count': row.favorite_count or 0,
+                'created_at': row.created_at
             }
 
         except Exception as e:
             logger.error(f"Error getting joke stats for {joke_id}: {str(e)}")
             raise RepositoryError(f"Failed to get joke stats: {str(e)}")
 
+    @cache_aside(key_prefix='joke:category_stats', ttl=60)
     async def get_category_stats(self, language: str = 'en') -> List[Dict[str, Any]]:
         """
         Get statistics for all categories.
@@ -500,13 +524,19 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
             List of category statistics
         """
         try:
+            total_views = func.sum(Joke.view_count)
+            total_likes = func.sum(Joke.like_count)
             query = (
                 select(
                     Joke.category,
                     func.count(Joke.id).label('joke_count'),
                     func.avg(Joke.rating).label('avg_rating'),
-                    func.sum(Joke.view_count).label('total_views'),
-                    func.sum(Joke.like_count).label('total_likes')
+                    total_views.label('total_views'),
+                    total_likes.label('total_likes'),
+                    case(
+                        (total_views > 0, total_likes * 100.0 / total_views),
+                        else_=0.0
+                    ).label('engagement_rate')
                 )
                 .where(
                     and_(
@@ -528,7 +558,7 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
                     'avg_rating': float(row[2]) if row[2] else 0.0,
                     'total_views': row[3] or 0,
                     'total_likes': row[4] or 0,
-                    'engagement_rate': (row[4] / max(row[3], 1)) * 100 if row[3] else 0.0
+                    'engagement_rate': float(row[5] or 0.0)
                 })
 
             return stats
@@ -539,23 +569,120 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
 
     # Helper Methods
 
+    async def _invalidate_analytics_cache(self) -> None:
+        """Drop cached joke analytics results."""
+        if self._analytics_cache is not None:
+            await self._analytics_cache.invalidate('joke:')
+
+    def _search_query(
+        self,
+        query_text: str,
+        language: str,
+        category: Optional[str],
+        min_rating: float,
+        limit: int,
+        full_text: bool
+    ):
+        """Build the joke search query, full-text ranked or as a substring match."""
+        query = lambda_stmt(
+            lambda: select(Joke)
+            .where(Joke.language == language, Joke.rating >= min_rating)
+            .options(raiseload(Joke.interactions))
+        )
+
+        if full_text:
+            # Word matching against the GIN expression index, best matches first
+            query += lambda s: s.where(
+                _search_document().op('@@')(_search_terms(query_text))
+            ).order_by(
+                desc(func.ts_rank_cd(_search_document(), _search_terms(query_text))),
+                desc(Joke.rating)
+            )
+        else:
+            pattern = f"%{query_text}%"
+            query += lambda s: s.where(Joke.text.ilike(pattern)).order_by(desc(Joke.rating))
+
+        if category:
+            query += lambda s: s.where(Joke.category == category)
+
+        query += lambda s: s.limit(limit)
+        return query
+
+    def _random_unseen_query(
+        self,
+        jokes,
+        user_id: str,
+        category: Optional[str],
+        language: str,
+        exclude_ids: Optional[List[str]],
+        min_rating: float,
+        limit: int
+    ):
+        """Build the best-rated-first unseen jokes query over jokes (the table or a sample of it)."""
+        query = (
+            select(jokes)
+            .where(
+                and_(
+                    jokes.language == language,
+                    jokes.rating >= min_rating,
+                    self._unseen_predicate(user_id, jokes)
+                )
+            )
+            .options(raiseload(jokes.interactions))
+        )
+
+        # Add category filter if specified
+        if category:
+            query = query.where(jokes.category == category)
+
+        # Add exclusion filter if specified
+        if exclude_ids:
+            query = query.where(jokes.id.notin_(exclude_ids))
+
+        # Best rated first; callers shuffle the candidates
+        return query.order_by(desc(jokes.rating), desc(jokes.id)).limit(limit)
+
+    @staticmethod
+    def _unseen_predicate(user_id: str, jokes=Joke):
+        """
+        Condition matching jokes the user has not viewed, liked or skipped.
+
+        A correlated NOT EXISTS rather than NOT IN (subquery): it is
+        NULL-safe and PostgreSQL plans it as an anti-join that probes the
+        (user_id, joke_id, interaction_type) index once per joke.
+        """
+        return ~(
+            select(JokeInteraction.id)
+            .where(
+                and_(
+                    JokeInteraction.user_id == user_id,
+                    JokeInteraction.joke_id == jokes.id,
+                    JokeInteraction.interaction_type.in_(_SEEN_INTERACTION_TYPES)
+                )
+            )
+            .exists()
+        )
+
     async def _update_joke_stats(self, joke_id: str, interaction_type: str):
         """Update joke statistics based on interaction."""
         try:
-            joke = await self.get(joke_id, raise_not_found=False)
-            if not joke:
+            views = 1 if interaction_type == 'view' else 0
+            likes = 1 if interaction_type == 'like' else 0
+            if not (views or likes):
                 return
 
-            if interaction_type == 'view':
-                joke.view_count += 1
-            elif interaction_type == 'like':
-                joke.like_count += 1
-
-            # Recalculate rating based on like ratio
-            if joke.view_count > 0:
-                joke.rating = round((joke.like_count / joke.view_count) * 5, 2)
-
-            await self.session.flush()
+            # Counters and the like-ratio rating in one atomic UPDATE
+            view_count = Joke.view_count + views
+            like_count = Joke.like_count + likes
+            await self.session.execute(
+                update(Joke)
+                .where(Joke.id == joke_id)
+                .values(
+                    view_count=view_count,
+                    like_count=like_count,
+                    rating=like_ratio_rating(view_count, like_count, Joke.rating)
+                )
+            )
 
         except Exception as e:
             logger.error(f"Error updating joke stats: {str(e)}")
@@ -563,24 +690,26 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
     async def _update_user_stats(self, user_id: str, interaction_type: str):
         """Update user statistics based on interaction."""
         try:
-            stats_query = select(UserStats).where(UserStats.user_id == user_id)
-            result = await self.session.execute(stats_query)
-            user_stats = result.scalar_one_or_none()
-
-            if not user_stats:
-                # Create user stats if they don't exist
-                user_stats = UserStats(user_id=user_id)
-                self.session.add(user_stats)
-
-            if interaction_type == 'view':
-                user_stats.jokes_viewed += 1
-            elif interaction_type == 'like':
-                user_stats.jokes_liked += 1
-            elif interaction_type == 'skip':
-                user_stats.jokes_skipped += 1
-
-            user_stats.last_active = datetime.utcnow()
-            await self.session.flush()
+            # Create or bump the user's counters in one atomic upsert
+            upsert = self._dialect_insert(UserStats).values(
+                user_id=user_id,
+                jokes_viewed=1 if interaction_type == 'view' else 0,
+                jokes_liked=1 if interaction_type == 'like' else 0,
+                jokes_skipped=1 if interaction_type == 'skip' else 0,
+                last_active=datetime.utcnow()
+            )
+            await self.session.execute(
+                upsert.on_conflict_do_update(
+                    index_elements=['user_id'],
+                    set_={
+                        'jokes_viewed': UserStats.jokes_viewed + upsert.excluded.jokes_viewed,
+                        'jokes_liked': UserStats.jokes_liked + upsert.excluded.jokes_liked,
+                        'jokes_skipped': UserStats.jokes_skipped + upsert.excluded.jokes_skipped,
+                        'last_active': upsert.excluded.last_active,
+                        'updated_at': func.now()
+                    }
+                )
+            )
 
         except Exception as e:
             logger.error(f"Error updating user stats: {str(e)}")
@@ -593,6 +722,14 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
     ) -> List[JokeInteraction]:
         """
         Bulk mark multiple jokes as seen.
+
+        The batch is de-duplicated, inserted with one INSERT ... ON CONFLICT
+        DO NOTHING and the joke and user statistics are applied once for
+        the newly inserted rows. Interactions that already existed are
+        returned as stored.
+
+        Like mark_as_seen this does not commit; the caller owns the
+        transaction and can group several batches into one commit.
         
         Args:
             interactions: List of interaction dictionaries with user_id, joke_id, interaction_type
@@ -601,8 +738,8 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
             List of created interactions
         """
         try:
-            created_interactions = []
-
+            # Keep the first occurrence of each (user, joke, type) in order
+            requested = {}
             for interaction_data in interactions:
                 user_id = interaction_data.get('user_id')
                 joke_id = interaction_data.get('joke_id')
@@ -610,19 +747,49 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
 
                 if not user_id or not joke_id:
                     continue
+                if interaction_type not in _SEEN_INTERACTION_TYPES:
+                    raise RepositoryError(f"Invalid interaction type: {interaction_type}")
+
+                requested.setdefault((user_id, joke_id, interaction_type), None)
+
+            if not requested:
+                return []
+
+            insert_statement = (
+                self._dialect_insert(JokeInteraction)
+                .values([
+                    {'user_id': user_id, 'joke_id': joke_id, 'interaction_type': interaction_type}
+                    for user_id, joke_id, interaction_type in requested
+                ])
+                .on_conflict_do_nothing(index_elements=['user_id', 'joke_id', 'interaction_type'])
+                .returning(JokeInteraction)
+            )
+            result = await self.session.execute(insert_statement)
+            recorded = {
+                (interaction.user_id, interaction.joke_id, interaction.interaction_type): interaction
+                for interaction in result.scalars()
+            }
 
-                interaction = await self.mark_as_seen(
-                    user_id=user_id,
-                    joke_id=joke_id,
-                    interaction_type=interaction_type
+            if recorded:
+                await InteractionRepository(self.session).apply_interaction_stats(list(recorded))
+
+            # Look up the interactions that already existed in one query
+            if len(recorded) < len(requested):
+                existing_query = select(JokeInteraction).where(
+                    tuple_(
+                        JokeInteraction.user_id,
+                        JokeInteraction.joke_id,
+                        JokeInteraction.interaction_type
+                    ).in_([key for key in requested if key not in recorded])
                 )
-                created_interactions.append(interaction)
+                result = await self.session.execute(existing_query)
+                for interaction in result.scalars():
+                    recorded[(interaction.user_id, interaction.joke_id, interaction.interaction_type)] = interaction
 
-            await self.session.commit()
-            return created_interactions
+            await self.session.flush()
+            return [recorded[key] for key in requested if key in recorded]
 
         except Exception as e:
-            await self.session.rollback()
             logger.error(f"Error bulk marking jokes as seen: {str(e)}")
             raise RepositoryError(f"Failed to bulk mark jokes as seen: {str(e)}")
 
@@ -634,20 +801,16 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
             Number of jokes updated
         """
         try:
-            # Get all jokes with their current stats
-            query = select(Joke).where(Joke.view_count > 0)
-            result = await self.session.execute(query)
-            jokes = result.scalars().all()
-
-            updated_count = 0
-            for joke in jokes:
-                if joke.view_count > 0:
-                    new_rating = round((joke.like_count / joke.view_count) * 5, 2)
-                    if new_rating != joke.rating:
-                        joke.rating = new_rating
-                        updated_count += 1
+            new_rating = like_ratio_rating(Joke.view_count, Joke.like_count, Joke.rating)
+            result = await self.session.execute(
+                update(Joke)
+                .where(Joke.view_count > 0, Joke.rating.is_distinct_from(new_rating))
+                .values(rating=new_rating)
+            )
+            updated_count = result.rowcount
 
             await self.session.commit()
+            await self._invalidate_analytics_cache()
             logger.info(f"Updated ratings for {updated_count} jokes")
             return updated_count
 
@@ -656,6 +819,38 @@ class JokeRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
             logger.error(f"Error updating joke ratings: {str(e)}")
             raise RepositoryError(f"Failed to update joke ratings: {str(e)}")
 
+    async def iter_viewed_jokes(self, language: Optional[str] = None) -> AsyncIterator[Joke]:
+        """
+        Iterate over every joke that has been viewed.
+
+        For Python-side processing of the whole catalogue: jokes are fetched
+        over a server-side cursor in batches, so memory stays bounded by the
+        batch size, and relationships raise instead of lazy loading.
+
+        Args:
+            language: Optional language filter
+
+        Yields:
+            Viewed jokes in id order
+        """
+        try:
+            query = (
+                select(Joke)
+                .where(Joke.view_count > 0)
+                .order_by(Joke.id)
+                .options(raiseload('*'))
+            )
+            if language:
+                query = query.where(Joke.language == language)
+
+            result = await self._stream(query)
+            async for joke in result.scalars():
+                yield joke
+
+        except Exception as e:
+            logger.error(f"Error iterating viewed jokes: {str(e)}")
+            raise RepositoryError(f"Failed to iterate viewed jokes: {str(e)}")
+
     async def count_by_language(self, language: str) -> int:
         """
         Count jokes by language.
@@ -1,15 +1,17 @@
 """Personalization repository for recommendation algorithms and user preference learning."""
 
-from typing import List, Optional, Dict, Any, Tuple
-from sqlalchemy import select, and_, or_, func, text, desc, asc, update
-from sqlalchemy.orm import selectinload, joinedload
+from typing import List, Optional, Dict, Any, Set, Tuple
+from sqlalchemy import select, and_, or_, func, desc, asc, update, case, event
+from sqlalchemy.orm import selectinload, joinedload, raiseload, aliased
 from datetime import datetime, timedelta
+import asyncio
+import heapq
 import random
 import logging
-import math
 from collections import defaultdict
 
 from .base import BaseRepository, RepositoryError, NotFoundError
+from .cache import get_analytics_cache
 from ..models import (
     Joke, User, JokeInteraction, UserTagScore, Tag, JokeTag, 
     PersonalizationMetric, Favorite
@@ -17,6 +19,19 @@ from ..models import (
 
 logger = logging.getLogger(__name__)
 
+# Seconds a user's tag preferences stay cached between interaction updates
+USER_PREFERENCES_CACHE_TTL = 300
+
+# Seconds a user's similar-user list is reused; similarity drifts slowly
+SIMILAR_USERS_CACHE_TTL = 3600
+
+# How much each of a similar user's interactions counts toward a joke's collaborative score
+COLLABORATIVE_INTERACTION_SCORES = {
+    'like': 1.0,
+    'view': 0.3,
+    'skip': -0.5
+}
+
 
 class PersonalizationRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, Any]]):
     """Repository for personalized joke recommendations."""
@@ -24,6 +39,10 @@ class PersonalizationRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, A
     def __init__(self, session):
         super().__init__(Joke, session)
         self._default_relationships = ['joke_tags', 'interactions']
+        self._analytics_cache = get_analytics_cache()
+        self._pending_preference_invalidations: Set[str] = set()
+        self._invalidation_tasks: Set[asyncio.Task] = set()
+        self._commit_listeners_registered = False
 
     async def get_specialized_query(self, **kwargs):
         """Base implementation for abstract method."""
@@ -65,38 +84,37 @@ class PersonalizationRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, A
                 logger.warning(f"No unseen jokes available for user {user_id}")
                 return []
             
-            # Calculate scores for each joke
-            scored_jokes = []
-            for joke, tags in unseen_jokes:
-                exploit_score = self._calculate_exploitation_score(tags, user_preferences)
-                scored_jokes.append((joke, tags, exploit_score))
-            
-            # Sort by exploitation score
-            scored_jokes.sort(key=lambda x: x[2], reverse=True)
+            # Score every candidate in one pass, keeping jokes and scores in parallel lists
+            jokes = [joke for joke, _ in unseen_jokes]
+            scores = [
+                self._calculate_exploitation_score(tags, user_preferences)
+                for _, tags in unseen_jokes
+            ]
             
             # Apply ε-greedy strategy
             recommendations = []
             exploit_count = int(limit * (1 - exploration_rate))
             explore_count = limit - exploit_count
             
-            # Exploitation: Select top-scored jokes
-            for i in range(min(exploit_count, len(scored_jokes))):
-                joke, tags, score = scored_jokes[i]
-                recommendations.append((joke, score, 'exploit'))
+            # Exploitation: Select top-scored jokes without sorting every candidate
+            top_indices = heapq.nlargest(
+                exploit_count, range(len(jokes)), key=scores.__getitem__
+            )
+            for i in top_indices:
+                recommendations.append((jokes[i], scores[i], 'exploit'))
             
-            # Exploration: Random selection from remaining jokes
-            if explore_count > 0 and len(scored_jokes) > exploit_count:
-                remaining_jokes = scored_jokes[exploit_count:]
-                random.shuffle(remaining_jokes)
+            # Exploration: Random selection from remaining jokes, mixed in at random positions
+            if explore_count > 0 and len(jokes) > exploit_count:
+                selected = set(top_indices)
+                remaining_indices = [i for i in range(len(jokes)) if i not in selected]
                 
-                for i in range(min(explore_count, len(remaining_jokes))):
-                    joke, tags, score = remaining_jokes[i]
+                for i in random.sample(remaining_indices, min(explore_count, len(remaining_indices))):
                     # Add randomness to exploration score
-                    explore_score = score + random.uniform(-0.2, 0.2)
-                    recommendations.append((joke, explore_score, 'explore'))
-            
-            # Randomize the final order to mix exploitation and exploration
-            random.shuffle(recommendations)
+                    explore_score = scores[i] + random.uniform(-0.2, 0.2)
+                    recommendations.insert(
+                        random.randint(0, len(recommendations)),
+                        (jokes[i], explore_score, 'explore')
+                    )
             
             logger.info(f"Generated {len(recommendations)} recommendations for user {user_id} "
                        f"({exploit_count} exploit, {len(recommendations) - exploit_count} explore)")
@@ -137,24 +155,13 @@ class PersonalizationRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, A
             # Get jokes liked by similar users
             similar_user_ids = [user_id for user_id, _ in similar_users]
             
-            # Subquery for jokes the target user has already seen
-            seen_subquery = (
-                select(JokeInteraction.joke_id)
-                .where(
-                    and_(
-                        JokeInteraction.user_id == user_id,
-                        JokeInteraction.interaction_type.in_(['view', 'like', 'skip'])
-                    )
-                )
-            )
-            
             # Get jokes liked by similar users
             query = (
                 select(
                     Joke,
                     func.count(JokeInteraction.id).label('like_count'),
-                    func.avg(func.case(
-                        [(JokeInteraction.interaction_type == 'like', 1.0)],
+                    func.avg(case(
+                        (JokeInteraction.interaction_type == 'like', 1.0),
                         else_=0.0
                     )).label('avg_rating')
                 )
@@ -164,29 +171,25 @@ class PersonalizationRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, A
                         JokeInteraction.user_id.in_(similar_user_ids),
                         JokeInteraction.interaction_type == 'like',
                         Joke.language == language,
-                        Joke.id.notin_(seen_subquery)
+                        self._unseen_predicate(user_id)
                     )
                 )
                 .group_by(Joke.id)
-                .order_by(desc(text('like_count')), desc(text('avg_rating')))
+                .order_by(desc('like_count'), desc('avg_rating'))
                 .limit(limit)
                 .options(selectinload(Joke.joke_tags))
             )
             
             result = await self.session.execute(query)
-            recommendations = []
+            jokes = [row[0] for row in result.fetchall()]
             
-            for row in result.fetchall():
-                joke = row[0]
-                like_count = row[1]
-                avg_rating = row[2]
-                
-                # Calculate similarity score based on similar users who liked this joke
-                similarity_score = self._calculate_collaborative_score(
-                    joke.id, similar_users, user_id
-                )
-                
-                recommendations.append((joke, similarity_score))
+            # Score all candidates against similar users' interactions in one query
+            collaborative_scores = await self._calculate_collaborative_scores(
+                [joke.id for joke in jokes], similar_users
+            )
+            recommendations = [
+                (joke, collaborative_scores.get(joke.id, 0.0)) for joke in jokes
+            ]
             
             logger.info(f"Generated {len(recommendations)} collaborative filtering recommendations "
                        f"for user {user_id}")
@@ -250,6 +253,8 @@ class PersonalizationRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, A
                 )
                 updated_count += 1
             
+            self._invalidate_user_preferences_on_commit(user_id)
+            
             logger.debug(f"Updated {updated_count} tag scores for user {user_id} "
                         f"based on {interaction_type} interaction with joke {joke_id}")
             
@@ -292,12 +297,7 @@ class PersonalizationRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, A
             )
             
             result = await self.session.execute(query)
-            unique_categories = len(result.fetchall())
-            
-            # Normalize by total number of categories (4: style, format, topic, tone)
-            diversity_score = min(1.0, unique_categories / 4.0)
-            
-            return diversity_score
+            return self._diversity_from_categories(len(result.fetchall()))
 
         except Exception as e:
             logger.error(f"Error calculating diversity score for user {user_id}: {str(e)}")
@@ -364,33 +364,39 @@ class PersonalizationRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, A
         try:
             time_threshold = datetime.utcnow() - timedelta(days=days)
             
-            # Calculate click-through rate (likes / views)
-            interactions_query = (
+            # Interaction counts and viewed tag categories in one round trip;
+            # counts are distinct because the tag join repeats interactions
+            def count_type(interaction_type):
+                return func.count(func.distinct(JokeInteraction.id)).filter(
+                    JokeInteraction.interaction_type == interaction_type
+                )
+            
+            performance_query = (
                 select(
-                    JokeInteraction.interaction_type,
-                    func.count(JokeInteraction.id).label('count')
+                    count_type('view').label('views'),
+                    count_type('like').label('likes'),
+                    count_type('skip').label('skips'),
+                    func.count(func.distinct(Tag.category)).filter(
+                        JokeInteraction.interaction_type.in_(['view', 'like'])
+                    ).label('categories')
                 )
+                .select_from(JokeInteraction)
+                .outerjoin(JokeTag, JokeTag.joke_id == JokeInteraction.joke_id)
+                .outerjoin(Tag, Tag.id == JokeTag.tag_id)
                 .where(
                     and_(
                         JokeInteraction.user_id == user_id,
                         JokeInteraction.created_at >= time_threshold
                     )
                 )
-                .group_by(JokeInteraction.interaction_type)
             )
             
-            result = await self.session.execute(interactions_query)
-            interaction_counts = {row[0]: row[1] for row in result.fetchall()}
-            
-            views = interaction_counts.get('view', 0)
-            likes = interaction_counts.get('like', 0)
-            skips = interaction_counts.get('skip', 0)
+            row = (await self.session.execute(performance_query)).one()
+            views, likes, skips = row.views, row.likes, row.skips
             
             ctr = likes / max(views, 1)
             skip_rate = skips / max(views, 1)
-            
-            # Calculate diversity score
-            diversity_score = await self.calculate_user_diversity_score(user_id, days)
+            diversity_score = self._diversity_from_categories(row.categories)
             
             # Calculate exploration rate (approximate)
             exploration_rate = min(0.5, skips / max(views, 1))  # Simplified metric
@@ -411,8 +417,58 @@ class PersonalizationRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, A
 
     # Helper Methods
 
+    def _user_preferences_key(self, user_id: str) -> str:
+        """Cache key for one user's tag preferences."""
+        return self._analytics_cache.make_key(
+            f'personalization:user_preferences:{user_id}', self.session, {}
+        )
+
+    def _invalidate_user_preferences_on_commit(self, user_id: str) -> None:
+        """
+        Drop a user's cached tag preferences once their new scores are committed.
+
+        Invalidating before the commit would let a concurrent reader cache the
+        old committed scores again for the whole TTL, so the key is deleted from
+        the session's after_commit hook and forgotten on rollback.
+        """
+        if self._analytics_cache is None:
+            return
+        
+        if not self._commit_listeners_registered:
+            event.listen(self.session.sync_session, 'after_commit', self._on_commit)
+            event.listen(self.session.sync_session, 'after_rollback', self._on_rollback)
+            self._commit_listeners_registered = True
+        
+        self._pending_preference_invalidations.add(user_id)
+
+    def _on_commit(self, session) -> None:
+        """Delete cached preferences of users whose scores were just committed."""
+        user_ids = self._pending_preference_invalidations
+        self._pending_preference_invalidations = set()
+        if not user_ids or self._analytics_cache is None:
+            return
+        
+        keys = [self._user_preferences_key(user_id) for user_id in user_ids]
+        task = asyncio.get_running_loop().create_task(self._delete_cache_keys(keys))
+        self._invalidation_tasks.add(task)
+        task.add_done_callback(self._invalidation_tasks.discard)
+
+    def _on_rollback(self, session) -> None:
+        """Forget pending invalidations; the cached scores are still current."""
+        self._pending_preference_invalidations.clear()
+
+    async def _delete_cache_keys(self, keys: List[str]) -> None:
+        """Delete cache entries by key."""
+        for key in keys:
+            await self._analytics_cache.delete(key)
+
     async def _get_user_preferences(self, user_id: str) -> Dict[str, float]:
-        """Get user's tag preferences as a dictionary."""
+        """Get user's tag preferences as a dictionary, cached per user."""
+        if self._analytics_cache is not None:
+            cached = await self._analytics_cache.get(self._user_preferences_key(user_id))
+            if cached is not None:
+                return cached
+        
         try:
             query = (
                 select(Tag.id, UserTagScore.score)
@@ -421,11 +477,22 @@ class PersonalizationRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, A
             )
             
             result = await self.session.execute(query)
-            return {tag_id: score for tag_id, score in result.fetchall()}
+            preferences = {tag_id: score for tag_id, score in result.fetchall()}
 
         except Exception as e:
             logger.error(f"Error getting user preferences: {str(e)}")
             return {}
+        
+        # Scores updated earlier in this transaction are uncommitted until the
+        # after_commit hook fires, so they must not outlive a rollback in cache
+        if (
+            self._analytics_cache is not None
+            and user_id not in self._pending_preference_invalidations
+        ):
+            await self._analytics_cache.set(
+                self._user_preferences_key(user_id), preferences, USER_PREFERENCES_CACHE_TTL
+            )
+        return preferences
 
     async def _get_unseen_jokes_with_tags(
         self,
@@ -435,50 +502,34 @@ class PersonalizationRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, A
     ) -> List[Tuple[Joke, List[Tuple[Tag, float]]]]:
         """Get unseen jokes with their tags."""
         try:
-            # Subquery for seen jokes
-            seen_subquery = (
-                select(JokeInteraction.joke_id)
-                .where(
-                    and_(
-                        JokeInteraction.user_id == user_id,
-                        JokeInteraction.interaction_type.in_(['view', 'like', 'skip'])
-                    )
-                )
-            )
-            
             # Get unseen jokes
             jokes_query = (
                 select(Joke)
                 .where(
                     and_(
                         Joke.language == language,
-                        Joke.id.notin_(seen_subquery),
+                        self._unseen_predicate(user_id),
                         Joke.rating >= 2.0  # Only recommend decent jokes
                     )
                 )
-                .options(selectinload(Joke.joke_tags))
+                .options(
+                    selectinload(Joke.joke_tags).joinedload(JokeTag.tag),
+                    raiseload('*')
+                )
                 .limit(200)  # Limit for performance
             )
             
             result = await self.session.execute(jokes_query)
             jokes = result.scalars().all()
             
-            # Get tags for each joke
+            # Tags come preloaded in one extra query regardless of the number of jokes
             jokes_with_tags = []
             for joke in jokes:
-                tags_query = (
-                    select(Tag, JokeTag.confidence)
-                    .join(JokeTag, Tag.id == JokeTag.tag_id)
-                    .where(
-                        and_(
-                            JokeTag.joke_id == joke.id,
-                            JokeTag.confidence >= min_confidence
-                        )
-                    )
-                )
-                
-                tags_result = await self.session.execute(tags_query)
-                tags = [(row[0], row[1]) for row in tags_result.fetchall()]
+                tags = [
+                    (joke_tag.tag, joke_tag.confidence)
+                    for joke_tag in joke.joke_tags
+                    if joke_tag.confidence >= min_confidence
+                ]
                 
                 if tags:  # Only include jokes with tags
                     jokes_with_tags.append((joke, tags))
@@ -489,6 +540,33 @@ class PersonalizationRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, A
             logger.error(f"Error getting unseen jokes with tags: {str(e)}")
             return []
 
+    @staticmethod
+    def _unseen_predicate(user_id: str):
+        """
+        Condition matching jokes the user has not viewed, liked or skipped.
+
+        A correlated NOT EXISTS over an aliased interactions table, so it can
+        sit in queries that already join interactions; PostgreSQL plans it as
+        an anti-join on the (user_id, joke_id, interaction_type) index.
+        """
+        seen = aliased(JokeInteraction)
+        return ~(
+            select(seen.id)
+            .where(
+                and_(
+                    seen.user_id == user_id,
+                    seen.joke_id == Joke.id,
+                    seen.interaction_type.in_(['view', 'like', 'skip'])
+                )
+            )
+            .exists()
+        )
+
+    @staticmethod
+    def _diversity_from_categories(unique_categories: int) -> float:
+        """Normalize by total number of categories (4: style, format, topic, tone)."""
+        return min(1.0, unique_categories / 4.0)
+
     def _calculate_exploitation_score(
         self,
         joke_tags: List[Tuple[Tag, float]],
@@ -498,132 +576,116 @@ class PersonalizationRepository(BaseRepository[Joke, Dict[str, Any], Dict[str, A
         if not joke_tags or not user_preferences:
             return 0.0
         
-        total_score = 0.0
-        total_weight = 0.0
-        
-        for tag, confidence in joke_tags:
-            preference_score = user_preferences.get(tag.id, 0.0)
-            weighted_score = preference_score * confidence
-            total_score += weighted_score
-            total_weight += confidence
-        
-        # Normalize by total weight
-        if total_weight > 0:
-            return total_score / total_weight
+        total_weight = sum(confidence for _, confidence in joke_tags)
+        if total_weight <= 0:
+            return 0.0
         
-        return 0.0
+        # Preference weighted by confidence, normalized by total weight
+        get_preference = user_preferences.get
+        total_score = sum(
+            get_preference(tag.id, 0.0) * confidence
+            for tag, confidence in joke_tags
+        )
+        return total_score / total_weight
 
     async def _find_similar_users(
         self,
         user_id: str,
         similarity_threshold: float
     ) -> List[Tuple[str, float]]:
-        """Find users with similar tag preferences."""
+        """Find users with similar tag preferences.
+
+        Cosine similarity is computed in the database over the tags both
+        users have scored, so only the top matches are transferred. Results
+        are cached per user and threshold for SIMILAR_USERS_CACHE_TTL.
+        """
+        cache_key = None
+        if self._analytics_cache is not None:
+            cache_key = self._analytics_cache.make_key(
+                f'personalization:similar_users:{user_id}',
+                self.session,
+                {'similarity_threshold': similarity_threshold}
+            )
+            cached = await self._analytics_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            # Get target user's preferences
-            target_preferences = await self._get_user_preferences(user_id)
+            target_scores = (
+                select(UserTagScore.tag_id, UserTagScore.score)
+                .where(UserTagScore.user_id == user_id)
+                .cte('target_scores')
+            )
             
-            if not target_preferences:
-                return []
+            dot_product = func.sum(UserTagScore.score * target_scores.c.score)
+            magnitude = (
+                func.sqrt(func.sum(UserTagScore.score * UserTagScore.score))
+                * func.sqrt(func.sum(target_scores.c.score * target_scores.c.score))
+            )
+            similarity = func.coalesce(dot_product / func.nullif(magnitude, 0), 0.0)
             
-            # Get all other users' preferences
             query = (
-                select(UserTagScore.user_id, UserTagScore.tag_id, UserTagScore.score)
+                select(UserTagScore.user_id, similarity.label('similarity'))
+                .join(target_scores, target_scores.c.tag_id == UserTagScore.tag_id)
                 .where(UserTagScore.user_id != user_id)
+                .group_by(UserTagScore.user_id)
+                .having(similarity >= similarity_threshold)
+                .order_by(desc('similarity'), UserTagScore.user_id)
+                .limit(10)  # Top 10 similar users
             )
             
             result = await self.session.execute(query)
-            
-            # Group by user
-            user_preferences = defaultdict(dict)
-            for user_id_other, tag_id, score in result.fetchall():
-                user_preferences[user_id_other][tag_id] = score
-            
-            # Calculate similarities
-            similar_users = []
-            for other_user_id, other_preferences in user_preferences.items():
-                similarity = self._calculate_cosine_similarity(
-                    target_preferences, other_preferences
-                )
-                
-                if similarity >= similarity_threshold:
-                    similar_users.append((other_user_id, similarity))
-            
-            # Sort by similarity
-            similar_users.sort(key=lambda x: x[1], reverse=True)
-            return similar_users[:10]  # Top 10 similar users
+            similar_users = [(other_user_id, float(score)) for other_user_id, score in result.all()]
 
         except Exception as e:
             logger.error(f"Error finding similar users: {str(e)}")
             return []
-
-    def _calculate_cosine_similarity(
-        self,
-        prefs1: Dict[str, float],
-        prefs2: Dict[str, float]
-    ) -> float:
-        """Calculate cosine similarity between two preference vectors."""
-        # Get common tags
-        common_tags = set(prefs1.keys()) & set(prefs2.keys())
-        
-        if not common_tags:
-            return 0.0
-        
-        # Calculate dot product and magnitudes
-        dot_product = sum(prefs1[tag] * prefs2[tag] for tag in common_tags)
-        
-        magnitude1 = math.sqrt(sum(prefs1[tag] ** 2 for tag in common_tags))
-        magnitude2 = math.sqrt(sum(prefs2[tag] ** 2 for tag in common_tags))
         
-        if magnitude1 == 0 or magnitude2 == 0:
-            return 0.0
-        
-        return dot_product / (magnitude1 * magnitude2)
+        if cache_key is not None:
+            await self._analytics_cache.set(cache_key, similar_users, SIMILAR_USERS_CACHE_TTL)
+        return similar_users
 
-    async def _calculate_collaborative_score(
+    async def _calculate_collaborative_scores(
         self,
-        joke_id: str,
-        similar_users: List[Tuple[str, float]],
-        target_user_id: str
-    ) -> float:
-        """Calculate collaborative filtering score for a joke."""
-        if not similar_users:
-            return 0.0
+        joke_ids: List[str],
+        similar_users: List[Tuple[str, float]]
+    ) -> Dict[str, float]:
+        """Calculate collaborative filtering scores for several jokes at once."""
+        if not joke_ids or not similar_users:
+            return {}
         
-        # Get interactions from similar users for this joke
-        similar_user_ids = [user_id for user_id, _ in similar_users]
+        user_similarity_map = dict(similar_users)
         
+        # Get interactions from similar users for all candidate jokes
         query = (
-            select(JokeInteraction.user_id, JokeInteraction.interaction_type)
+            select(
+                JokeInteraction.joke_id,
+                JokeInteraction.user_id,
+                JokeInteraction.interaction_type
+            )
             .where(
                 and_(
-                    JokeInteraction.joke_id == joke_id,
-                    JokeInteraction.user_id.in_(similar_user_ids)
+                    JokeInteraction.joke_id.in_(joke_ids),
+                    JokeInteraction.user_id.in_(list(user_similarity_map))
                 )
             )
         )
         
         result = await self.session.execute(query)
         
-        # Calculate weighted score based on similar users' interactions
-        total_score = 0.0
-        total_weight = 0.0
+        # Accumulate [weighted score, weight] per joke from similar users' interactions
+        totals = defaultdict(lambda: [0.0, 0.0])
         
-        user_similarity_map = dict(similar_users)
-        
-        for user_id, interaction_type in result.fetchall():
+        for joke_id, user_id, interaction_type in result.fetchall():
             similarity = user_similarity_map[user_id]
             
-            interaction_score = {
-                'like': 1.0,
-                'view': 0.3,
-                'skip': -0.5
-            }.get(interaction_type, 0.0)
+            interaction_score = COLLABORATIVE_INTERACTION_SCORES.get(interaction_type, 0.0)
             
-            total_score += interaction_score * similarity
-            total_weight += similarity
-        
-        if total_weight > 0:
-            return total_score / total_weight
+            totals[joke_id][0] += interaction_score * similarity
+            totals[joke_id][1] += similarity
         
-        return 0.0
\ No newline at end of file
+        return {
+            joke_id: total_score / total_weight
+            for joke_id, (total_score, total_weight) in totals.items()
+            if total_weight > 0
+        }
@@ -10,6 +10,7 @@ from config import settings
 from routes import auth, jokes, health, personalization, ai_jokes
 from middleware.rate_limit import limiter, create_rate_limit_exceeded_handler
 from database.session import db_manager
+from database.repositories.cache import initialize_analytics_cache, close_analytics_cache
 from middleware.error_handler import (
     http_exception_handler,
     validation_exception_handler,
@@ -49,6 +50,9 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to initialize database manager: {str(e)}")
     
+    # Cache for repository analytics queries
+    await initialize_analytics_cache(settings.REDIS_URL)
+
     # Legacy database cleanup for compatibility
     try:
         health = await get_comprehensive_db_health()
@@ -65,6 +69,7 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down GiggleGlide API...")
     try:
         await db_manager.close()
+        await close_analytics_cache()
         await cleanup_async_connections()
         cleanup_connections()
         logger.info("All database connections cleaned up successfully")
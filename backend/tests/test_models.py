@@ -7,7 +7,7 @@ import uuid
 
 from database.models import (
     Base, User, Joke, Favorite, JokeInteraction, UserStats, Category,
-    create_user, record_interaction
+    create_user, record_interaction, like_ratio_rating
 )
 
 
@@ -125,6 +125,25 @@ class TestJokeModel:
             db_session.commit()
 
 
+    def test_like_ratio_rating_keeps_rating_until_viewed(self, db_session: Session):
+        """Test the derived rating only replaces a joke's rating once it has views"""
+        unviewed = Joke(text="Seeded joke", rating=4.2)
+        viewed = Joke(text="Viewed joke", rating=4.2, view_count=8, like_count=3)
+        db_session.add_all([unviewed, viewed])
+        db_session.commit()
+
+        db_session.query(Joke).update(
+            {Joke.rating: like_ratio_rating(Joke.view_count, Joke.like_count, Joke.rating)},
+            synchronize_session=False
+        )
+        db_session.commit()
+        db_session.refresh(unviewed)
+        db_session.refresh(viewed)
+
+        assert unviewed.rating == 4.2
+        assert viewed.rating == 1.88
+
+
 class TestFavoriteModel:
     """Test cases for Favorite model"""
     
@@ -0,0 +1,60 @@
+"""Test configuration and fixtures for personalization tests."""
+
+import pytest
+import asyncio
+from typing import AsyncGenerator, Generator
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import StaticPool
+import tempfile
+import os
+
+from database.models import Base
+
+
+@pytest.fixture(scope="session")
+def event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
+    """Create an event loop for the test session."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+async def test_engine():
+    """Create a test database engine using a temporary SQLite file."""
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+    temp_file.close()
+    
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{temp_file.name}",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+        echo=False
+    )
+    
+    # Create all tables
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    
+    yield engine
+    
+    # Cleanup
+    await engine.dispose()
+    os.unlink(temp_file.name)
+
+
+@pytest.fixture
+async def session_factory(test_engine):
+    """Create session factory for testing."""
+    return async_sessionmaker(
+        bind=test_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+
+
+@pytest.fixture
+async def async_session(session_factory) -> AsyncGenerator[AsyncSession, None]:
+    """Create a database session for testing."""
+    async with session_factory() as session:
+        yield session
@@ -1,11 +1,15 @@
 """Tests for personalization repository functionality."""
 
+import asyncio
 import pytest
 from datetime import datetime, timedelta
+from sqlalchemy import update
+from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.repositories.personalization_repository import PersonalizationRepository
 from database.repositories.tag_repository import TagRepository
+from database.repositories.cache import AnalyticsCache
 from database.models import (
     Tag, JokeTag, UserTagScore, Joke, User, JokeInteraction, PersonalizationMetric
 )
@@ -397,6 +401,7 @@ class TestPersonalizationRepository:
         assert performance['total_likes'] == 1
         assert performance['total_skips'] == 1
         assert performance['click_through_rate'] == 1/3  # 1 like out of 3 views
+        assert performance['diversity_score'] == 0.75  # style, topic and tone viewed
 
     async def test_similar_users_recommendations(
         self,
@@ -502,4 +507,360 @@ class TestPersonalizationRepository:
         )
         
         assert isinstance(score, float)
-        assert score >= 0.0  # Should be non-negative for positive preferences
\ No newline at end of file
+        assert score >= 0.0  # Should be non-negative for positive preferences
+
+    async def test_unseen_jokes_grouped_with_their_tags(
+        self,
+        personalization_repo: PersonalizationRepository,
+        user_with_preferences,
+        sample_jokes_with_tags
+    ):
+        """Test tags are grouped per joke and untagged jokes are dropped."""
+        jokes = sample_jokes_with_tags['jokes']
+        tags = sample_jokes_with_tags['tags']
+
+        unseen_jokes = await personalization_repo._get_unseen_jokes_with_tags(
+            user_id=user_with_preferences.id,
+            language="en",
+            min_confidence=0.7
+        )
+
+        tags_by_joke = {
+            joke.id: {tag.id for tag, _ in joke_tags}
+            for joke, joke_tags in unseen_jokes
+        }
+        assert tags_by_joke == {
+            jokes[0].id: {tags[0].id, tags[2].id},
+            jokes[1].id: {tags[1].id},
+            jokes[2].id: {tags[1].id},
+            jokes[4].id: {tags[3].id},
+        }
+
+    async def test_find_similar_users_cosine_over_shared_tags(
+        self,
+        personalization_repo: PersonalizationRepository,
+        async_session: AsyncSession,
+        sample_jokes_with_tags
+    ):
+        """Test similarity is the cosine over shared tags, best match first."""
+        tags = sample_jokes_with_tags['tags']
+        users = [User(username=f"sim_user{i}", email=f"sim{i}@example.com") for i in range(4)]
+        async_session.add_all(users)
+        await async_session.commit()
+
+        scores = [
+            (users[0], [0.6, 0.8, 0.5]),
+            (users[1], [0.6, 0.8, None]),   # Same direction on shared tags
+            (users[2], [0.8, -0.6, None]),  # Orthogonal
+            (users[3], [0.8, None, 0.9]),   # Close on two shared tags
+        ]
+        for user, values in scores:
+            for tag, value in zip(tags, values):
+                if value is not None:
+                    async_session.add(UserTagScore(user_id=user.id, tag_id=tag.id, score=value))
+        await async_session.commit()
+
+        similar_users = await personalization_repo._find_similar_users(
+            users[0].id, similarity_threshold=0.5
+        )
+
+        assert [user_id for user_id, _ in similar_users] == [users[1].id, users[3].id]
+        assert similar_users[0][1] == pytest.approx(1.0)
+        assert similar_users[1][1] == pytest.approx(0.93 / ((0.61 * 1.45) ** 0.5))
+
+    async def test_exploitation_score_is_confidence_weighted_mean(
+        self,
+        personalization_repo: PersonalizationRepository,
+        sample_jokes_with_tags
+    ):
+        """Test tags without a preference count as neutral in the weighted mean."""
+        tags = sample_jokes_with_tags['tags']
+        preferences = {tags[0].id: 0.8, tags[1].id: -0.2}
+
+        score = personalization_repo._calculate_exploitation_score(
+            [(tags[0], 0.5), (tags[1], 1.0), (tags[2], 0.5)], preferences
+        )
+
+        assert score == pytest.approx((0.8 * 0.5 - 0.2 * 1.0) / 2.0)
+        assert personalization_repo._calculate_exploitation_score([], preferences) == 0.0
+
+    async def test_exploitation_picks_top_scored_jokes(
+        self,
+        personalization_repo: PersonalizationRepository,
+        user_with_preferences,
+        sample_jokes_with_tags
+    ):
+        """Test pure exploitation returns the highest-scored candidates in score order."""
+        jokes = sample_jokes_with_tags['jokes']
+
+        recommendations = await personalization_repo.get_personalized_recommendations(
+            user_id=user_with_preferences.id,
+            limit=2,
+            exploration_rate=0.0,
+            language="en"
+        )
+
+        assert [joke.id for joke, _, _ in recommendations] == [jokes[2].id, jokes[1].id]
+        assert recommendations[0][1] == pytest.approx((0.7 * 0.6 + 0.5 * 0.9) / 1.5)
+
+    async def test_unseen_jokes_block_lazy_loads(
+        self,
+        personalization_repo: PersonalizationRepository,
+        user_with_preferences,
+        sample_jokes_with_tags,
+        async_session: AsyncSession
+    ):
+        """Test unseen jokes carry preloaded tags and refuse other lazy loads."""
+        user_id = user_with_preferences.id
+        async_session.expire_all()
+
+        unseen_jokes = await personalization_repo._get_unseen_jokes_with_tags(
+            user_id=user_id,
+            language="en",
+            min_confidence=0.5
+        )
+
+        joke, tags = unseen_jokes[0]
+        assert all(tag.name for tag, _ in tags)
+        with pytest.raises(InvalidRequestError):
+            joke.interactions
+
+    async def test_user_preferences_cached_until_interaction_update(
+        self,
+        personalization_repo: PersonalizationRepository,
+        tag_repo: TagRepository,
+        user_with_preferences,
+        sample_jokes_with_tags,
+        async_session: AsyncSession
+    ):
+        """Test preferences are served from cache until the user's scores are updated."""
+        personalization_repo._analytics_cache = AnalyticsCache()
+        tags = sample_jokes_with_tags['tags']
+
+        first = await personalization_repo._get_user_preferences(user_with_preferences.id)
+
+        await async_session.execute(
+            update(UserTagScore)
+            .where(UserTagScore.user_id == user_with_preferences.id)
+            .values(score=0.9)
+        )
+        assert await personalization_repo._get_user_preferences(user_with_preferences.id) == first
+
+        await personalization_repo.update_preferences_from_interaction(
+            user_id=user_with_preferences.id,
+            joke_id=sample_jokes_with_tags['jokes'][1].id,
+            interaction_type='like',
+            tag_repository=tag_repo
+        )
+        await async_session.commit()
+        await asyncio.gather(*personalization_repo._invalidation_tasks)
+
+        refreshed = await personalization_repo._get_user_preferences(user_with_preferences.id)
+        assert refreshed[tags[0].id] == pytest.approx(0.9)
+        assert refreshed[tags[1].id] > 0.9
+
+    async def test_user_preferences_invalidated_after_commit(
+        self,
+        personalization_repo: PersonalizationRepository,
+        tag_repo: TagRepository,
+        user_with_preferences,
+        sample_jokes_with_tags,
+        async_session: AsyncSession
+    ):
+        """Test a stale read cached mid-transaction is dropped once the update commits."""
+        cache = AnalyticsCache()
+        personalization_repo._analytics_cache = cache
+        user_id = user_with_preferences.id
+        key = personalization_repo._user_preferences_key(user_id)
+        stale = await personalization_repo._get_user_preferences(user_id)
+
+        await personalization_repo.update_preferences_from_interaction(
+            user_id=user_id,
+            joke_id=sample_jokes_with_tags['jokes'][1].id,
+            interaction_type='like',
+            tag_repository=tag_repo
+        )
+
+        # Nothing is invalidated before commit; a concurrent reader may re-cache old scores
+        assert await cache.get(key) == stale
+        await cache.set(key, stale, 300)
+
+        await async_session.commit()
+        await asyncio.gather(*personalization_repo._invalidation_tasks)
+
+        assert await cache.get(key) is None
+        refreshed = await personalization_repo._get_user_preferences(user_id)
+        assert refreshed != stale
+
+    async def test_user_preferences_kept_on_rollback(
+        self,
+        personalization_repo: PersonalizationRepository,
+        tag_repo: TagRepository,
+        user_with_preferences,
+        sample_jokes_with_tags,
+        async_session: AsyncSession
+    ):
+        """Test a rolled-back update leaves the cached preferences in place."""
+        cache = AnalyticsCache()
+        personalization_repo._analytics_cache = cache
+        user_id = user_with_preferences.id
+        key = personalization_repo._user_preferences_key(user_id)
+        cached = await personalization_repo._get_user_preferences(user_id)
+
+        await personalization_repo.update_preferences_from_interaction(
+            user_id=user_id,
+            joke_id=sample_jokes_with_tags['jokes'][1].id,
+            interaction_type='like',
+            tag_repository=tag_repo
+        )
+        await async_session.rollback()
+        await async_session.commit()
+
+        assert personalization_repo._invalidation_tasks == set()
+        assert await cache.get(key) == cached
+
+    async def test_user_preferences_not_cached_while_uncommitted(
+        self,
+        personalization_repo: PersonalizationRepository,
+        tag_repo: TagRepository,
+        user_with_preferences,
+        sample_jokes_with_tags,
+        async_session: AsyncSession
+    ):
+        """Test a same-session read of uncommitted scores is not cached past a rollback."""
+        cache = AnalyticsCache()
+        personalization_repo._analytics_cache = cache
+        user_id = user_with_preferences.id
+        key = personalization_repo._user_preferences_key(user_id)
+
+        await personalization_repo.update_preferences_from_interaction(
+            user_id=user_id,
+            joke_id=sample_jokes_with_tags['jokes'][1].id,
+            interaction_type='like',
+            tag_repository=tag_repo
+        )
+        uncommitted = await personalization_repo._get_user_preferences(user_id)
+        assert await cache.get(key) is None
+
+        await async_session.rollback()
+
+        assert await cache.get(key) is None
+        assert await personalization_repo._get_user_preferences(user_id) != uncommitted
+
+    async def test_collaborative_scores_batch_by_joke(
+        self,
+        personalization_repo: PersonalizationRepository,
+        async_session: AsyncSession,
+        sample_jokes_with_tags
+    ):
+        """Test collaborative scores are similarity-weighted per joke in one call."""
+        jokes = sample_jokes_with_tags['jokes']
+        users = [User(username=f"cf_user{i}", email=f"cf{i}@example.com") for i in range(2)]
+        async_session.add_all(users)
+        await async_session.commit()
+
+        for user, joke, interaction_type in [
+            (users[0], jokes[0], 'like'),
+            (users[1], jokes[0], 'skip'),
+            (users[1], jokes[1], 'view'),
+        ]:
+            async_session.add(JokeInteraction(
+                user_id=user.id, joke_id=joke.id, interaction_type=interaction_type
+            ))
+        await async_session.commit()
+
+        scores = await personalization_repo._calculate_collaborative_scores(
+            [jokes[0].id, jokes[1].id, jokes[2].id],
+            [(users[0].id, 0.8), (users[1].id, 0.4)]
+        )
+
+        assert scores == {
+            jokes[0].id: pytest.approx((1.0 * 0.8 - 0.5 * 0.4) / 1.2),
+            jokes[1].id: pytest.approx(0.3),
+        }
+
+    async def test_similar_users_reused_from_cache(
+        self,
+        personalization_repo: PersonalizationRepository,
+        async_session: AsyncSession,
+        sample_jokes_with_tags
+    ):
+        """Test a user's similar-user list is served from cache per threshold."""
+        personalization_repo._analytics_cache = AnalyticsCache()
+        tag = sample_jokes_with_tags['tags'][0]
+        users = [User(username=f"nb_user{i}", email=f"nb{i}@example.com") for i in range(3)]
+        async_session.add_all(users)
+        await async_session.commit()
+        for user in users[:2]:
+            async_session.add(UserTagScore(user_id=user.id, tag_id=tag.id, score=0.5))
+        await async_session.commit()
+
+        first = await personalization_repo._find_similar_users(users[0].id, 0.5)
+        async_session.add(UserTagScore(user_id=users[2].id, tag_id=tag.id, score=0.5))
+        await async_session.commit()
+
+        assert first == [(users[1].id, pytest.approx(1.0))]
+        assert await personalization_repo._find_similar_users(users[0].id, 0.5) == first
+        assert len(await personalization_repo._find_similar_users(users[0].id, 0.4)) == 2
+
+    async def test_similar_users_recommend_their_liked_jokes(
+        self,
+        personalization_repo: PersonalizationRepository,
+        async_session: AsyncSession,
+        sample_jokes_with_tags
+    ):
+        """Test jokes liked by similar users come back most-liked first with their score."""
+        jokes = sample_jokes_with_tags['jokes']
+        tag = sample_jokes_with_tags['tags'][0]
+        users = [User(username=f"cf_target{i}", email=f"cft{i}@example.com") for i in range(3)]
+        async_session.add_all(users)
+        await async_session.commit()
+
+        for user in users:
+            async_session.add(UserTagScore(user_id=user.id, tag_id=tag.id, score=0.6))
+        for user, joke in [(users[1], jokes[0]), (users[2], jokes[0]), (users[2], jokes[1])]:
+            async_session.add(JokeInteraction(user_id=user.id, joke_id=joke.id, interaction_type='like'))
+        await async_session.commit()
+
+        recommendations = await personalization_repo.get_similar_users_recommendations(
+            user_id=users[0].id,
+            limit=5,
+            language="en"
+        )
+
+        assert [joke.id for joke, _ in recommendations] == [jokes[0].id, jokes[1].id]
+        assert all(score == pytest.approx(1.0) for _, score in recommendations)
+
+    async def test_similar_users_skip_jokes_target_has_seen(
+        self,
+        personalization_repo: PersonalizationRepository,
+        async_session: AsyncSession,
+        sample_jokes_with_tags
+    ):
+        """Test the unseen filter holds when the outer query also joins interactions."""
+        jokes = sample_jokes_with_tags['jokes']
+        tag = sample_jokes_with_tags['tags'][0]
+        users = [User(username=f"seen_user{i}", email=f"seen{i}@example.com") for i in range(2)]
+        async_session.add_all(users)
+        await async_session.commit()
+
+        for user in users:
+            async_session.add(UserTagScore(user_id=user.id, tag_id=tag.id, score=0.6))
+        for user, joke, interaction_type in [
+            (users[1], jokes[0], 'like'),
+            (users[1], jokes[1], 'like'),
+            (users[0], jokes[0], 'view'),
+        ]:
+            async_session.add(JokeInteraction(
+                user_id=user.id, joke_id=joke.id, interaction_type=interaction_type
+            ))
+        await async_session.commit()
+
+        recommendations = await personalization_repo.get_similar_users_recommendations(
+            user_id=users[0].id,
+            limit=5,
+            language="en"
+        )
+
+        assert [joke.id for joke, _ in recommendations] == [jokes[1].id]
+        assert 'NOT (EXISTS' in str(personalization_repo._unseen_predicate(users[0].id))
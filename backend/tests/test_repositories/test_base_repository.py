@@ -3,8 +3,9 @@
 import pytest
 from datetime import datetime, timedelta
 from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
 
-from database.repositories.base import BaseRepository, RepositoryError, NotFoundError, ValidationError
+from database.repositories.base import BaseRepository, RepositoryError, NotFoundError, ValidationError, count_distinct
 from database.models import User, UserStats
 
 
@@ -368,4 +369,18 @@ class TestBaseRepository:
         }
         
         with pytest.raises((ValidationError, RepositoryError)):
-            await user_repository.create(invalid_data)
\ No newline at end of file
+            await user_repository.create(invalid_data)
+
+    @pytest.mark.asyncio
+    async def test_count_distinct_exact_without_hll(self, user_repository, multiple_users):
+        """Test count_distinct falls back to an exact count when HLL is unavailable."""
+        assert await user_repository._supports_approx_distinct() is False
+
+        result = await user_repository.session.execute(select(count_distinct(User.preferred_language)))
+        assert result.scalar() == len({u.preferred_language for u in multiple_users})
+
+    def test_count_distinct_approximate_sql(self):
+        """Test the approximate form compiles to an HLL sketch on PostgreSQL."""
+        sql = str(count_distinct(User.id, approximate=True).compile(dialect=postgresql.dialect()))
+
+        assert 'hll_cardinality(hll_add_agg(hll_hash_text(CAST(users.id AS TEXT))))' in sql
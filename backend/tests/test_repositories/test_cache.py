@@ -0,0 +1,53 @@
+"""Tests for the analytics cache."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.repositories.cache import AnalyticsCache
+
+
+class TestAnalyticsCache:
+    """Test suite for AnalyticsCache's in-memory fallback."""
+
+    @pytest.mark.asyncio
+    async def test_memory_cache_evicts_least_recently_used(self):
+        """Test the memory cache stays within its cap, dropping the coldest key."""
+        cache = AnalyticsCache(max_memory_entries=2)
+
+        await cache.set('a', 1, ttl=60)
+        await cache.set('b', 2, ttl=60)
+        assert await cache.get('a') == 1
+        await cache.set('c', 3, ttl=60)
+
+        assert len(cache._memory_cache) == 2
+        assert await cache.get('b') is None
+        assert await cache.get('a') == 1
+        assert await cache.get('c') == 3
+
+    @pytest.mark.asyncio
+    async def test_memory_cache_sweeps_expired_before_evicting(self):
+        """Test expired entries that are never read again are swept on overflow."""
+        cache = AnalyticsCache(max_memory_entries=2)
+
+        await cache.set('live', 1, ttl=60)
+        await cache.set('stale', 2, ttl=60)
+        data, _ = cache._memory_cache['stale']
+        cache._memory_cache['stale'] = (data, datetime.utcnow() - timedelta(seconds=1))
+
+        await cache.set('new', 3, ttl=60)
+
+        assert list(cache._memory_cache) == ['live', 'new']
+
+    @pytest.mark.asyncio
+    async def test_delete_removes_only_that_key(self):
+        """Test deleting a key leaves keys that share its prefix."""
+        cache = AnalyticsCache()
+
+        await cache.set('user:1', 1, ttl=60)
+        await cache.set('user:10', 10, ttl=60)
+
+        assert await cache.delete('user:1') is True
+        assert await cache.delete('user:1') is False
+        assert await cache.get('user:1') is None
+        assert await cache.get('user:10') == 10
@@ -0,0 +1,488 @@
+"""Tests for CategoryRepository."""
+
+import re
+
+import pytest
+
+from database.models import Category, Favorite, Joke, JokeInteraction
+from database.repositories.base import RepositoryError
+from database.repositories.cache import AnalyticsCache
+
+
+@pytest.fixture
+async def category_interactions(session, multiple_users, multiple_jokes):
+    """Record a view from every user on every joke, plus likes on even jokes."""
+    for user in multiple_users:
+        for i, joke in enumerate(multiple_jokes):
+            session.add(JokeInteraction(user_id=user.id, joke_id=joke.id, interaction_type='view'))
+            if i % 2 == 0:
+                session.add(JokeInteraction(user_id=user.id, joke_id=joke.id, interaction_type='like'))
+    await session.commit()
+    return multiple_users
+
+
+class TestCategoryRepository:
+    """Test suite for CategoryRepository."""
+
+    @pytest.mark.asyncio
+    async def test_get_popular_includes_category_details(
+        self,
+        category_repository,
+        multiple_categories,
+        category_interactions
+    ):
+        """Test popular categories carry display name and description from the join."""
+        popular = await category_repository.get_popular(metric='interactions', limit=10)
+
+        assert {c['name'] for c in popular} == {'funny', 'puns', 'oneliners', 'dad_jokes'}
+        for category in popular:
+            assert category['display_name'] == category['name'].replace('_', ' ').title()
+            assert category['description'] == f"Category for {category['name']} jokes"
+            assert category['unique_users'] == len(category_interactions)
+
+        counts = [c['metric_value'] for c in popular]
+        assert counts == sorted(counts, reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_get_popular_without_category_row(
+        self,
+        category_repository,
+        multiple_jokes
+    ):
+        """Test categories without a Category row fall back to a titled name."""
+        popular = await category_repository.get_popular(metric='views', limit=10)
+
+        assert len(popular) == 4
+        for category in popular:
+            assert category['display_name'] == category['name'].title()
+            assert category['description'] is None
+
+    @pytest.mark.asyncio
+    async def test_get_popular_invalid_metric(self, category_repository):
+        """Test an unknown metric is rejected."""
+        with pytest.raises(RepositoryError):
+            await category_repository.get_popular(metric='shares')
+
+    @pytest.mark.asyncio
+    async def test_suggest_categories_for_user(
+        self,
+        session,
+        joke_repository,
+        category_repository,
+        multiple_categories,
+        category_interactions
+    ):
+        """Test unexplored categories are suggested with their details."""
+        explorer, other = category_interactions[0], category_interactions[1]
+        for i in range(5):
+            joke = await joke_repository.create({
+                'text': f'Knock knock joke {i}',
+                'category': 'knock_knock',
+                'language': 'en',
+                'rating': 4.0
+            })
+            session.add(JokeInteraction(user_id=other.id, joke_id=joke.id, interaction_type='view'))
+        await session.commit()
+
+        suggestions = await category_repository.suggest_categories_for_user(
+            user_id=explorer.id,
+            exclude_seen=True,
+            limit=5
+        )
+
+        assert len(suggestions) == 1
+        suggestion = suggestions[0]
+        assert suggestion['category'] == 'knock_knock'
+        assert suggestion['display_name'] == 'Knock Knock'
+        assert suggestion['description'] == 'Category for knock_knock jokes'
+        assert suggestion['joke_count'] == 5
+        assert suggestion['popularity_score'] == 5
+
+        # The other user has already seen knock_knock jokes
+        suggestions = await category_repository.suggest_categories_for_user(
+            user_id=other.id,
+            exclude_seen=True
+        )
+        assert suggestions == []
+
+    @pytest.mark.asyncio
+    async def test_update_category_counts(
+        self,
+        session,
+        category_repository,
+        multiple_categories,
+        multiple_jokes
+    ):
+        """Test counts are refreshed for existing categories and missing ones are created."""
+        session.add(Joke(text='Rogue joke', category='Not Valid', language='en'))
+        await session.commit()
+
+        counts = await category_repository.update_category_counts()
+
+        assert counts == {'funny': 3, 'puns': 3, 'oneliners': 2, 'dad_jokes': 2}
+
+        session.expire_all()
+        categories = {c.name: c for c in await category_repository.get_multi()}
+        assert categories['funny'].joke_count == 3
+        assert categories['dad_jokes'].joke_count == 2
+        assert categories['knock_knock'].joke_count == 0
+        assert 'Not Valid' not in categories
+
+    @pytest.mark.asyncio
+    async def test_update_category_counts_creates_missing(
+        self,
+        category_repository,
+        multiple_jokes
+    ):
+        """Test categories referenced by jokes are created with their counts."""
+        counts = await category_repository.update_category_counts()
+
+        categories = {c.name: c for c in await category_repository.get_multi()}
+        assert set(categories) == set(counts)
+        assert categories['dad_jokes'].display_name == 'Dad Jokes'
+        assert categories['funny'].joke_count == 3
+
+    @pytest.mark.asyncio
+    async def test_get_all_by_category_engagement_score(
+        self,
+        category_repository,
+        multiple_categories,
+        multiple_jokes
+    ):
+        """Test the SQL engagement score matches the Python formula."""
+        categories = await category_repository.get_all_by_category(include_joke_count=True)
+
+        assert len(categories) == 5
+        for category in categories:
+            expected = category_repository._calculate_engagement_score(
+                category['joke_count'],
+                category['avg_rating'],
+                category['total_views']
+            )
+            assert category['engagement_score'] == pytest.approx(expected)
+
+        knock_knock = next(c for c in categories if c['name'] == 'knock_knock')
+        assert knock_knock['joke_count'] == 0
+        assert knock_knock['engagement_score'] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_get_all_by_category_without_counts(
+        self,
+        category_repository,
+        multiple_categories
+    ):
+        """Test the plain listing is ordered by display name."""
+        categories = await category_repository.get_all_by_category(include_joke_count=False)
+
+        assert [c['display_name'] for c in categories] == sorted(
+            c.display_name for c in multiple_categories
+        )
+        assert set(categories[0]) == {'id', 'name', 'display_name', 'description'}
+
+    @pytest.mark.asyncio
+    async def test_iter_all_by_category(
+        self,
+        category_repository,
+        multiple_categories,
+        multiple_jokes
+    ):
+        """Test iterating yields the same rows as the list variant."""
+        streamed = [c async for c in category_repository.iter_all_by_category(min_jokes=1)]
+        listed = await category_repository.get_all_by_category(min_jokes=1)
+
+        assert streamed == listed
+        assert len(streamed) == 4
+
+    @pytest.mark.asyncio
+    async def test_category_meta_cache(
+        self,
+        category_repository,
+        multiple_categories
+    ):
+        """Test category metadata is cached and refreshed after writes."""
+        meta = await category_repository._get_category_meta('funny')
+        assert meta == ('Funny', 'Category for funny jokes')
+        assert await category_repository._get_category_meta('missing') is None
+
+        # Categories created after the cache was warmed are still found
+        await category_repository.create_category(name='new_one', display_name='New One')
+        assert await category_repository._get_category_meta('new_one') == ('New One', None)
+
+        await category_repository.update(multiple_categories[0].id, {'display_name': 'Hilarious'})
+        assert (await category_repository._get_category_meta('funny'))[0] == 'Hilarious'
+
+    @pytest.mark.asyncio
+    async def test_get_category_performance(
+        self,
+        session,
+        category_repository,
+        multiple_categories,
+        multiple_jokes,
+        category_interactions
+    ):
+        """Test performance metrics are gathered for a single category."""
+        funny_jokes = [j for j in multiple_jokes if j.category == 'funny']
+        session.add(Favorite(user_id=category_interactions[0].id, joke_id=funny_jokes[0].id))
+        await session.commit()
+
+        performance = await category_repository.get_category_performance('funny')
+
+        assert performance['category'] == {
+            'name': 'funny',
+            'display_name': 'Funny',
+            'description': 'Category for funny jokes'
+        }
+        content = performance['content_stats']
+        assert content['total_jokes'] == len(funny_jokes)
+        assert content['total_views'] == sum(j.view_count for j in funny_jokes)
+        assert content['first_joke_date'] is not None
+
+        assert performance['interaction_stats']['view'] == {
+            'count': len(funny_jokes) * len(category_interactions),
+            'unique_users': len(category_interactions)
+        }
+        assert set(performance['interaction_stats']) == {'view', 'like'}
+        assert performance['favorite_stats'] == {'total_favorites': 1, 'unique_users': 1}
+
+    @pytest.mark.asyncio
+    async def test_get_category_performance_without_activity(
+        self,
+        category_repository,
+        multiple_categories
+    ):
+        """Test a category without jokes reports empty statistics."""
+        performance = await category_repository.get_category_performance('knock_knock')
+
+        assert performance['content_stats']['total_jokes'] == 0
+        assert performance['interaction_stats'] == {}
+        assert performance['favorite_stats'] == {'total_favorites': 0, 'unique_users': 0}
+
+    @pytest.mark.asyncio
+    async def test_get_category_performance_unknown_category(self, category_repository):
+        """Test an unknown category is reported as an error."""
+        with pytest.raises(RepositoryError):
+            await category_repository.get_category_performance('does_not_exist')
+
+    @pytest.mark.asyncio
+    async def test_bulk_create_categories(
+        self,
+        category_repository,
+        multiple_categories
+    ):
+        """Test bulk creation skips existing and invalid names."""
+        created = await category_repository.bulk_create_categories([
+            {'name': 'puns', 'display_name': 'Puns Again'},
+            {'name': 'Tech', 'display_name': 'Tech', 'description': 'Tech jokes'},
+            {'name': 'science', 'display_name': 'Science'},
+            {'name': 'not valid!', 'display_name': 'Invalid'},
+            {'name': 'science', 'display_name': 'Science Duplicate'}
+        ])
+
+        assert sorted(c.name for c in created) == ['science', 'tech']
+        tech = next(c for c in created if c.name == 'tech')
+        assert tech.id is not None
+        assert tech.description == 'Tech jokes'
+
+        all_names = {c.name for c in await category_repository.get_multi()}
+        assert {'science', 'tech', 'puns'} <= all_names
+        assert len(all_names) == len(multiple_categories) + 2
+
+    @pytest.mark.asyncio
+    async def test_bulk_create_categories_empty(self, category_repository):
+        """Test bulk creation with nothing valid to insert."""
+        assert await category_repository.bulk_create_categories([]) == []
+        assert await category_repository.bulk_create_categories([{'name': '!'}]) == []
+
+    @pytest.mark.asyncio
+    async def test_get_user_category_preferences(
+        self,
+        session,
+        category_repository,
+        multiple_categories,
+        multiple_jokes,
+        category_interactions
+    ):
+        """Test preference scores are computed and ordered in the query."""
+        user = category_interactions[0]
+        for joke in multiple_jokes:
+            if joke.category == 'oneliners':
+                session.add(JokeInteraction(user_id=user.id, joke_id=joke.id, interaction_type='skip'))
+        await session.commit()
+
+        preferences = await category_repository.get_user_category_preferences(user.id)
+
+        assert len(preferences) == 4
+        scores = [p['preference_score'] for p in preferences]
+        assert scores == sorted(scores, reverse=True)
+
+        for preference in preferences:
+            counts = preference['interactions']
+            expected = (
+                (counts['likes'] * 3 + counts['favorites'] * 5 - counts['skips'])
+                / max(counts['views'], 1)
+            ) * 100
+            assert preference['preference_score'] == pytest.approx(round(expected, 2))
+
+        oneliners = next(p for p in preferences if p['category'] == 'oneliners')
+        assert oneliners['display_name'] == 'Oneliners'
+        assert oneliners['interactions']['skips'] == 2
+
+        top = await category_repository.get_user_category_preferences(user.id, limit=1)
+        assert top == preferences[:1]
+
+    @pytest.mark.asyncio
+    async def test_get_user_category_preferences_breaks_ties_by_name(
+        self,
+        session,
+        category_repository,
+        created_user,
+        multiple_jokes
+    ):
+        """Test equal preference scores are cut by category name."""
+        for joke in multiple_jokes:
+            session.add(JokeInteraction(user_id=created_user.id, joke_id=joke.id, interaction_type='view'))
+        await session.commit()
+
+        top = await category_repository.get_user_category_preferences(created_user.id, limit=2)
+
+        assert [p['category'] for p in top] == ['dad_jokes', 'funny']
+        assert all(p['preference_score'] == 0 for p in top)
+
+    @pytest.mark.asyncio
+    async def test_get_categories_meta_batches_missing_names(
+        self,
+        session,
+        category_repository,
+        multiple_categories
+    ):
+        """Test several names resolve together, including ones added after warm-up."""
+        await category_repository._get_category_meta('funny')
+
+        session.add(Category(name='late_one', display_name='Late One'))
+        session.add(Category(name='late_two', display_name='Late Two'))
+        await session.commit()
+
+        metadata = await category_repository._get_categories_meta(
+            ['funny', 'late_one', 'late_two', 'missing']
+        )
+
+        assert metadata == {
+            'funny': ('Funny', 'Category for funny jokes'),
+            'late_one': ('Late One', None),
+            'late_two': ('Late Two', None)
+        }
+
+    @pytest.mark.asyncio
+    async def test_get_category_trends(
+        self,
+        category_repository,
+        multiple_jokes,
+        category_interactions
+    ):
+        """Test daily trends are grouped per category."""
+        trends = await category_repository.get_category_trends(days=7, interval='daily')
+
+        assert set(trends) == {'funny', 'puns', 'oneliners', 'dad_jokes'}
+        for periods in trends.values():
+            assert len(periods) == 1
+            assert re.fullmatch(r'\d{4}-\d{2}-\d{2}', periods[0]['time_period'])
+            assert periods[0]['unique_users'] == len(category_interactions)
+            assert periods[0]['interaction_count'] > 0
+
+    @pytest.mark.asyncio
+    async def test_get_category_trends_invalid_interval(self, category_repository):
+        """Test an unknown interval is rejected."""
+        with pytest.raises(RepositoryError):
+            await category_repository.get_category_trends(interval='hourly')
+
+    @pytest.mark.asyncio
+    async def test_get_popular_uses_analytics_cache(
+        self,
+        session,
+        category_repository,
+        multiple_categories,
+        multiple_jokes
+    ):
+        """Test popular results are served from the analytics cache until invalidated."""
+        category_repository._analytics_cache = AnalyticsCache()
+
+        first = await category_repository.get_popular(metric='views')
+        session.add(Joke(text='Extra pun', category='puns', language='en', view_count=1000))
+        await session.commit()
+
+        # Positional and keyword calls share the cache entry
+        assert await category_repository.get_popular('en', 30, 10, 'views') == first
+
+        await category_repository.update_category_counts()
+        refreshed = await category_repository.get_popular(metric='views')
+        assert refreshed != first
+        assert refreshed[0]['name'] == 'puns'
+
+    @pytest.mark.asyncio
+    async def test_get_category_health_report(
+        self,
+        session,
+        category_repository,
+        multiple_categories,
+        multiple_jokes
+    ):
+        """Test the single-pass report matches per-metric counts over all categories."""
+        for i in range(6):
+            session.add(Category(name=f'extra_{i}', display_name=f'Extra {i}'))
+        await session.commit()
+
+        categories = await category_repository.get_all_by_category(include_joke_count=True)
+        report = await category_repository.get_category_health_report()
+
+        overview = report['overview']
+        assert overview['total_categories'] == len(categories) == 11
+        assert overview['active_categories'] == sum(1 for c in categories if c['joke_count'] > 0)
+        assert overview['well_populated_categories'] == sum(1 for c in categories if c['joke_count'] >= 10)
+        assert overview['high_quality_categories'] == sum(1 for c in categories if c['avg_rating'] >= 4.0)
+        assert report['top_performers'] == sorted(
+            categories, key=lambda c: c['engagement_score'], reverse=True
+        )[:5]
+        assert report['underperformers'] == [
+            c for c in categories if c['joke_count'] < 5 and c['engagement_score'] < 20
+        ]
+        assert report['recommendations'] == [
+            "Consider removing inactive categories or adding content to them",
+            "Focus on improving content quality for underperforming categories"
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_category_health_report_cached_until_categories_change(
+        self,
+        category_repository,
+        multiple_categories,
+        multiple_jokes
+    ):
+        """Test the health report is cached and dropped when a category is created."""
+        category_repository._analytics_cache = AnalyticsCache()
+
+        first = await category_repository.get_category_health_report()
+        assert first['overview']['total_categories'] == 5
+        assert await category_repository.get_category_health_report() == first
+
+        await category_repository.create({'name': 'riddles', 'display_name': 'Riddles'})
+        refreshed = await category_repository.get_category_health_report()
+        assert refreshed['overview']['total_categories'] == 6
+
+    @pytest.mark.asyncio
+    async def test_get_popular_metric_details(
+        self,
+        category_repository,
+        multiple_categories,
+        multiple_jokes,
+        category_interactions
+    ):
+        """Test each metric reports its own detail column."""
+        likes = await category_repository.get_popular(metric='likes')
+        assert all(c['metric_type'] == 'likes' and 'unique_users' in c for c in likes)
+        assert sum(c['metric_value'] for c in likes) == 5 * len(category_interactions)
+
+        views = await category_repository.get_popular(metric='views')
+        assert sum(c['joke_count'] for c in views) == len(multiple_jokes)
+        assert sum(c['metric_value'] for c in views) == sum(j.view_count for j in multiple_jokes)
+
+        assert await category_repository.get_popular(metric='favorites') == []
@@ -0,0 +1,206 @@
+"""Tests for repository factory and registry."""
+
+import gc
+
+import pytest
+
+from database.repositories.factory import (
+    RepositoryFactory,
+    RepositoryManager,
+    RepositoryRegistry,
+    create_repository_factory,
+    get_repository_manager
+)
+from database.models import User
+from database.repositories.cache import AnalyticsCache
+from database.repositories.joke_repository import JokeRepository
+
+
+class TestRepositoryFactory:
+    """Test suite for RepositoryFactory."""
+
+    @pytest.mark.asyncio
+    async def test_factories_share_default_registry(self, session):
+        """Test factories created without a registry reuse the module default."""
+        first = RepositoryFactory(session)
+        second = RepositoryFactory(session)
+
+        assert first.registry is second.registry
+        assert first.get_joke_repository() is second.get_joke_repository()
+
+    @pytest.mark.asyncio
+    async def test_factory_uses_given_registry(self, session):
+        """Test an explicit registry is used instead of the default."""
+        registry = RepositoryRegistry()
+        factory = RepositoryFactory(session, registry=registry)
+
+        assert factory.registry is registry
+        assert isinstance(factory.get_joke_repository(), JokeRepository)
+
+    @pytest.mark.asyncio
+    async def test_clear_cache_for_session(self, session, session_factory):
+        """Test clearing one session's instances leaves other sessions cached."""
+        registry = RepositoryRegistry()
+        joke_repo = registry.create_instance('joke', session)
+
+        async with session_factory() as other_session:
+            other_repo = registry.create_instance('joke', other_session)
+
+            registry.clear_cache(session)
+
+            assert registry.create_instance('joke', session) is not joke_repo
+            assert registry.create_instance('joke', other_session) is other_repo
+
+    @pytest.mark.asyncio
+    async def test_collected_session_is_evicted(self, session_factory):
+        """Test instances of a garbage-collected session leave the cache."""
+        registry = RepositoryRegistry()
+
+        async with session_factory() as other_session:
+            registry.create_instance('joke', other_session)
+            session_id = id(other_session)
+            assert session_id in registry._keys_by_session
+
+        del other_session
+        gc.collect()
+
+        assert session_id not in registry._keys_by_session
+        assert len(registry._instances) == 0
+
+    @pytest.mark.asyncio
+    async def test_health_check_counts_every_repository(
+        self,
+        repository_factory,
+        multiple_users,
+        multiple_jokes
+    ):
+        """Test the health check reports each repository's row count."""
+        health = await repository_factory.health_check()
+
+        assert health['overall_healthy'] is True
+        assert health['session_info']['connection_invalidated'] is False
+        assert health['repositories']['user']['record_count'] == len(multiple_users)
+        assert health['repositories']['joke']['record_count'] == len(multiple_jokes)
+        assert health['repositories']['interaction']['record_count'] == 0
+
+    @pytest.mark.asyncio
+    async def test_create_repository_factory_health_check(self, session, monkeypatch):
+        """Test the health check is opt-in and reused within its TTL."""
+        calls = []
+        original = RepositoryFactory.health_check
+
+        async def counting_health_check(factory):
+            calls.append(factory)
+            return await original(factory)
+
+        monkeypatch.setattr(RepositoryFactory, 'health_check', counting_health_check)
+
+        await create_repository_factory(session)
+        assert calls == []
+
+        await create_repository_factory(session, verify_health=True)
+        await create_repository_factory(session, verify_health=True)
+        assert len(calls) == 1
+
+        await create_repository_factory(session, verify_health=True, health_ttl=0)
+        assert len(calls) == 2
+
+    def test_get_repository_manager_is_singleton(self):
+        """Test the repository manager is created once per process."""
+        assert get_repository_manager() is get_repository_manager()
+
+    @pytest.mark.asyncio
+    async def test_get_cross_repository_stats(
+        self,
+        repository_factory,
+        multiple_users,
+        multiple_jokes,
+        multiple_categories
+    ):
+        """Test cross-repository totals come back from the combined count."""
+        stats = await repository_factory.get_cross_repository_stats()
+
+        assert stats == {
+            'total_jokes': len(multiple_jokes),
+            'total_users': len(multiple_users),
+            'total_categories': len(multiple_categories),
+            'total_interactions': 0,
+            'errors': []
+        }
+
+    @pytest.mark.asyncio
+    async def test_get_cross_repository_stats_cached(
+        self,
+        session,
+        repository_factory,
+        multiple_users
+    ):
+        """Test totals are served from the analytics cache within the TTL."""
+        repository_factory._analytics_cache = AnalyticsCache()
+
+        first = await repository_factory.get_cross_repository_stats()
+        session.add(User(username='late_user', email='late@example.com'))
+        await session.commit()
+
+        assert await repository_factory.get_cross_repository_stats() == first
+        assert first['total_users'] == len(multiple_users)
+
+    @pytest.mark.asyncio
+    async def test_execute_in_repositories(self, repository_factory, multiple_users):
+        """Test batch operations run allow-listed methods and reject others."""
+        results = await repository_factory.execute_in_repositories({
+            'user': {'method': 'count'},
+            'joke': {'method': 'exists', 'args': ['missing-id']}
+        })
+        assert results == {'user': len(multiple_users), 'joke': False}
+
+        with pytest.raises(AttributeError):
+            await repository_factory.execute_in_repositories({
+                'user': {'method': '_apply_filters', 'args': [None, {}]}
+            })
+
+    @pytest.mark.asyncio
+    async def test_unregister_drops_cached_instances(self, session):
+        """Test unregistering a repository removes its cached instances."""
+        registry = RepositoryRegistry()
+        joke_repo = registry.create_instance('joke', session)
+        user_repo = registry.create_instance('user', session)
+
+        registry.unregister('joke')
+
+        assert ('joke', id(session)) not in registry._instances
+        assert registry.create_instance('user', session) is user_repo
+        with pytest.raises(ValueError):
+            registry.create_instance('joke', session)
+
+    @pytest.mark.asyncio
+    async def test_manager_factories_use_global_registry(self, session):
+        """Test factories created by the manager share its registry."""
+        manager = RepositoryManager()
+        factory = manager.create_factory(session, factory_id='test')
+
+        assert factory.registry is manager._global_registry
+        assert manager.get_factory('test') is factory
+
+    def test_list_repositories_is_read_only_view(self):
+        """Test the registry listing is a live view that cannot be mutated."""
+        registry = RepositoryRegistry()
+        repositories = registry.list_repositories()
+
+        with pytest.raises(TypeError):
+            repositories['other'] = {}
+
+        registry.unregister('joke')
+        assert 'joke' not in repositories
+
+    @pytest.mark.asyncio
+    async def test_repository_accessors_are_cached(self, session):
+        """Test built-in accessors return one instance until the cache is cleared."""
+        factory = RepositoryFactory(session, registry=RepositoryRegistry())
+        joke_repo = factory.get_joke_repository()
+
+        assert factory.get_joke_repository() is joke_repo
+        assert factory.get_repository('joke') is joke_repo
+
+        factory.clear_cache()
+        assert factory.get_joke_repository() is not joke_repo
@@ -0,0 +1,371 @@
+"""Tests for InteractionRepository."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, inspect, select, tablesample
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import aliased
+
+from database.models import JokeInteraction, User, UserStats
+from database.repositories.interaction_repository import InteractionRepository
+
+
+@pytest.fixture
+async def cohort_users(session, multiple_jokes):
+    """Create twelve users of similar activity; every third one also likes what they view."""
+    users = []
+    for i in range(12):
+        user = User(username=f'cohort{i}', email=f'cohort{i}@example.com')
+        session.add(user)
+        users.append(user)
+    await session.flush()
+
+    for i, user in enumerate(users):
+        session.add(UserStats(user_id=user.id, jokes_viewed=5, jokes_liked=0, jokes_skipped=0))
+        for joke in multiple_jokes[:5]:
+            session.add(JokeInteraction(user_id=user.id, joke_id=joke.id, interaction_type='view'))
+            if i % 3 == 0:
+                session.add(JokeInteraction(user_id=user.id, joke_id=joke.id, interaction_type='like'))
+    await session.commit()
+    return users
+
+
+class TestInteractionRepository:
+    """Test suite for InteractionRepository."""
+
+    @pytest.mark.asyncio
+    async def test_get_user_sentiment_stats(self, session, interaction_repository, created_user, multiple_jokes):
+        """Test sentiment is derived from the weighted interaction counts."""
+        for joke in multiple_jokes[:4]:
+            session.add(JokeInteraction(user_id=created_user.id, joke_id=joke.id, interaction_type='like'))
+        session.add(JokeInteraction(user_id=created_user.id, joke_id=multiple_jokes[4].id, interaction_type='skip'))
+        await session.commit()
+
+        stats = await interaction_repository.get_user_sentiment_stats(created_user.id)
+
+        assert stats['total_interactions'] == 5
+        assert stats['interaction_breakdown'] == {'like': 4, 'skip': 1}
+        assert stats['sentiment_score'] == 1.4
+        assert stats['sentiment'] == 'positive'
+        assert stats['engagement_level'] == 'low'
+
+    @pytest.mark.asyncio
+    async def test_get_user_sentiment_stats_no_interactions(self, interaction_repository, created_user):
+        """Test users without interactions are neutral with no confidence."""
+        stats = await interaction_repository.get_user_sentiment_stats(created_user.id)
+
+        assert stats['sentiment'] == 'neutral'
+        assert stats['total_interactions'] == 0
+        assert stats['confidence'] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_sentiment_stats_cache_returns_copies(self, interaction_repository, created_user):
+        """Test mutating returned stats does not corrupt later cache hits."""
+        stats = await interaction_repository.get_user_sentiment_stats(created_user.id)
+        stats['sentiment'] = 'mutated'
+        stats['interaction_breakdown']['like'] = 99
+
+        cached = await interaction_repository.get_user_sentiment_stats(created_user.id)
+
+        assert cached['sentiment'] == 'neutral'
+        assert cached['interaction_breakdown'] == {}
+
+    @pytest.mark.asyncio
+    async def test_sentiment_stats_invalidated_by_joke_repository(
+        self,
+        interaction_repository,
+        joke_repository,
+        created_user,
+        multiple_jokes
+    ):
+        """Test interactions written through JokeRepository drop cached sentiment."""
+        before = await interaction_repository.get_user_sentiment_stats(created_user.id)
+
+        await joke_repository.mark_as_seen(created_user.id, multiple_jokes[0].id, 'like')
+        after_single = await interaction_repository.get_user_sentiment_stats(created_user.id)
+
+        await joke_repository.bulk_mark_as_seen([
+            {'user_id': created_user.id, 'joke_id': multiple_jokes[1].id, 'interaction_type': 'like'}
+        ])
+        after_bulk = await interaction_repository.get_user_sentiment_stats(created_user.id)
+
+        assert before['total_interactions'] == 0
+        assert after_single['interaction_breakdown'] == {'like': 1}
+        assert after_bulk['interaction_breakdown'] == {'like': 2}
+
+    @pytest.mark.asyncio
+    async def test_get_user_cohort_analysis(
+        self,
+        session,
+        interaction_repository,
+        created_user,
+        multiple_jokes,
+        cohort_users
+    ):
+        """Test cohort statistics match per-user sentiment stats."""
+        for joke in multiple_jokes[:5]:
+            session.add(JokeInteraction(user_id=created_user.id, joke_id=joke.id, interaction_type='view'))
+            session.add(JokeInteraction(user_id=created_user.id, joke_id=joke.id, interaction_type='like'))
+        await session.commit()
+
+        analysis = await interaction_repository.get_user_cohort_analysis(created_user.id)
+
+        assert analysis['analysis_status'] == 'success'
+        assert analysis['cohort_size'] == len(cohort_users)
+
+        expected = [
+            await interaction_repository.get_user_sentiment_stats(user.id)
+            for user in cohort_users
+        ]
+        comparison = analysis['cohort_comparison']
+        assert comparison['cohort_avg_sentiment_score'] == round(
+            sum(s['sentiment_score'] for s in expected) / len(expected), 3
+        )
+        assert comparison['cohort_avg_interactions'] == round(
+            sum(s['total_interactions'] for s in expected) / len(expected), 1
+        )
+        assert comparison['cohort_sentiment_distribution'] == {'neutral': 8, 'positive': 4}
+
+    @pytest.mark.asyncio
+    async def test_bulk_record_interactions(
+        self, session, interaction_repository, joke_repository, created_user, multiple_jokes
+    ):
+        """Test a batch is de-duplicated and the statistics are applied once per item."""
+        joke = multiple_jokes[0]
+        like_count = joke.like_count
+        session.add(JokeInteraction(user_id=created_user.id, joke_id=joke.id, interaction_type='view'))
+        await session.commit()
+
+        recorded = await interaction_repository.bulk_record_interactions([
+            {'user_id': created_user.id, 'joke_id': joke.id, 'interaction_type': 'view'},
+            {'user_id': created_user.id, 'joke_id': joke.id, 'interaction_type': 'like'},
+            {'user_id': created_user.id, 'joke_id': joke.id, 'interaction_type': 'like'},
+            {'user_id': created_user.id, 'joke_id': multiple_jokes[1].id, 'interaction_type': 'view'},
+            {'user_id': created_user.id, 'joke_id': multiple_jokes[1].id, 'interaction_type': 'bogus'},
+            {'user_id': 'missing-user', 'joke_id': joke.id, 'interaction_type': 'view'}
+        ])
+
+        assert [(i.joke_id, i.interaction_type) for i in recorded] == [
+            (joke.id, 'view'),
+            (joke.id, 'like'),
+            (multiple_jokes[1].id, 'view')
+        ]
+        assert await interaction_repository.count() == 3
+
+        loaded = await joke_repository.get(joke.id)
+        assert loaded is joke
+        assert joke.like_count == like_count + 1
+
+        result = await session.execute(select(UserStats).where(UserStats.user_id == created_user.id))
+        stats = result.scalar_one()
+        assert stats.jokes_viewed == 1
+        assert stats.jokes_liked == 1
+
+    @pytest.mark.asyncio
+    async def test_bulk_record_interactions_empty(self, interaction_repository):
+        """Test an empty or fully invalid batch records nothing."""
+        assert await interaction_repository.bulk_record_interactions([]) == []
+        assert await interaction_repository.bulk_record_interactions([
+            {'user_id': 'u', 'joke_id': 'j', 'interaction_type': 'bogus'}
+        ]) == []
+
+    @pytest.mark.asyncio
+    async def test_get_interaction_patterns(self, session, interaction_repository, created_user, multiple_jokes):
+        """Test hourly, daily and per-type aggregates agree with each other."""
+        now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        yesterday = now - timedelta(days=1)
+        for joke in multiple_jokes[:3]:
+            session.add(JokeInteraction(user_id=created_user.id, joke_id=joke.id, interaction_type='view', created_at=now))
+        session.add(JokeInteraction(
+            user_id=created_user.id, joke_id=multiple_jokes[0].id, interaction_type='like', created_at=now
+        ))
+        session.add(JokeInteraction(
+            user_id=created_user.id, joke_id=multiple_jokes[3].id, interaction_type='view', created_at=yesterday
+        ))
+        await session.commit()
+
+        patterns = await interaction_repository.get_interaction_patterns(created_user.id, days=7)
+
+        today, previous = now.strftime('%Y-%m-%d'), yesterday.strftime('%Y-%m-%d')
+        assert patterns['total_interactions'] == 5
+        assert patterns['active_days'] == 2
+        assert patterns['avg_daily_interactions'] == 2.5
+        assert patterns['consistency_score'] == 10.0
+        assert patterns['daily_totals'] == {previous: 1, today: 4}
+        assert patterns['interaction_trends'] == {'view': {previous: 1, today: 3}, 'like': {today: 1}}
+        assert patterns['hourly_patterns'][now.hour]['total'] == 5
+        assert patterns['peak_activity_hours'][0]['hour'] == now.hour
+
+    @pytest.mark.asyncio
+    async def test_record_feedback_updates_stats(
+        self, session, interaction_repository, joke_repository, created_user, created_joke
+    ):
+        """Test recording feedback bumps the joke counters, rating and user stats."""
+        views, likes = created_joke.view_count, created_joke.like_count
+
+        await interaction_repository.record_feedback(created_user.id, created_joke.id, 'view')
+        await interaction_repository.record_feedback(created_user.id, created_joke.id, 'like')
+
+        joke = await joke_repository.get(created_joke.id)
+        assert joke.view_count == views + 1
+        assert joke.like_count == likes + 1
+        assert joke.rating == round((likes + 1) / (views + 1) * 5, 2)
+
+        result = await session.execute(select(UserStats).where(UserStats.user_id == created_user.id))
+        stats = result.scalar_one()
+        assert (stats.jokes_viewed, stats.jokes_liked, stats.jokes_skipped) == (1, 1, 0)
+        assert stats.last_active is not None
+
+    @pytest.mark.asyncio
+    async def test_sentiment_stats_cached_until_feedback(
+        self,
+        session,
+        interaction_repository,
+        created_user,
+        multiple_jokes
+    ):
+        """Test sentiment stats are memoized and dropped when the user records feedback."""
+        first = await interaction_repository.get_user_sentiment_stats(created_user.id)
+
+        session.add(JokeInteraction(user_id=created_user.id, joke_id=multiple_jokes[0].id, interaction_type='like'))
+        await session.commit()
+        assert await interaction_repository.get_user_sentiment_stats(created_user.id) == first
+
+        await interaction_repository.record_feedback(created_user.id, multiple_jokes[1].id, 'like')
+        stats = await interaction_repository.get_user_sentiment_stats(created_user.id)
+        assert stats['interaction_breakdown'] == {'like': 2}
+
+    @pytest.mark.asyncio
+    async def test_record_feedback_existing_interaction(self, session, interaction_repository, created_user, created_joke):
+        """Test repeated feedback returns the stored interaction without counting it twice."""
+        first = await interaction_repository.record_feedback(created_user.id, created_joke.id, 'like')
+        second = await interaction_repository.record_feedback(created_user.id, created_joke.id, 'like')
+
+        assert second.id == first.id
+        assert first.created_at is not None
+        assert await interaction_repository.count() == 1
+
+        result = await session.execute(select(UserStats.jokes_liked).where(UserStats.user_id == created_user.id))
+        assert result.scalar_one() == 1
+
+    def test_calculate_percentile(self, interaction_repository):
+        """Test the percentile counts the values strictly below the given one."""
+        values = [0.0, 0.5, 0.5, 1.0]
+
+        assert interaction_repository._calculate_percentile(0.5, values) == 25.0
+        assert interaction_repository._calculate_percentile(-1.0, values) == 0.0
+        assert interaction_repository._calculate_percentile(2.0, values) == 100.0
+        assert interaction_repository._calculate_percentile(1.0, []) == 50.0
+
+    def test_similar_users_query_tablesample(self):
+        """Test the cohort query can run over a Bernoulli sample of user stats."""
+        sampled = aliased(UserStats, tablesample(UserStats.__table__, func.bernoulli(1.5)))
+        query = InteractionRepository._similar_users_query(sampled, 'user-id', 20, 10, 100)
+
+        sql = str(query.compile(dialect=postgresql.dialect()))
+        assert 'TABLESAMPLE bernoulli' in sql
+        assert 'ORDER BY random()' in sql
+
+    @pytest.mark.asyncio
+    async def test_get_content_preference_analysis(self, session, interaction_repository, created_user, multiple_jokes):
+        """Test preferences are grouped by rating and length buckets in SQL."""
+        # Jokes 0, 4 and 8 are short 'funny' jokes rated 2.0; 3 and 7 are 'dad_jokes' rated 5.0
+        for joke in (multiple_jokes[0], multiple_jokes[4], multiple_jokes[8]):
+            session.add(JokeInteraction(user_id=created_user.id, joke_id=joke.id, interaction_type='like'))
+        for joke in (multiple_jokes[3], multiple_jokes[7]):
+            session.add(JokeInteraction(user_id=created_user.id, joke_id=joke.id, interaction_type='skip'))
+        session.add(JokeInteraction(user_id=created_user.id, joke_id=multiple_jokes[1].id, interaction_type='like'))
+        await session.commit()
+
+        analysis = await interaction_repository.get_content_preference_analysis(created_user.id, min_interactions=2)
+
+        assert analysis['analysis_status'] == 'success'
+        assert analysis['total_analyzed_interactions'] == 2
+        assert [c['category'] for c in analysis['preferred_categories']] == ['funny', 'dad_jokes']
+        assert analysis['rating_preferences'] == {
+            'low': {'positive': 3, 'negative': 0},
+            'high': {'positive': 0, 'negative': 2}
+        }
+        assert analysis['length_preferences'] == {'short': 3, 'medium': 0, 'long': 0}
+
+    @pytest.mark.asyncio
+    async def test_get_interaction_summary_report(
+        self,
+        session,
+        interaction_repository,
+        created_user,
+        multiple_users,
+        multiple_jokes
+    ):
+        """Test the summary report totals, daily breakdown and top categories."""
+        now = datetime.utcnow()
+        yesterday = now - timedelta(days=1)
+        for user in (created_user, multiple_users[0]):
+            session.add(JokeInteraction(user_id=user.id, joke_id=multiple_jokes[0].id, interaction_type='view', created_at=now))
+        session.add(JokeInteraction(
+            user_id=created_user.id, joke_id=multiple_jokes[1].id, interaction_type='like', created_at=yesterday
+        ))
+        session.add(JokeInteraction(
+            user_id=multiple_users[0].id, joke_id=multiple_jokes[0].id, interaction_type='like', created_at=yesterday
+        ))
+        await session.commit()
+
+        report = await interaction_repository.get_interaction_summary_report(now - timedelta(days=2), now)
+
+        assert report['summary']['total_interactions'] == 4
+        assert report['summary']['total_unique_users'] == 2
+        assert report['interaction_by_type'] == {
+            'view': {'count': 2, 'unique_users': 2},
+            'like': {'count': 2, 'unique_users': 2}
+        }
+        assert report['daily_breakdown'] == {yesterday.strftime('%Y-%m-%d'): 2, now.strftime('%Y-%m-%d'): 2}
+        assert report['top_categories'] == [
+            {'category': 'funny', 'interactions': 3},
+            {'category': 'puns', 'interactions': 1}
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_interaction_summary_report_empty(self, interaction_repository):
+        """Test an empty range reports no users and no interactions."""
+        now = datetime.utcnow()
+        report = await interaction_repository.get_interaction_summary_report(now - timedelta(days=1), now)
+
+        assert report['summary']['total_interactions'] == 0
+        assert report['summary']['total_unique_users'] == 0
+
+    @pytest.mark.asyncio
+    async def test_relationships_are_opt_in(self, session, interaction_repository, created_user, created_joke):
+        """Test interactions are loaded without user/joke unless requested."""
+        session.add(JokeInteraction(user_id=created_user.id, joke_id=created_joke.id, interaction_type='view'))
+        await session.commit()
+        session.expunge_all()
+
+        [interaction] = await interaction_repository.get_multi()
+        assert {'user', 'joke'} <= inspect(interaction).unloaded
+
+        session.expunge_all()
+        [interaction] = await interaction_repository.get_multi(relationships=['user', 'joke'])
+        assert interaction.user.id == created_user.id
+        assert interaction.joke.id == created_joke.id
+
+    def test_compute_sentiment_view_only(self):
+        """Test view-only counts are neutral with full confidence."""
+        stats = InteractionRepository._compute_sentiment_from_counts({'view': 12})
+
+        assert stats['sentiment'] == 'neutral'
+        assert stats['confidence'] == 1.0
+        assert stats['sentiment_score'] == 0.0
+        assert stats['engagement_level'] == 'medium'
+
+    @pytest.mark.asyncio
+    async def test_record_skip_leaves_joke_untouched(self, session, interaction_repository, created_user, created_joke):
+        """Test a skip only updates the user's stats, not the joke."""
+        rating, views, likes = created_joke.rating, created_joke.view_count, created_joke.like_count
+
+        await interaction_repository.record_feedback(created_user.id, created_joke.id, 'skip')
+
+        await session.refresh(created_joke)
+        assert (created_joke.rating, created_joke.view_count, created_joke.like_count) == (rating, views, likes)
+        result = await session.execute(select(UserStats.jokes_skipped).where(UserStats.user_id == created_user.id))
+        assert result.scalar_one() == 1
@@ -2,8 +2,14 @@
 
 import pytest
 from datetime import datetime, timedelta
+from sqlalchemy import func, inspect, select, tablesample
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import aliased
+from sqlalchemy.exc import InvalidRequestError
 
+from database.models import Joke, JokeInteraction, UserStats
 from database.repositories.base import RepositoryError, NotFoundError
+from database.repositories.cache import AnalyticsCache
 from tests.test_repositories.conftest import create_test_interactions
 
 
@@ -135,6 +141,26 @@ class TestJokeRepository:
         if funny_jokes:
             unseen_ids = {joke.id for joke in unseen_funny_jokes}
             assert funny_jokes[0].id not in unseen_ids
+
+    @pytest.mark.asyncio
+    async def test_get_by_tags_reuses_statement_with_new_values(
+        self,
+        joke_repository,
+        interaction_repository,
+        multiple_jokes,
+        multiple_users
+    ):
+        """Test repeated calls bind each call's own user, categories and limit."""
+        funny_jokes = [j for j in multiple_jokes if j.category == 'funny']
+        await interaction_repository.record_feedback(multiple_users[0].id, funny_jokes[0].id, 'view')
+
+        seen_by_first = await joke_repository.get_by_tags(['funny'], user_id=multiple_users[0].id)
+        seen_by_second = await joke_repository.get_by_tags(['funny'], user_id=multiple_users[1].id)
+        puns = await joke_repository.get_by_tags(['puns'], user_id=multiple_users[1].id, limit=1)
+
+        assert len(seen_by_first) == len(funny_jokes) - 1
+        assert len(seen_by_second) == len(funny_jokes)
+        assert [joke.category for joke in puns] == ['puns']
     
     @pytest.mark.asyncio
     async def test_mark_as_seen(
@@ -232,6 +258,24 @@ class TestJokeRepository:
         assert len(trending_jokes) <= 5
         # Trending jokes should be ordered by interaction count
         # (can't verify exact order due to random interactions)
+
+    @pytest.mark.asyncio
+    async def test_get_trending_jokes_ordered_by_recent_count(
+        self,
+        joke_repository,
+        interaction_repository,
+        multiple_jokes,
+        multiple_users
+    ):
+        """Test trending jokes come back most recently interacted first."""
+        busy, quiet = multiple_jokes[0], multiple_jokes[1]
+        for user in multiple_users[:3]:
+            await interaction_repository.record_feedback(user.id, busy.id, 'view')
+        await interaction_repository.record_feedback(multiple_users[0].id, quiet.id, 'view')
+
+        trending_jokes = await joke_repository.get_trending_jokes(limit=5)
+
+        assert [joke.id for joke in trending_jokes] == [busy.id, quiet.id]
     
     @pytest.mark.asyncio
     async def test_get_user_favorites(
@@ -256,15 +300,43 @@ class TestJokeRepository:
         await session.commit()
         
         # Get user favorites
-        favorites = await joke_repository.get_user_favorites(
+        favorites, next_cursor = await joke_repository.get_user_favorites(
             user_id=user.id,
             limit=10
         )
         
         assert len(favorites) == 3
+        assert next_cursor is None
         favorite_ids = {joke.id for joke in favorites}
         expected_ids = {joke.id for joke in favorite_jokes}
         assert favorite_ids == expected_ids
+
+    @pytest.mark.asyncio
+    async def test_get_user_favorites_pages_with_cursor(
+        self,
+        joke_repository,
+        created_user,
+        multiple_jokes,
+        session
+    ):
+        """Test favorites sharing a timestamp are paged without gaps or repeats."""
+        from database.models import Favorite
+
+        # Every favorite ties on created_at, so the id has to break the tie
+        favorited_at = datetime(2024, 1, 1)
+        for joke in multiple_jokes[:3]:
+            session.add(Favorite(user_id=created_user.id, joke_id=joke.id, created_at=favorited_at))
+        await session.commit()
+
+        first_page, cursor = await joke_repository.get_user_favorites(created_user.id, limit=2)
+        second_page, last_cursor = await joke_repository.get_user_favorites(
+            created_user.id, cursor=cursor, limit=2
+        )
+
+        assert len(first_page) == 2
+        assert len(second_page) == 1
+        assert last_cursor is None
+        assert {joke.id for joke in first_page + second_page} == {joke.id for joke in multiple_jokes[:3]}
     
     @pytest.mark.asyncio
     async def test_get_recommended_jokes(
@@ -296,6 +368,22 @@ class TestJokeRepository:
         assert len(recommended_jokes) <= 5
         # Should include jokes from preferred categories that user hasn't seen
     
+    @pytest.mark.asyncio
+    async def test_get_recommended_jokes_from_liked_category(
+        self,
+        joke_repository,
+        interaction_repository,
+        created_user,
+        multiple_jokes
+    ):
+        """Test recommendations come from the liked category and skip seen jokes."""
+        puns = [joke for joke in multiple_jokes if joke.category == 'puns']
+        await interaction_repository.record_feedback(created_user.id, puns[0].id, 'like')
+
+        recommended = await joke_repository.get_recommended_jokes(created_user.id, limit=5)
+
+        assert {joke.id for joke in recommended} == {joke.id for joke in puns[1:]}
+
     @pytest.mark.asyncio
     async def test_search_jokes(self, joke_repository, multiple_jokes):
         """Test searching jokes by text content."""
@@ -354,6 +442,33 @@ class TestJokeRepository:
         assert 'like_count' in stats
         assert isinstance(stats['interactions'], dict)
     
+    @pytest.mark.asyncio
+    async def test_get_joke_stats_counts(
+        self,
+        session,
+        joke_repository,
+        interaction_repository,
+        created_joke,
+        multiple_users
+    ):
+        """Test interaction and favorite counts are reported per joke."""
+        from database.models import Favorite
+
+        await interaction_repository.record_feedback(multiple_users[0].id, created_joke.id, 'like')
+        await interaction_repository.record_feedback(multiple_users[1].id, created_joke.id, 'like')
+        await interaction_repository.record_feedback(multiple_users[1].id, created_joke.id, 'skip')
+        session.add(Favorite(user_id=multiple_users[0].id, joke_id=created_joke.id))
+        await session.commit()
+
+        stats = await joke_repository.get_joke_stats(created_joke.id)
+
+        assert stats['interactions'] == {'like': 2, 'skip': 1}
+        assert stats['favorite_count'] == 1
+
+        await session.refresh(created_joke)
+        assert stats['like_count'] == created_joke.like_count
+        assert stats['text_length'] == len(created_joke.text)
+
     @pytest.mark.asyncio
     async def test_get_joke_stats_nonexistent(self, joke_repository):
         """Test getting stats for non-existent joke."""
@@ -377,6 +492,25 @@ class TestJokeRepository:
             assert 'total_likes' in category_stat
             assert 'engagement_rate' in category_stat
     
+    @pytest.mark.asyncio
+    async def test_get_category_stats_uses_analytics_cache(self, session, joke_repository, multiple_jokes):
+        """Test category stats are cached until jokes are written through the repository."""
+        joke_repository._analytics_cache = AnalyticsCache()
+
+        first = await joke_repository.get_category_stats()
+        session.add(Joke(text='Extra pun', category='puns', language='en', view_count=10, like_count=5))
+        await session.commit()
+
+        assert await joke_repository.get_category_stats('en') == first
+
+        await joke_repository.create({'text': 'Another pun', 'category': 'puns', 'language': 'en'})
+        refreshed = {stat['category']: stat for stat in await joke_repository.get_category_stats()}
+        puns = next(stat for stat in first if stat['category'] == 'puns')
+        assert refreshed['puns']['joke_count'] == puns['joke_count'] + 2
+        assert refreshed['puns']['engagement_rate'] == pytest.approx(
+            refreshed['puns']['total_likes'] * 100 / refreshed['puns']['total_views']
+        )
+
     @pytest.mark.asyncio
     async def test_bulk_mark_as_seen(
         self,
@@ -439,6 +573,18 @@ class TestJokeRepository:
         expected_rating = round((updated_joke.like_count / max(updated_joke.view_count, 1)) * 5, 2)
         assert updated_joke.rating == expected_rating
     
+    @pytest.mark.asyncio
+    async def test_update_joke_ratings_counts_changed_rows(self, session, joke_repository, created_joke):
+        """Test only jokes whose stored rating is stale are updated."""
+        created_joke.view_count, created_joke.like_count, created_joke.rating = 4, 1, 0.0
+        await session.commit()
+
+        assert await joke_repository.update_joke_ratings() == 1
+        assert await joke_repository.update_joke_ratings() == 0
+
+        await session.refresh(created_joke)
+        assert created_joke.rating == 1.25
+
     @pytest.mark.asyncio
     async def test_get_random_unseen_with_exclusions(
         self,
@@ -525,4 +671,158 @@ class TestJokeRepository:
             query_text='definitely_not_in_any_joke_text_12345',
             limit=10
         )
-        assert len(search_results) == 0
\ No newline at end of file
+        assert len(search_results) == 0
+
+    @pytest.mark.asyncio
+    async def test_bulk_mark_as_seen_deduplicates(
+        self,
+        session,
+        joke_repository,
+        created_user,
+        multiple_jokes
+    ):
+        """Test bulk marking skips duplicates, returns existing rows and counts stats once."""
+        joke = multiple_jokes[0]
+        view_count = joke.view_count
+        first = JokeInteraction(user_id=created_user.id, joke_id=joke.id, interaction_type='view')
+        session.add(first)
+        await session.commit()
+
+        interactions = await joke_repository.bulk_mark_as_seen([
+            {'user_id': created_user.id, 'joke_id': joke.id, 'interaction_type': 'view'},
+            {'user_id': created_user.id, 'joke_id': joke.id, 'interaction_type': 'like'},
+            {'user_id': created_user.id, 'joke_id': joke.id, 'interaction_type': 'like'},
+            {'user_id': created_user.id, 'joke_id': multiple_jokes[1].id},
+            {'user_id': created_user.id}
+        ])
+
+        assert [(i.joke_id, i.interaction_type) for i in interactions] == [
+            (joke.id, 'view'),
+            (joke.id, 'like'),
+            (multiple_jokes[1].id, 'view')
+        ]
+        assert interactions[0].id == first.id
+
+        await session.refresh(joke)
+        assert joke.view_count == view_count
+        result = await session.execute(select(UserStats).where(UserStats.user_id == created_user.id))
+        stats = result.scalar_one()
+        assert (stats.jokes_viewed, stats.jokes_liked) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_bulk_mark_as_seen_updates_loaded_joke(
+        self,
+        session,
+        joke_repository,
+        multiple_users,
+        multiple_jokes
+    ):
+        """Test a joke already in the session reads the new counters after a bulk mark."""
+        joke = multiple_jokes[0]
+        view_count = joke.view_count
+
+        await joke_repository.bulk_mark_as_seen([
+            {'user_id': user.id, 'joke_id': joke.id, 'interaction_type': 'view'}
+            for user in multiple_users[:2]
+        ])
+        await session.commit()
+
+        loaded = await joke_repository.get(joke.id)
+        assert loaded is joke
+        assert loaded.view_count == view_count + 2
+
+    @pytest.mark.asyncio
+    async def test_list_queries_do_not_load_interactions(self, joke_repository, multiple_jokes):
+        """Test list endpoints skip loading interactions and fail loudly on access."""
+        jokes = await joke_repository.search_jokes('test joke')
+
+        assert jokes
+        assert 'interactions' in inspect(jokes[0]).unloaded
+        with pytest.raises(InvalidRequestError):
+            jokes[0].interactions
+
+    def test_random_unseen_query_over_sample(self, joke_repository):
+        """Test the unseen query can run over a Bernoulli sample of jokes."""
+        sampled = aliased(Joke, tablesample(Joke.__table__, func.bernoulli(2.0)))
+        query = joke_repository._random_unseen_query(sampled, 'user-id', 'puns', 'en', ['x'], 3.0, 20)
+
+        sql = str(query.compile(dialect=postgresql.dialect()))
+        assert 'TABLESAMPLE bernoulli' in sql
+        assert 'joke_interactions.joke_id = jokes_1.id' in sql
+        assert 'ORDER BY jokes_1.rating DESC, jokes_1.id DESC' in sql
+
+    def test_search_query_uses_full_text_index_expression(self, joke_repository):
+        """Test full-text search matches the indexed tsvector expression and ranks results."""
+        query = joke_repository._search_query('cat pun', 'en', None, 0.0, 20, full_text=True)
+
+        sql = str(query.compile(dialect=postgresql.dialect()))
+        assert "to_tsvector('simple', jokes.text) @@ websearch_to_tsquery('simple'" in sql
+        assert 'ORDER BY ts_rank_cd(' in sql
+        assert 'ILIKE' not in sql
+
+    @pytest.mark.asyncio
+    async def test_mark_as_seen_updates_rating_in_sql(self, session, joke_repository, created_user, created_joke):
+        """Test marking a like bumps the counter and recomputes the rating."""
+        views, likes = created_joke.view_count, created_joke.like_count
+
+        await joke_repository.mark_as_seen(created_user.id, created_joke.id, 'like')
+        await session.refresh(created_joke)
+
+        assert created_joke.like_count == likes + 1
+        if views:
+            assert created_joke.rating == round((likes + 1) / views * 5, 2)
+
+    @pytest.mark.asyncio
+    async def test_mark_as_seen_duplicate_leaves_stats(self, session, joke_repository, created_user, created_joke):
+        """Test a repeated interaction is not counted again."""
+        views = created_joke.view_count
+
+        await joke_repository.mark_as_seen(created_user.id, created_joke.id, 'view')
+        await joke_repository.mark_as_seen(created_user.id, created_joke.id, 'view')
+        await session.refresh(created_joke)
+
+        assert created_joke.view_count == views + 1
+
+    @pytest.mark.asyncio
+    async def test_mark_as_seen_upserts_user_stats(self, session, joke_repository, created_user, multiple_jokes):
+        """Test user stats are created on the first interaction and bumped afterwards."""
+        await joke_repository.mark_as_seen(created_user.id, multiple_jokes[0].id, 'view')
+        await joke_repository.mark_as_seen(created_user.id, multiple_jokes[1].id, 'view')
+        await joke_repository.mark_as_seen(created_user.id, multiple_jokes[1].id, 'like')
+
+        stats = (await session.execute(
+            select(UserStats).where(UserStats.user_id == created_user.id)
+        )).scalar_one()
+        assert (stats.jokes_viewed, stats.jokes_liked, stats.jokes_skipped) == (2, 1, 0)
+
+    @pytest.mark.asyncio
+    async def test_bulk_mark_as_seen_leaves_transaction_to_caller(
+        self,
+        session,
+        joke_repository,
+        created_user,
+        multiple_jokes
+    ):
+        """Test bulk marking does not commit, so the caller can still roll back."""
+        user_id = created_user.id
+        await joke_repository.bulk_mark_as_seen([
+            {'user_id': user_id, 'joke_id': joke.id} for joke in multiple_jokes[:3]
+        ])
+        assert session.in_transaction()
+
+        await session.rollback()
+
+        count = await session.scalar(
+            select(func.count(JokeInteraction.id)).where(JokeInteraction.user_id == user_id)
+        )
+        assert count == 0
+
+    @pytest.mark.asyncio
+    async def test_iter_viewed_jokes_streams_without_relationships(self, joke_repository, multiple_jokes):
+        """Test streaming yields only viewed jokes and never lazy loads relationships."""
+        streamed = [joke async for joke in joke_repository.iter_viewed_jokes(language='en')]
+
+        assert {joke.id for joke in streamed} == {j.id for j in multiple_jokes if j.view_count > 0}
+        assert [joke.id for joke in streamed] == sorted(joke.id for joke in streamed)
+        with pytest.raises(InvalidRequestError):
+            streamed[0].favorites